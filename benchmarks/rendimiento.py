@@ -0,0 +1,286 @@
+"""
+Pruebas de rendimiento del simulador y del algoritmo genético.
+
+Mide, sobre redes sintéticas de 20, 200, 2000 y 20000 semáforos
+(services.generador_redes, cuatro semáforos por intersección):
+- simulador: RedVial.simular_llegada_poisson + RedVial.simular_trafico
+  (vehículos y semáforo-segundos simulados por segundo)
+- fitness: IndividuoAG.calcular_fitness (evaluaciones y vehículo-segundos
+  simulados por segundo)
+- generacion: AlgoritmoGenetico.ejecutar (tiempo de pared por generación y
+  evaluaciones de una corrida con semilla fija)
+y la memoria pico de cada caso (tracemalloc, en una pasada aparte para no
+distorsionar los tiempos).
+
+Cada muestra de tiempo repite el caso hasta durar al menos --tiempo-minimo
+segundos; las muestras se toman por rondas que recorren todos los casos, y
+se reporta la mediana de --repeticiones muestras junto con su dispersión
+relativa (desviación absoluta mediana / mediana). Todas las
+llegadas usan semillas fijas, así que la memoria pico y las evaluaciones son
+deterministas.
+
+Los resultados se comparan con la línea base guardada en linea_base.json. Una
+métrica de tiempo es regresión si empeora más que la tolerancia o, si es
+mayor, que FACTOR_DISPERSION veces la dispersión medida (en la corrida o en la
+línea base); las métricas deterministas usan su propia tolerancia, mucho más
+estrecha. Con alguna regresión el programa termina con código 1.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.rendimiento                  # medir y comparar
+    python -m benchmarks.rendimiento --guardar        # medir y guardar línea base
+    python -m benchmarks.rendimiento --tamaños 20 200 --casos fitness
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from models.algoritmo_genetico import AlgoritmoGenetico
+from models.curvas import totales_red
+from models.individuo_ag import IndividuoAG
+from services.cargar_red import red_desde_datos
+from services.generador_redes import TIPOS_RED, generar_red
+
+ARCHIVO_LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base.json')
+TAMAÑOS = (20, 200, 2000, 20000)
+CASOS = ('simulador', 'fitness', 'generacion')
+
+# Métricas comparadas con la línea base: (más es mejor, determinista)
+METRICAS = {
+    'vehiculos_s': (True, False),
+    'vehiculo_segundos_s': (True, False),
+    'semaforo_segundos_s': (True, False),
+    'evaluaciones_s': (True, False),
+    'segundos_generacion': (False, False),
+    'memoria_pico_mb': (False, True),
+    'evaluaciones': (False, True),
+}
+# Margen de las métricas de tiempo en múltiplos de la dispersión relativa medida
+FACTOR_DISPERSION = 3
+
+
+def red_sintetica(num_semaforos, tipo='cuadricula', semilla=0):
+    """Red sintética con cuatro semáforos por intersección (services.generador_redes)"""
+    num_intersecciones = max(1, -(-num_semaforos // 4))
+    datos = generar_red(num_intersecciones, tipo, semilla, semaforos_por_interseccion=4)
+    return red_desde_datos(datos)
+
+
+def _vaciar_colas(red_vial):
+    for cola in red_vial.colas:
+        cola.clear()
+
+
+def caso_simulador(red_vial, duracion, tasa_llegada, **_):
+    """Simulador original basado en deques; retorna (función, métricas a partir del tiempo)"""
+    num_semaforos = red_vial.num_semaforos
+    llegadas = []
+
+    def correr():
+        _vaciar_colas(red_vial)
+        np.random.seed(0)
+        red_vial.simular_llegada_poisson(tasa_llegada, duracion)
+        llegadas.append(sum(len(cola) for cola in red_vial.colas))
+        red_vial.simular_trafico(duracion)
+
+    def metricas(segundos):
+        return {'vehiculos_s': llegadas[-1] / segundos,
+                'semaforo_segundos_s': num_semaforos * duracion / segundos}
+    return correr, metricas
+
+
+def caso_fitness(red_vial, duracion, tasa_llegada, evaluaciones=5, **_):
+    """
+    IndividuoAG.calcular_fitness con el contexto de evaluación de la red. Los
+    vehículo-segundos simulados (demora total de las curvas acumuladas,
+    incluidos los vehículos que siguen en cola) se cuentan en una pasada
+    previa sin medir: con llegadas de semilla fija son los mismos en cada corrida.
+    """
+    num_semaforos = red_vial.num_semaforos
+    rng = np.random.default_rng(0)
+    individuos = [IndividuoAG(num_semaforos, rng) for _ in range(evaluaciones)]
+    contexto = red_vial.obtener_contexto_evaluacion()  # Construcción del contexto fuera de la medición
+
+    def correr():
+        for semilla, individuo in enumerate(individuos):
+            individuo.calcular_fitness(red_vial, tasa_llegada, duracion, rng=np.random.default_rng(semilla))
+
+    vehiculo_segundos = 0.0
+    for semilla, individuo in enumerate(individuos):
+        individuo.calcular_fitness(red_vial, tasa_llegada, duracion, rng=np.random.default_rng(semilla))
+        vehiculo_segundos += totales_red(contexto.metricas_curvas())['demora_total']
+
+    def metricas(segundos):
+        return {'evaluaciones_s': evaluaciones / segundos,
+                'vehiculo_segundos_s': vehiculo_segundos / segundos,
+                'semaforo_segundos_s': evaluaciones * num_semaforos * duracion / segundos}
+    return correr, metricas
+
+
+def caso_generacion(red_vial, duracion, tasa_llegada, poblacion=10, generaciones=2, **_):
+    """
+    AlgoritmoGenetico.ejecutar completo: tiempo promedio por generación (incluye
+    la inicial) y planes distintos simulados en la corrida
+    """
+    num_semaforos = red_vial.num_semaforos
+    evaluados = []
+
+    def correr():
+        ag = AlgoritmoGenetico(poblacion, num_semaforos, red_vial, max_generaciones=generaciones,
+                               semilla=0, tasa_llegada=tasa_llegada, duracion_sim=duracion, verbose=False)
+        ag.ejecutar()
+        evaluados.append(len(ag.cache_evaluaciones))
+
+    def metricas(segundos):
+        return {'segundos_generacion': segundos / (generaciones + 1), 'evaluaciones': evaluados[-1]}
+    return correr, metricas
+
+
+FUNCIONES_CASO = {'simulador': caso_simulador, 'fitness': caso_fitness, 'generacion': caso_generacion}
+
+
+def muestra_tiempo(correr, tiempo_minimo):
+    """Segundos por corrida de corridas seguidas que duran al menos `tiempo_minimo` segundos"""
+    gc.collect()
+    corridas, inicio = 0, time.perf_counter()
+    while True:
+        correr()
+        corridas += 1
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= tiempo_minimo:
+            return transcurrido / corridas
+
+
+def memoria_pico_mb(correr):
+    """Memoria pico de una corrida (tracemalloc), en MB"""
+    gc.collect()
+    tracemalloc.start()
+    correr()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico / 2 ** 20
+
+
+def medir(casos, repeticiones, tiempo_minimo):
+    """
+    Mide los casos {clave: (correr, metricas)}: mediana de `repeticiones`
+    muestras de tiempo, su dispersión relativa y la memoria pico de una corrida
+    adicional. Las muestras se toman por rondas (una de cada caso por ronda),
+    de modo que las de un mismo caso se reparten a lo largo de toda la medición
+    y los periodos en que la máquina va más lenta afectan a todos los casos
+    por igual y quedan reflejados en la dispersión.
+    """
+    for correr, _ in casos.values():
+        correr()  # Calentamiento: búferes y contextos ya reservados
+    muestras = {clave: [] for clave in casos}
+    for ronda in range(repeticiones):
+        print(f"Ronda {ronda + 1}/{repeticiones}...")
+        for clave, (correr, _) in casos.items():
+            muestras[clave].append(muestra_tiempo(correr, tiempo_minimo))
+
+    resultados = {}
+    for clave, (correr, metricas) in casos.items():
+        mediana = float(np.median(muestras[clave]))
+        resultado = metricas(mediana)
+        resultado['memoria_pico_mb'] = memoria_pico_mb(correr)
+        resultado['segundos'] = mediana
+        resultado['dispersion'] = float(np.median(np.abs(np.array(muestras[clave]) - mediana))) / mediana
+        resultados[clave] = resultado
+    return resultados
+
+
+def comparar(resultados, linea_base, tolerancia, tolerancia_determinista):
+    """
+    Lista de regresiones (clave, métrica, base, actual, margen) que superan su
+    margen: la tolerancia determinista para memoria y evaluaciones, y para los
+    tiempos la tolerancia o FACTOR_DISPERSION veces la mayor dispersión medida
+    """
+    regresiones = []
+    for clave, metricas in resultados.items():
+        base = linea_base.get(clave)
+        if not base:
+            continue
+        dispersion = max(metricas.get('dispersion', 0), base.get('dispersion', 0))
+        for metrica, (mas_es_mejor, determinista) in METRICAS.items():
+            if metrica not in metricas or metrica not in base:
+                continue
+            actual, referencia = metricas[metrica], base[metrica]
+            margen = tolerancia_determinista if determinista else max(tolerancia, FACTOR_DISPERSION * dispersion)
+            if mas_es_mejor:
+                empeora = actual < referencia * (1 - margen)
+            else:
+                empeora = actual > referencia * (1 + margen)
+            if empeora:
+                regresiones.append((clave, metrica, referencia, actual, margen))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento del simulador y del AG")
+    parser.add_argument('--tamaños', type=int, nargs='+', default=list(TAMAÑOS), help="número de semáforos")
+    parser.add_argument('--casos', nargs='+', choices=CASOS, default=list(CASOS))
+    parser.add_argument('--tipo', choices=TIPOS_RED, default='cuadricula', help="tipo de red sintética")
+    parser.add_argument('--duracion', type=int, default=300, help="segundos simulados por evaluación")
+    parser.add_argument('--tasa', type=float, default=0.2, help="tasa de llegada por cola y segundo")
+    parser.add_argument('--repeticiones', type=int, default=5, help="muestras de tiempo por caso (se usa la mediana)")
+    parser.add_argument('--tiempo-minimo', type=float, default=0.5,
+                        help="segundos mínimos de cada muestra (repite el caso hasta alcanzarlos)")
+    parser.add_argument('--max-semaforos-simulador', type=int, default=2000,
+                        help="el simulador con deques solo se mide hasta este tamaño (es muy lento)")
+    parser.add_argument('--guardar', action='store_true', help="guarda los resultados como línea base")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="empeoramiento relativo admitido en los tiempos (mínimo; crece con la dispersión)")
+    parser.add_argument('--tolerancia-determinista', type=float, default=0.02,
+                        help="empeoramiento relativo admitido en memoria pico y evaluaciones")
+    parser.add_argument('--linea-base', default=ARCHIVO_LINEA_BASE)
+    args = parser.parse_args(argv)
+
+    parametros = {'duracion': args.duracion, 'tasa_llegada': args.tasa}
+    configuracion = dict(parametros, tipo=args.tipo)
+    casos = {}
+    for tamaño in args.tamaños:
+        red_vial = red_sintetica(tamaño, args.tipo)
+        for caso in args.casos:
+            if caso == 'simulador' and tamaño > args.max_semaforos_simulador:
+                continue
+            casos[f"{caso}/{tamaño}"] = FUNCIONES_CASO[caso](red_vial, **parametros)
+    resultados = medir(casos, args.repeticiones, args.tiempo_minimo)
+    for clave, metricas in resultados.items():
+        texto = ', '.join(f"{m} = {v:.4g}" for m, v in metricas.items())
+        print(f"{clave}: {texto}")
+
+    if args.guardar:
+        with open(args.linea_base, 'w', encoding='utf-8') as f:
+            json.dump({'maquina': platform.platform(), 'python': platform.python_version(),
+                       'numpy': np.__version__, 'parametros': configuracion, 'resultados': resultados},
+                      f, indent=2)
+        print(f"\nLínea base guardada en {args.linea_base}")
+        return 0
+
+    if not os.path.exists(args.linea_base):
+        print("\nNo hay línea base; ejecute con --guardar para crearla")
+        return 0
+    with open(args.linea_base, 'r', encoding='utf-8') as f:
+        linea_base = json.load(f)
+    if linea_base.get('parametros') != configuracion:
+        print(f"\nAdvertencia: la línea base se midió con otros parámetros {linea_base.get('parametros')}")
+
+    regresiones = comparar(resultados, linea_base['resultados'], args.tolerancia, args.tolerancia_determinista)
+    if not regresiones:
+        print(f"\nSin regresiones respecto a la línea base (tolerancia {args.tolerancia:.0%} en tiempos, "
+              f"{args.tolerancia_determinista:.0%} en memoria y evaluaciones)")
+        return 0
+    print("\nRegresiones:")
+    for clave, metrica, referencia, actual, margen in regresiones:
+        print(f"  {clave} {metrica}: {referencia:.4g} -> {actual:.4g} (margen {margen:.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,9 +9,7 @@ import matplotlib.colors as mcolors
 from matplotlib.cm import get_cmap
 import io
 import base64
-from IPython.display import display, HTML
 import copy
-import networkx as nx
 
 # Modificación en la función cargar_red_vial
 def cargar_red_vial(archivo_json):
@@ -1,88 +1,66 @@
-import json
+import argparse
 from models.algoritmo_genetico import AlgoritmoGenetico
-from models.interseccion import Interseccion
-from models.red_vial import RedVial
-from models.semaforo import Semaforo
-from services.generate_results import GenerateResults
-
-# Modificación en la función cargar_red_vial
-def cargar_red_vial(archivo_json):
-    """Carga la red vial desde un archivo JSON"""
-    with open(archivo_json, 'r', encoding='utf-8') as f:
-        datos = json.load(f)
-    
-    # Crear diccionario de intersecciones para referenciar
-    intersecciones_dict = {}
-    
-    # Primero crear todas las intersecciones con sus semáforos
-    for interseccion_data in datos['intersecciones']:
-        semaforos = []
-        for semaforo_data in interseccion_data['semaforos']:
-            semaforo = Semaforo(
-                id=semaforo_data['id'],
-                tiempo_verde=semaforo_data['tiempo_verde_inicial'],
-                tiempo_amarillo=semaforo_data['tiempo_amarillo_inicial'],
-                tiempo_rojo=semaforo_data['tiempo_rojo_inicial'],
-                desfase=0  # Inicialmente sin desfase
-            )
-            semaforos.append(semaforo)
-
-        # Incluir coordenadas si están disponibles
-        coordenadas = interseccion_data.get('coordenadas', None)
-        
-        interseccion = Interseccion(
-            id=interseccion_data['id'],
-            semaforos=semaforos,
-            nombre=interseccion_data.get('nombre', ''),
-            coordenadas=coordenadas
-        )
-        intersecciones_dict[interseccion.id] = interseccion
-
-            # Luego establecer las conexiones entre intersecciones
-    for interseccion_data in datos['intersecciones']:
-        interseccion = intersecciones_dict[interseccion_data['id']]
-        for conexion_id in interseccion_data['conexiones']:
-            if conexion_id in intersecciones_dict:
-                interseccion.conexiones.append(intersecciones_dict[conexion_id])
-    
-    # Crear la red vial
-    red = RedVial(list(intersecciones_dict.values()))
-    
-    # Configurar las calles y flujos de tráfico
-    for calle_data in datos['calles']:
-        desde = intersecciones_dict[calle_data['desde_interseccion']]
-        hasta = intersecciones_dict[calle_data['hasta_interseccion']]
-        red.agregar_flujo_calle(
-            desde.id, 
-            hasta.id, 
-            calle_data['flujo_promedio']['mañana'],
-            calle_data['flujo_promedio']['tarde'],
-            calle_data['flujo_promedio']['noche']
-        )
-    
-    return red
+from models.restricciones import CORREDORES
+from models.siembra import SIEMBRAS
+from services.almacen_evaluaciones import AlmacenEvaluaciones
+from services.cargar_red import cargar_red_vial
 
 # Modificar la función main para incluir la visualización
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimización de semáforos con un algoritmo genético")
+    parser.add_argument('red', nargs='?', default="zona_delimitada.json", help="archivo JSON de la red vial")
+    parser.add_argument('--headless', action='store_true',
+                        help="sin ventanas: guarda los gráficos sin mostrarlos (servidores, lotes)")
+    parser.add_argument('--sin-reportes', action='store_true',
+                        help="no genera mapas, gráficos comparativos ni tablas")
+    parser.add_argument('--codificacion', choices=('semaforo', 'fases'), default='semaforo',
+                        help="genes por semáforo o ciclo, repartos y desfase por intersección")
+    parser.add_argument('--siembra', nargs='*', choices=SIEMBRAS, default=[],
+                        help="estrategias para sembrar la población inicial")
+    parser.add_argument('--corredores', choices=CORREDORES, default='ninguno',
+                        help="semáforos que comparten la duración de ciclo (con la codificación 'semaforo')")
+    parser.add_argument('--almacen', default=None,
+                        help="base SQLite de evaluaciones reutilizadas entre ejecuciones (p. ej. evaluaciones.sqlite)")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="procesos que simulan y generan reportes en paralelo "
+                             "(por defecto todos los núcleos; 1: en serie)")
+    parser.add_argument('--esquema', choices=('generacional', 'estacionario'), default='generacional',
+                        help="generaciones completas o reemplazo estacionario asíncrono")
+    parser.add_argument('--soluciones-previas', default=None,
+                        help="archivo JSON Lines de main_lotes.py cuyas mejores soluciones se siembran")
+    args = parser.parse_args(argv)
+    
     # Cargar red vial desde JSON
-    red_vial = cargar_red_vial("zona_delimitada.json")
+    red_vial = cargar_red_vial(args.red)
+    
+    # Almacén persistente de evaluaciones (opcional)
+    almacen = AlmacenEvaluaciones(args.almacen) if args.almacen else None
     
     # Configurar y ejecutar algoritmo genético
     ag = AlgoritmoGenetico(
         tamaño_poblacion=50,
-        num_semaforos=len([s for i in red_vial.intersecciones for s in i.semaforos]),
+        num_semaforos=red_vial.num_semaforos,
         red_vial=red_vial,
         prob_cruce=0.8,
         prob_mutacion=0.1,
         elitismo=0.05,
-        max_generaciones=100
+        max_generaciones=100,
+        codificacion=args.codificacion,
+        siembra=args.siembra,
+        corredores=args.corredores,
+        soluciones_previas=args.soluciones_previas,
+        almacen=almacen,
+        procesos=args.procesos or None,
+        esquema=args.esquema
     )
     
     # Ejecutar algoritmo
     ag.ejecutar()
+    if almacen is not None:
+        almacen.cerrar()
     
     # Graficar evolución
-    ag.graficar_evolucion()
+    ag.graficar_evolucion(mostrar=not args.headless)
     
     # Obtener mejores soluciones
     mejores = ag.obtener_mejores_soluciones(3)
@@ -92,11 +70,16 @@ def main():
         print(f"\nSolución #{i+1} (Fitness: {sol.fitness:.6f}):")
         for semaforo in sol.cromosoma:
             print(semaforo)
-            
+    
+    if args.sin_reportes:
+        return
+    
+    # Folium y matplotlib solo se importan si se generan reportes
+    from services.generate_results import GenerateResults
     resultados = GenerateResults()
     
     # Generar visualizaciones completas
-    resultados.visualizar_resultados_completos(red_vial, mejores)
+    resultados.visualizar_resultados_completos(red_vial, mejores, procesos=args.procesos or None)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,74 +2,13 @@ import customtkinter as ctk
 from tkinter import messagebox, filedialog
 from PIL import Image, ImageTk
 import os
-from services.generate_results import GenerateResults
 from models.algoritmo_genetico import AlgoritmoGenetico
-from models.interseccion import Interseccion
-from models.red_vial import RedVial
-from models.semaforo import Semaforo
-import json
+from services.cargar_red import cargar_red_vial
 
 # Configuración de CustomTkinter
 ctk.set_appearance_mode("System")  # Puedes cambiar a "Dark" o "Light"
 ctk.set_default_color_theme("blue")  # Temas: "blue", "green", "dark-blue"
 
-def cargar_red_vial(archivo_json):
-    """Carga la red vial desde un archivo JSON"""
-    with open(archivo_json, 'r', encoding='utf-8') as f:
-        datos = json.load(f)
-    
-    # Crear diccionario de intersecciones para referenciar
-    intersecciones_dict = {}
-    
-    # Primero crear todas las intersecciones con sus semáforos
-    for interseccion_data in datos['intersecciones']:
-        semaforos = []
-        for semaforo_data in interseccion_data['semaforos']:
-            semaforo = Semaforo(
-                id=semaforo_data['id'],
-                tiempo_verde=semaforo_data['tiempo_verde_inicial'],
-                tiempo_amarillo=semaforo_data['tiempo_amarillo_inicial'],
-                tiempo_rojo=semaforo_data['tiempo_rojo_inicial'],
-                desfase=0  # Inicialmente sin desfase
-            )
-            semaforos.append(semaforo)
-
-        # Incluir coordenadas si están disponibles
-        coordenadas = interseccion_data.get('coordenadas', None)
-        
-        interseccion = Interseccion(
-            id=interseccion_data['id'],
-            semaforos=semaforos,
-            nombre=interseccion_data.get('nombre', ''),
-            coordenadas=coordenadas
-        )
-        intersecciones_dict[interseccion.id] = interseccion
-
-            # Luego establecer las conexiones entre intersecciones
-    for interseccion_data in datos['intersecciones']:
-        interseccion = intersecciones_dict[interseccion_data['id']]
-        for conexion_id in interseccion_data['conexiones']:
-            if conexion_id in intersecciones_dict:
-                interseccion.conexiones.append(intersecciones_dict[conexion_id])
-    
-    # Crear la red vial
-    red = RedVial(list(intersecciones_dict.values()))
-    
-    # Configurar las calles y flujos de tráfico
-    for calle_data in datos['calles']:
-        # Aquí puedes agregar más configuración según tus necesidades
-        desde = intersecciones_dict[calle_data['desde_interseccion']]
-        hasta = intersecciones_dict[calle_data['hasta_interseccion']]
-        red.agregar_flujo_calle(
-            desde.id, 
-            hasta.id, 
-            calle_data['flujo_promedio']['mañana'],
-            calle_data['flujo_promedio']['tarde'],
-            calle_data['flujo_promedio']['noche']
-        )
-    
-    return red
-
 class App:
     def __init__(self, root):
         self.root = root
@@ -141,7 +80,7 @@ class App:
             # Configurar y ejecutar algoritmo genético
             ag = AlgoritmoGenetico(
                 tamaño_poblacion=self.tamaño_poblacion.get(),
-                num_semaforos=len([s for i in red_vial.intersecciones for s in i.semaforos]),
+                num_semaforos=red_vial.num_semaforos,
                 red_vial=red_vial,
                 prob_cruce=self.prob_cruce.get(),
                 prob_mutacion=self.prob_mutacion.get(),
@@ -174,6 +113,7 @@ class App:
             self.grafico_label.image = img_tk
             
             # Generar visualizaciones completas
+            from services.generate_results import GenerateResults
             resultados = GenerateResults()
             resultados.visualizar_resultados_completos(red_vial, mejores)
             
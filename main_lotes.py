@@ -0,0 +1,182 @@
+"""
+Ejecución por lotes del algoritmo genético.
+
+Corre el AG sobre varias redes y una malla de parámetros (población,
+probabilidades de cruce y mutación, elitismo, generaciones y horizonte de
+simulación) como una cola de trabajos repartida entre procesos. Cada resultado
+se agrega como una línea JSON al archivo de salida en cuanto termina, de modo
+que un barrido interrumpido se reanuda sin repetir los trabajos ya hechos.
+Con --almacen todos los procesos comparten una base SQLite de evaluaciones
+(services/almacen_evaluaciones.py), así que los planes ya simulados en otro
+trabajo o en otro barrido con la misma red y parámetros no se repiten.
+
+Ejemplo:
+    python main_lotes.py zona_delimitada.json tuxtla_gutierrez.json \\
+        --poblacion 50 100 --prob-mutacion 0.05 0.1 --semillas 0 1 2 \\
+        --procesos 8 --salida resultados_lotes.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from models.algoritmo_genetico import AlgoritmoGenetico
+from services.almacen_evaluaciones import AlmacenEvaluaciones
+from services.cargar_red import cargar_red_vial
+
+# Parámetro de la malla -> (opción de la línea de comandos, tipo, valores por defecto)
+PARAMETROS_MALLA = {
+    'tamaño_poblacion': ('--poblacion', int, [50]),
+    'prob_cruce': ('--prob-cruce', float, [0.8]),
+    'prob_mutacion': ('--prob-mutacion', float, [0.1]),
+    'elitismo': ('--elitismo', float, [0.05]),
+    'max_generaciones': ('--generaciones', int, [100]),
+    'duracion_sim': ('--duracion', int, [3600]),
+    'corredores': ('--corredores', str, ['ninguno']),
+}
+
+# Redes ya cargadas en cada proceso trabajador, por archivo
+_redes = {}
+# Almacén de evaluaciones del proceso trabajador (una conexión por proceso)
+_almacen = None
+
+
+def _inicializar_trabajador(archivo_almacen):
+    global _almacen
+    _almacen = AlmacenEvaluaciones(archivo_almacen) if archivo_almacen else None
+
+
+def generar_trabajos(redes, malla, semillas):
+    """Producto cartesiano de redes, valores de la malla y semillas"""
+    nombres = list(malla)
+    trabajos = []
+    for red, valores, semilla in itertools.product(redes, itertools.product(*malla.values()), semillas):
+        trabajo = {'red': red, 'semilla': semilla}
+        trabajo.update(zip(nombres, valores))
+        trabajos.append(trabajo)
+    return trabajos
+
+
+def clave_trabajo(trabajo):
+    """Identificador estable de un trabajo (para reanudar barridos)"""
+    parametros = {k: trabajo[k] for k in ['red', 'semilla', *PARAMETROS_MALLA] if k in trabajo}
+    return json.dumps(parametros, sort_keys=True, ensure_ascii=False)
+
+
+def trabajos_completados(archivo_salida):
+    """Claves de los trabajos que ya tienen un resultado sin error en el archivo"""
+    completados = set()
+    if not os.path.exists(archivo_salida):
+        return completados
+    with open(archivo_salida, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                resultado = json.loads(linea)
+            except ValueError:
+                continue  # Línea truncada por una interrupción
+            if 'error' not in resultado:
+                completados.add(clave_trabajo(resultado))
+    return completados
+
+
+def ejecutar_trabajo(trabajo):
+    """Corre un AG sin mensajes y retorna un diccionario con el trabajo y su resultado"""
+    resultado = dict(trabajo)
+    try:
+        if trabajo['red'] not in _redes:
+            _redes[trabajo['red']] = cargar_red_vial(trabajo['red'])
+        red_vial = _redes[trabajo['red']]
+
+        parametros = {k: trabajo[k] for k in PARAMETROS_MALLA}
+        ag = AlgoritmoGenetico(
+            num_semaforos=red_vial.num_semaforos,
+            red_vial=red_vial,
+            semilla=trabajo['semilla'],
+            verbose=False,
+            almacen=_almacen,
+            **parametros
+        )
+        inicio = time.perf_counter()
+        ag.ejecutar()
+        mejor = ag.mejor_individuo
+        resultado.update({
+            'mejor_fitness': float(mejor.fitness),
+            'objetivos': [float(x) for x in mejor.objetivos],
+            'mejor_genes': mejor.genes.tolist(),
+            'fitness_historico': [float(f) for f in ag.mejor_fitness_historico],
+            'evaluaciones': len(ag.cache_evaluaciones),
+            'tiempo_s': time.perf_counter() - inicio,
+        })
+    except Exception as e:
+        # Un trabajo fallido no detiene el resto del barrido
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    return resultado
+
+
+def ejecutar_lotes(trabajos, archivo_salida, procesos=None, archivo_almacen=None):
+    """
+    Ejecuta los trabajos en un grupo de procesos y agrega cada resultado al
+    archivo JSON Lines apenas termina. Retorna la lista de resultados.
+    """
+    resultados = []
+    total = len(trabajos)
+    with open(archivo_salida, 'a', encoding='utf-8') as salida:
+        def registrar(resultado):
+            resultados.append(resultado)
+            salida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+            salida.flush()
+            if 'error' in resultado:
+                print(f"[{len(resultados)}/{total}] {resultado['red']}: ERROR {resultado['error']}")
+            else:
+                print(f"[{len(resultados)}/{total}] {resultado['red']} "
+                      f"(población {resultado['tamaño_poblacion']}, semilla {resultado['semilla']}): "
+                      f"fitness = {resultado['mejor_fitness']:.6f} en {resultado['tiempo_s']:.1f}s")
+
+        if procesos == 1:
+            _inicializar_trabajador(archivo_almacen)
+            for trabajo in trabajos:
+                registrar(ejecutar_trabajo(trabajo))
+        else:
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                     initargs=(archivo_almacen,)) as pool:
+                futuros = [pool.submit(ejecutar_trabajo, trabajo) for trabajo in trabajos]
+                for futuro in as_completed(futuros):
+                    registrar(futuro.result())
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ejecuta el algoritmo genético sobre varias redes y una malla de parámetros")
+    parser.add_argument('redes', nargs='+', help="archivos JSON de redes viales")
+    for nombre, (opcion, tipo, defecto) in PARAMETROS_MALLA.items():
+        parser.add_argument(opcion, dest=nombre, type=tipo, nargs='+', default=defecto,
+                            help=f"valores de {nombre} (por defecto: {' '.join(map(str, defecto))})")
+    parser.add_argument('--semillas', type=int, nargs='+', default=[0], help="semillas por configuración")
+    parser.add_argument('--procesos', type=int, default=None, help="procesos (por defecto: todos los núcleos)")
+    parser.add_argument('--salida', default='resultados_lotes.jsonl', help="archivo de resultados (JSON Lines)")
+    parser.add_argument('--almacen', default=None,
+                        help="base SQLite de evaluaciones compartida entre trabajos y barridos")
+    parser.add_argument('--repetir', action='store_true',
+                        help="vuelve a ejecutar trabajos que ya están en el archivo de salida")
+    args = parser.parse_args(argv)
+
+    malla = {nombre: getattr(args, nombre) for nombre in PARAMETROS_MALLA}
+    trabajos = generar_trabajos(args.redes, malla, args.semillas)
+    if not args.repetir:
+        completados = trabajos_completados(args.salida)
+        pendientes = [t for t in trabajos if clave_trabajo(t) not in completados]
+        if len(pendientes) < len(trabajos):
+            print(f"Omitiendo {len(trabajos) - len(pendientes)} trabajos ya completados en {args.salida}")
+        trabajos = pendientes
+
+    print(f"Ejecutando {len(trabajos)} trabajos...")
+    inicio = time.perf_counter()
+    ejecutar_lotes(trabajos, args.salida, args.procesos, args.almacen)
+    print(f"\nLote terminado en {time.perf_counter() - inicio:.1f}s. Resultados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
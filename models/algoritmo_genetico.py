@@ -1,11 +1,23 @@
 from models.individuo_ag import IndividuoAG
-import random
-import matplotlib.pyplot as plt
+from models.codificacion import crear_codificacion
+from models.operadores_geneticos import OPERADORES_CRUCE, OPERADORES_MUTACION, obtener_operador
+from models.diversidad import IndiceGenotipos, huella_genes, diversidad
+from models.nsga2 import orden_nsga2
+from models.restricciones import RestriccionesSemaforos
+from models.siembra import planes_semilla
+from models.evaluacion_paralela import EvaluadorParalelo
+from concurrent.futures import wait, FIRST_COMPLETED
+import numpy as np
 
 class AlgoritmoGenetico:
     def __init__(self, tamaño_poblacion, num_semaforos, red_vial, 
                 prob_cruce=0.8, prob_mutacion=0.1, elitismo=0.05, 
-                max_generaciones=100):
+                max_generaciones=100, operador_cruce='dos_puntos',
+                operador_mutacion='multiplicativa', parametros_operadores=None, semilla=None,
+                reintentos_duplicados=3, modo='escalar', restricciones=None,
+                tasa_llegada=0.2, duracion_sim=3600, verbose=True, codificacion='semaforo',
+                siembra=(), soluciones_previas=None, proporcion_siembra=0.5, almacen=None,
+                procesos=1, esquema='generacional', corredores='ninguno'):
         self.tamaño_poblacion = tamaño_poblacion
         self.num_semaforos = num_semaforos
         self.red_vial = red_vial
@@ -13,80 +25,284 @@ class AlgoritmoGenetico:
         self.prob_mutacion = prob_mutacion
         self.elitismo = elitismo
         self.max_generaciones = max_generaciones
+        # Parámetros de la simulación con la que se evalúa cada individuo
+        self.tasa_llegada = tasa_llegada
+        self.duracion_sim = duracion_sim
+        self.verbose = verbose  # False: sin mensajes de progreso (ejecuciones por lotes)
         self.poblacion = []
         self.mejor_fitness_historico = []
         self.mejor_individuo = None
+        
+        # Capa de restricciones y codificación del genotipo (ver models/codificacion.py):
+        # 'semaforo' evoluciona los cuatro tiempos de cada semáforo; 'fases' un ciclo,
+        # los repartos y un desfase por intersección que se decodifican a cada semáforo.
+        # `corredores` agrupa los semáforos que comparten la duración de ciclo:
+        # 'ninguno', 'interseccion' o 'calles' (componentes conexas del grafo de calles)
+        self.restricciones = restricciones or RestriccionesSemaforos(
+            num_semaforos, corredores=RestriccionesSemaforos.corredores_red(red_vial, corredores))
+        self.codificacion = crear_codificacion(codificacion, red_vial, self.restricciones)
+        self.limites_genes = self.codificacion.limites()
+        
+        # Operadores genéticos intercambiables (ver models/operadores_geneticos.py)
+        self.operador_cruce = obtener_operador(OPERADORES_CRUCE, operador_cruce)
+        self.operador_mutacion = obtener_operador(OPERADORES_MUTACION, operador_mutacion)
+        self.parametros_operadores = self.codificacion.parametros_operadores()
+        if parametros_operadores:
+            self.parametros_operadores.update(parametros_operadores)
+        
+        # Siembra de la población inicial (ver models/siembra.py): estrategias
+        # ('webster', 'onda_verde', 'actual') y soluciones de ejecuciones previas
+        self.siembra = tuple(siembra or ())
+        self.soluciones_previas = soluciones_previas
+        self.proporcion_siembra = proporcion_siembra
+        
+        # Fitness ya calculado por huella de genotipo canónico (no se re-simula)
+        self.cache_evaluaciones = {}
+        
+        # Almacén persistente opcional entre ejecuciones (services/almacen_evaluaciones.py),
+        # con la clave (huella de la red, huella de los parámetros de simulación)
+        self.almacen = almacen
+        if almacen is not None:
+            self.clave_red, self.clave_parametros = almacen.claves(
+                red_vial, tasa_llegada=tasa_llegada, duracion_sim=duracion_sim)
+        self.rng = np.random.default_rng(semilla)
+        
+        # Índice de genotipos de la generación actual para evitar clones
+        self.indice_genotipos = IndiceGenotipos()
+        self.reintentos_duplicados = reintentos_duplicados
+        self.diversidad_historica = []
+        
+        # 'escalar' usa el fitness ponderado; 'nsga2' optimiza los tres objetivos
+        # por separado y conserva el frente de Pareto
+        if modo not in ('escalar', 'nsga2'):
+            raise ValueError(f"Modo desconocido '{modo}'. Opciones: escalar, nsga2")
+        self.modo = modo
+        self.frente_pareto = []
+        
+        # Evaluación en paralelo (models/evaluacion_paralela.py): 'generacional'
+        # simula cada generación completa antes de seleccionar; 'estacionario'
+        # inserta cada hijo en cuanto llega su fitness y despacha otro enseguida
+        if esquema not in ('generacional', 'estacionario'):
+            raise ValueError(f"Esquema desconocido '{esquema}'. Opciones: generacional, estacionario")
+        self.esquema = esquema
+        self.procesos = procesos
+        self.evaluador = None
     
     def inicializar_poblacion(self):
         """Crea la población inicial de individuos"""
-        self.poblacion = [IndividuoAG(self.num_semaforos) for _ in range(self.tamaño_poblacion)]
+        aleatorios = self.codificacion.poblacion_aleatoria(self.tamaño_poblacion, self.rng).astype(float)
+        sembrados = self.genotipos_sembrados()
+        aleatorios[:len(sembrados)] = sembrados
+        self.poblacion = self.individuos_desde_matriz(aleatorios)
+    
+    def genotipos_sembrados(self):
+        """
+        Genotipos de la siembra para una proporción de la población: los planes
+        semilla codificados y, hasta completar, variantes mutadas de ellos
+        """
+        if not self.siembra and self.soluciones_previas is None:
+            return np.empty((0, self.codificacion.num_genes))
+        planes = planes_semilla(self.red_vial, self.restricciones, self.siembra,
+                                self.tasa_llegada, self.soluciones_previas)
+        cantidad = min(self.tamaño_poblacion, int(np.ceil(self.proporcion_siembra * self.tamaño_poblacion)))
+        if len(planes) == 0 or cantidad == 0:
+            return np.empty((0, self.codificacion.num_genes))
+        semillas = self.codificacion.codificar(planes)[:cantidad].astype(float)
+        variantes = semillas[np.arange(cantidad - len(semillas)) % len(semillas)]
+        return np.vstack([semillas, self.mutar_matriz(variantes)])
     
     def evaluar_poblacion(self):
         """Evalúa el fitness de todos los individuos"""
-        for individuo in self.poblacion:
-            individuo.calcular_fitness(self.red_vial)
+        self.evaluar_individuos(self.poblacion)
+    
+    def evaluar_individuos(self, individuos):
+        """Evalúa una lista de individuos reutilizando los resultados ya conocidos"""
+        huellas = [huella_genes(individuo.genes) for individuo in individuos]
+        nuevos = self.individuos_sin_evaluar(huellas, individuos)
+        
+        if nuevos:
+            # Desincronización de todos los planes nuevos en una sola operación sobre el grafo
+            planes = np.vstack([individuo.genes for individuo in nuevos.values()])
+            desincronizacion = self.red_vial.obtener_coordinacion().desincronizacion(planes)
+            semillas = self.semillas_simulacion(len(planes))
+            if self.evaluador is not None:
+                resultados = self.evaluador.evaluar(planes, desincronizacion, semillas)
+            else:
+                resultados = []
+                for individuo, d, semilla in zip(nuevos.values(), desincronizacion, semillas):
+                    individuo.calcular_fitness(self.red_vial, self.tasa_llegada, self.duracion_sim,
+                                               desincronizacion=d, rng=np.random.default_rng(semilla))
+                    resultados.append((individuo.fitness, individuo.objetivos))
+            for huella, (fitness, objetivos) in zip(nuevos, resultados):
+                self.registrar_evaluacion(huella, fitness, objetivos)
+        
+        for huella, individuo in zip(huellas, individuos):
+            individuo.fitness, individuo.objetivos = self.cache_evaluaciones[huella]
+    
+    def semillas_simulacion(self, n):
+        """
+        Semillas de las llegadas de n simulaciones, tomadas del generador del AG:
+        cada plan tiene la suya, así que el resultado no depende de en qué
+        proceso ni en qué orden se simule
+        """
+        return self.rng.integers(0, 2 ** 63, n)
+    
+    def individuos_sin_evaluar(self, huellas, individuos):
+        """
+        Individuos (por huella, sin repetir) que no están en la caché en memoria
+        ni en el almacén persistente; los del almacén pasan a la caché
+        """
+        nuevos = {}
+        for huella, individuo in zip(huellas, individuos):
+            if huella not in self.cache_evaluaciones:
+                nuevos.setdefault(huella, individuo)
+        if nuevos and self.almacen is not None:
+            almacenadas = self.almacen.buscar(self.clave_red, self.clave_parametros, list(nuevos))
+            for huella, (fitness, objetivos) in almacenadas.items():
+                objetivos = None if objetivos is None else np.array(objetivos, dtype=float)
+                self.cache_evaluaciones[huella] = (fitness, objetivos)
+                del nuevos[huella]
+        return nuevos
+    
+    def registrar_evaluacion(self, huella, fitness, objetivos):
+        """Guarda una evaluación nueva en la caché y en el almacén persistente"""
+        self.cache_evaluaciones[huella] = (fitness, objetivos)
+        if self.almacen is not None:
+            self.almacen.agregar(self.clave_red, self.clave_parametros, huella, fitness, objetivos)
     
     def seleccion_torneo(self, k=3):
         """Selecciona un individuo mediante torneo"""
-        seleccionados = random.sample(self.poblacion, k)
+        seleccionados = [self.poblacion[i] for i in self.rng.choice(len(self.poblacion), k, replace=False)]
         return max(seleccionados, key=lambda ind: ind.fitness)
     
+    def seleccion_torneo_indices(self, fitness, n, k=3):
+        """Selecciona n índices de padres mediante torneos vectorizados"""
+        candidatos = self.rng.integers(0, len(fitness), (n, k))
+        ganadores = np.argmax(fitness[candidatos], axis=1)
+        return candidatos[np.arange(n), ganadores]
+    
+    def matriz_poblacion(self, individuos):
+        """Apila los genotipos de los individuos en una matriz (individuos x genes)"""
+        return np.vstack([ind.genotipo for ind in individuos]).astype(float)
+    
+    def individuos_desde_matriz(self, matriz):
+        """Repara una matriz de genotipos a su forma canónica y la convierte en individuos"""
+        genotipos = self.codificacion.reparar(matriz)
+        planes = self.codificacion.decodificar(genotipos)
+        if planes is genotipos:  # Codificación por semáforo: el genotipo es el propio plan
+            return [IndividuoAG.desde_genes(fila) for fila in genotipos]
+        return [IndividuoAG.desde_genes(plan, genotipo) for plan, genotipo in zip(planes, genotipos)]
+    
+    def cruzar_matriz(self, padres1, padres2):
+        """Aplica el operador de cruce a todas las parejas a la vez"""
+        return self.operador_cruce(padres1, padres2, self.prob_cruce, self.rng,
+                                   self.limites_genes, **self.parametros_operadores)
+    
+    def mutar_matriz(self, poblacion, prob_mutacion=None):
+        """Aplica el operador de mutación a toda la matriz a la vez"""
+        if prob_mutacion is None:
+            prob_mutacion = self.prob_mutacion
+        return self.operador_mutacion(poblacion, prob_mutacion, self.rng,
+                                      self.limites_genes, **self.parametros_operadores)
+    
     def cruce(self, padre1, padre2):
-        """Realiza el cruce de dos puntos entre dos padres"""
-        if random.random() > self.prob_cruce:
-            return padre1, padre2
-        
-        hijo1 = IndividuoAG(0)  # Crear hijos vacíos
-        hijo2 = IndividuoAG(0)
-        hijo1.cromosoma = []
-        hijo2.cromosoma = []
+        """Cruza dos padres con el operador configurado (por defecto, dos puntos)"""
+        hijos1, hijos2 = self.cruzar_matriz(self.matriz_poblacion([padre1]),
+                                            self.matriz_poblacion([padre2]))
+        return tuple(self.individuos_desde_matriz(np.vstack([hijos1, hijos2])))
+    
+    def mutacion(self, individuo):
+        """Aplica mutación a un individuo"""
+        mutado = self.individuos_desde_matriz(self.mutar_matriz(self.matriz_poblacion([individuo])))[0]
+        individuo.genes = mutado.genes
+        individuo._genotipo = mutado._genotipo
+        individuo._cromosoma = None
+    
+    def generar_hijos(self, num_hijos=None):
+        """
+        Genera la descendencia sobre la matriz de población: toda una generación
+        o, en el esquema estacionario, solo num_hijos
+        """
+        matriz = self.matriz_poblacion(self.poblacion)
+        fitness = self.aptitud_seleccion()
+        num_parejas = ((num_hijos or self.tamaño_poblacion) + 1) // 2
         
-        # Seleccionar puntos de cruce
-        punto1 = random.randint(0, len(padre1.cromosoma) - 1)
-        punto2 = random.randint(punto1, len(padre1.cromosoma) - 1)
+        # Selección de padres por torneo, cruce y mutación en bloque
+        padres1 = matriz[self.seleccion_torneo_indices(fitness, num_parejas)]
+        padres2 = matriz[self.seleccion_torneo_indices(fitness, num_parejas)]
+        hijos1, hijos2 = self.cruzar_matriz(padres1, padres2)
+        hijos = self.mutar_matriz(np.vstack([hijos1, hijos2]))
+        if num_hijos is not None:
+            hijos = hijos[:num_hijos]
         
-        # Realizar cruce de dos puntos
-        hijo1.cromosoma = (padre1.cromosoma[:punto1] + 
-                          padre2.cromosoma[punto1:punto2] + 
-                          padre1.cromosoma[punto2:])
+        return self.individuos_desde_matriz(self.descartar_duplicados(hijos))
+    
+    def descartar_duplicados(self, hijos):
+        """
+        Vuelve a mutar los hijos que repiten un genotipo de la población actual
+        (o de otro hijo) y descarta los que sigan duplicados tras los reintentos,
+        de modo que no se simulen clones.
+        """
+        self.indice_genotipos.reconstruir(self.poblacion)
+        hijos = self.codificacion.reparar(hijos)
+        duplicados = self.indice_genotipos.filas_duplicadas(hijos)
+        # Al menos un bloque mutado en promedio para que el reintento cambie algo
+        num_bloques = self.codificacion.num_genes // self.parametros_operadores['tamaño_bloque']
+        prob_remutacion = max(self.prob_mutacion, 1.0 / max(1, num_bloques))
         
-        hijo2.cromosoma = (padre2.cromosoma[:punto1] + 
-                          padre1.cromosoma[punto1:punto2] + 
-                          padre2.cromosoma[punto2:])
+        for _ in range(self.reintentos_duplicados):
+            if not duplicados.any():
+                break
+            remutados = self.codificacion.reparar(self.mutar_matriz(hijos[duplicados], prob_remutacion))
+            hijos[duplicados] = remutados
+            duplicados[duplicados] = self.indice_genotipos.filas_duplicadas(remutados)
         
-        return hijo1, hijo2
+        return hijos[~duplicados]
     
-    def mutacion(self, individuo):
-        """Aplica mutación a un individuo"""
-        for i in range(len(individuo.cromosoma)):
-            if random.random() < self.prob_mutacion:
-                semaforo = individuo.cromosoma[i]
-                
-                # Seleccionar qué parámetro mutar
-                param = random.choice(['verde', 'rojo', 'desfase'])
-                
-                if param == 'verde':
-                    # Mutar tiempo de verde (±15%)
-                    cambio = semaforo.tiempo_verde * random.uniform(-0.15, 0.15)
-                    semaforo.tiempo_verde = max(15, int(semaforo.tiempo_verde + cambio))
-                
-                elif param == 'rojo':
-                    # Mutar tiempo de rojo (±15%)
-                    cambio = semaforo.tiempo_rojo * random.uniform(-0.15, 0.15)
-                    semaforo.tiempo_rojo = max(10, int(semaforo.tiempo_rojo + cambio))
-                
-                else:  # desfase
-                    # Mutar desfase (±30%)
-                    cambio = semaforo.desfase * random.uniform(-0.3, 0.3)
-                    semaforo.desfase = max(0, int(semaforo.desfase + cambio))
-                
-                # Actualizar ciclo total
-                semaforo.ciclo_total = semaforo.tiempo_verde + semaforo.tiempo_amarillo + semaforo.tiempo_rojo
+    def registrar_diversidad(self):
+        """Calcula y guarda la diversidad de la población actual"""
+        metrica = diversidad(self.matriz_poblacion(self.poblacion))
+        self.diversidad_historica.append(metrica)
+        return metrica
+    
+    def aptitud_seleccion(self):
+        """
+        Valor a maximizar en los torneos: el fitness en modo escalar o la
+        posición según (rango, hacinamiento) en modo NSGA-II
+        """
+        if self.modo == 'escalar':
+            return np.array([ind.fitness for ind in self.poblacion])
+        orden, _ = orden_nsga2(self.matriz_objetivos(self.poblacion))
+        aptitud = np.empty(len(orden))
+        aptitud[orden] = np.arange(len(orden))[::-1]
+        return aptitud
+    
+    def matriz_objetivos(self, individuos):
+        """Apila los objetivos de los individuos en una matriz (individuos x objetivos)"""
+        return np.vstack([ind.objetivos for ind in individuos])
+    
+    def seleccion_nsga2(self, hijos):
+        """Selección de supervivientes de NSGA-II: por frente y luego por hacinamiento"""
+        combinados = list({huella_genes(ind.genes): ind for ind in self.poblacion + hijos}.values())
+        orden, rangos = orden_nsga2(self.matriz_objetivos(combinados))
+        self.poblacion = [combinados[i] for i in orden[:self.tamaño_poblacion]]
+        self.frente_pareto = [combinados[i] for i in orden if rangos[i] == 0]
+    
+    def obtener_frente_pareto(self):
+        """Retorna las soluciones no dominadas (tiempo, congestión, desincronización)"""
+        if not self.frente_pareto and self.poblacion and self.poblacion[0].objetivos is not None:
+            orden, rangos = orden_nsga2(self.matriz_objetivos(self.poblacion))
+            self.frente_pareto = [self.poblacion[i] for i in orden if rangos[i] == 0]
+        return self.frente_pareto
     
     def seleccion_siguiente_generacion(self, hijos):
         """Selecciona individuos para la siguiente generación"""
-        # Combinar padres e hijos
-        combinados = self.poblacion + hijos
+        if self.modo == 'nsga2':
+            self.seleccion_nsga2(hijos)
+            return
+        
+        # Combinar padres e hijos sin repetir genotipos
+        combinados = list({huella_genes(ind.genes): ind for ind in self.poblacion + hijos}.values())
         
         # Ordenar por fitness (de mayor a menor)
         combinados.sort(key=lambda ind: ind.fitness, reverse=True)
@@ -95,91 +311,214 @@ class AlgoritmoGenetico:
         num_elite = int(self.tamaño_poblacion * self.elitismo)
         elite = combinados[:num_elite]
         
-        # Selección por ruleta para el resto
+        # Selección por ruleta para el resto, sin repetir individuos mientras alcancen
         no_elite = combinados[num_elite:]
-        sum_fitness = sum(ind.fitness for ind in no_elite)
-        
-        seleccionados = []
-        while len(seleccionados) < self.tamaño_poblacion - num_elite:
-            # Selección por ruleta
-            r = random.uniform(0, sum_fitness)
-            acumulado = 0
-            for ind in no_elite:
-                acumulado += ind.fitness
-                if acumulado >= r:
-                    seleccionados.append(ind)
-                    break
+        num_restantes = self.tamaño_poblacion - num_elite
+        if not no_elite or num_restantes <= 0:
+            self.poblacion = elite
+            return
+        
+        fitness = np.array([ind.fitness for ind in no_elite], dtype=float)
+        probabilidades = fitness / fitness.sum() if fitness.sum() > 0 else None
+        sin_reemplazo = min(num_restantes, len(no_elite),
+                            np.count_nonzero(fitness) if probabilidades is not None else len(no_elite))
+        indices = list(self.rng.choice(len(no_elite), sin_reemplazo, replace=False, p=probabilidades))
+        if len(indices) < num_restantes:
+            # No hay suficientes genotipos distintos: completar con repetición
+            indices += list(self.rng.choice(len(no_elite), num_restantes - len(indices), p=probabilidades))
+        seleccionados = [no_elite[i] for i in indices]
         
         # Nueva población
         self.poblacion = elite + seleccionados
     
     def ejecutar(self):
         """Ejecuta el algoritmo genético"""
-        # Inicializar población
-        self.inicializar_poblacion()
-        
-        # Evaluar población inicial
-        self.evaluar_poblacion()
-        
-        # Ordenar población por fitness
-        self.poblacion.sort(key=lambda ind: ind.fitness, reverse=True)
+        # Procesos trabajadores para las simulaciones (solo si se pide más de uno)
+        # y ranuras de memoria compartida para los hijos de una generación
+        if self.procesos != 1:
+            self.evaluador = EvaluadorParalelo(self.red_vial, self.tasa_llegada, self.duracion_sim,
+                                               self.procesos, capacidad=self.tamaño_poblacion + 1)
+        try:
+            # Inicializar población
+            self.inicializar_poblacion()
+            
+            # Evaluar población inicial
+            self.evaluar_poblacion()
+            
+            # Ordenar población por fitness
+            self.poblacion.sort(key=lambda ind: ind.fitness, reverse=True)
+            
+            # Guardar mejor individuo
+            self.mejor_individuo = self.poblacion[0]
+            self.mejor_fitness_historico.append(self.mejor_individuo.fitness)
+            
+            metrica = self.registrar_diversidad()
+            if self.verbose:
+                print(f"Generación 0: Mejor fitness = {self.mejor_individuo.fitness:.6f}, "
+                      f"únicos = {metrica['unicos']}, entropía = {metrica['entropia']:.3f}")
+            
+            # Bucle principal de evolución
+            if self.esquema == 'estacionario':
+                self.evolucionar_estacionario()
+            else:
+                self.evolucionar_generacional()
+        finally:
+            if self.evaluador is not None:
+                self.evaluador.cerrar()
+                self.evaluador = None
         
-        # Guardar mejor individuo
-        self.mejor_individuo = self.poblacion[0]
-        self.mejor_fitness_historico.append(self.mejor_individuo.fitness)
+        if self.modo == 'nsga2':
+            self.frente_pareto = []
+            self.obtener_frente_pareto()
         
-        print(f"Generación 0: Mejor fitness = {self.mejor_individuo.fitness:.6f}")
+        if self.almacen is not None:
+            self.almacen.vaciar()
+            if self.verbose:
+                print(f"Almacén de evaluaciones: {self.almacen.aciertos} de {self.almacen.consultas} "
+                      f"planes ya evaluados en ejecuciones anteriores")
         
-        # Bucle principal de evolución
+        if self.verbose:
+            self.imprimir_resumen()
+    
+    def evolucionar_generacional(self):
+        """Generaciones completas: se evalúan todos los hijos y luego se selecciona"""
         for gen in range(1, self.max_generaciones + 1):
-            # Crear nueva generación
-            hijos = []
-            
-            while len(hijos) < self.tamaño_poblacion:
-                # Selección de padres
-                padre1 = self.seleccion_torneo()
-                padre2 = self.seleccion_torneo()
-                
-                # Cruce
-                hijo1, hijo2 = self.cruce(padre1, padre2)
-                
-                # Mutación
-                self.mutacion(hijo1)
-                self.mutacion(hijo2)
-                
-                # Agregar hijos
-                hijos.extend([hijo1, hijo2])
+            # Crear nueva generación (selección, cruce y mutación vectorizados)
+            hijos = self.generar_hijos()
             
             # Evaluar hijos
-            for hijo in hijos:
-                hijo.calcular_fitness(self.red_vial)
+            self.evaluar_individuos(hijos)
             
             # Seleccionar siguiente generación
             self.seleccion_siguiente_generacion(hijos)
             
-            # Actualizar mejor individuo
-            if self.poblacion[0].fitness > self.mejor_individuo.fitness:
-                self.mejor_individuo = self.poblacion[0]
+            self.registrar_generacion(gen)
+    
+    def evolucionar_estacionario(self):
+        """
+        Esquema estacionario asíncrono: cada trabajador simula un hijo a la vez
+        y, en cuanto termina uno, el hijo entra a la población y se despacha
+        otro, sin esperar a la simulación más lenta de una generación. Se
+        generan max_generaciones · tamaño_poblacion hijos (el mismo presupuesto
+        que el esquema generacional) y cada tamaño_poblacion hijos resueltos
+        cuentan como una generación en el historial.
+        """
+        evaluador = self.evaluador or EvaluadorParalelo(self.red_vial, self.tasa_llegada, self.duracion_sim, 1)
+        presupuesto = self.max_generaciones * self.tamaño_poblacion
+        huellas_poblacion = {huella_genes(ind.genes) for ind in self.poblacion}
+        en_vuelo = {}  # Future -> (huella, individuo)
+        generados = resueltos = gen = 0
+        
+        while en_vuelo or generados < presupuesto:
+            # Un hijo nuevo por cada trabajador libre
+            libres = min(evaluador.procesos - len(en_vuelo), presupuesto - generados)
+            if libres > 0:
+                hijos = self.generar_hijos(libres)
+                generados += libres
+                resueltos += libres - len(hijos)  # Clones descartados
+                
+                # Sin repetir un plan que ya se está simulando
+                simulando = {huella for huella, _ in en_vuelo.values()}
+                huellas = [huella_genes(hijo.genes) for hijo in hijos]
+                nuevos = {huella: hijo for huella, hijo in self.individuos_sin_evaluar(huellas, hijos).items()
+                          if huella not in simulando}
+                for huella, hijo in zip(huellas, hijos):
+                    if nuevos.get(huella) is hijo:
+                        continue
+                    resueltos += 1
+                    if huella in self.cache_evaluaciones:
+                        hijo.fitness, hijo.objetivos = self.cache_evaluaciones[huella]
+                        self.insertar_estacionario(hijo, huella, huellas_poblacion)
+                
+                if nuevos:
+                    planes = np.vstack([hijo.genes for hijo in nuevos.values()])
+                    desincronizacion = self.red_vial.obtener_coordinacion().desincronizacion(planes)
+                    semillas = self.semillas_simulacion(len(planes))
+                    for (huella, hijo), d, semilla in zip(nuevos.items(), desincronizacion, semillas):
+                        en_vuelo[evaluador.enviar(hijo.genes, d, semilla)] = (huella, hijo)
             
-            self.mejor_fitness_historico.append(self.mejor_individuo.fitness)
+            # Atender los resultados en cuanto llegan
+            if en_vuelo:
+                terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    huella, hijo = en_vuelo.pop(futuro)
+                    hijo.fitness, hijo.objetivos = futuro.result()
+                    self.registrar_evaluacion(huella, hijo.fitness, hijo.objetivos)
+                    self.insertar_estacionario(hijo, huella, huellas_poblacion)
+                    resueltos += 1
             
-            if gen % 10 == 0:  # Mostrar progreso cada 10 generaciones
-                print(f"Generación {gen}: Mejor fitness = {self.mejor_individuo.fitness:.6f}")
+            while resueltos >= (gen + 1) * self.tamaño_poblacion:
+                gen += 1
+                self.registrar_generacion(gen)
+    
+    def insertar_estacionario(self, individuo, huella, huellas_poblacion):
+        """
+        Inserta un hijo evaluado en lugar del peor individuo si lo supera (en
+        modo NSGA-II, si el hijo no queda último por rango y hacinamiento)
+        """
+        if huella in huellas_poblacion:
+            return
+        if self.modo == 'nsga2':
+            orden, _ = orden_nsga2(self.matriz_objetivos(self.poblacion + [individuo]))
+            peor = orden[-1]
+            if peor == len(self.poblacion):
+                return
+        else:
+            peor = int(np.argmin([ind.fitness for ind in self.poblacion]))
+            if individuo.fitness <= self.poblacion[peor].fitness:
+                return
+        huellas_poblacion.discard(huella_genes(self.poblacion[peor].genes))
+        huellas_poblacion.add(huella)
+        self.poblacion[peor] = individuo
+    
+    def registrar_generacion(self, gen):
+        """Actualiza el mejor individuo, el historial y la diversidad al cerrar una generación"""
+        mejor_generacion = max(self.poblacion, key=lambda ind: ind.fitness)
+        if mejor_generacion.fitness > self.mejor_individuo.fitness:
+            self.mejor_individuo = mejor_generacion
+        
+        self.mejor_fitness_historico.append(self.mejor_individuo.fitness)
+        metrica = self.registrar_diversidad()
+        
+        if self.verbose and gen % 10 == 0:  # Mostrar progreso cada 10 generaciones
+            print(f"Generación {gen}: Mejor fitness = {self.mejor_individuo.fitness:.6f}, "
+                  f"únicos = {metrica['unicos']}, entropía = {metrica['entropia']:.3f}")
+    
+    def imprimir_resumen(self):
+        """Muestra el frente de Pareto (modo nsga2) y la mejor solución encontrada"""
+        if self.modo == 'nsga2':
+            frente = self.obtener_frente_pareto()
+            print(f"\nFrente de Pareto: {len(frente)} soluciones no dominadas")
+            for ind in sorted(frente, key=lambda ind: ind.objetivos[0]):
+                tiempo, congestion, desincronizacion = ind.objetivos
+                print(f"  Espera = {tiempo:.2f}s, Congestión = {congestion:.0f}, "
+                      f"Desincronización = {desincronizacion:.0f}")
         
         print(f"\nMejor solución encontrada (Fitness: {self.mejor_individuo.fitness:.6f}):")
         for i, semaforo in enumerate(self.mejor_individuo.cromosoma):
             print(semaforo)
     
-    def graficar_evolucion(self):
-        """Gráfica la evolución del fitness a lo largo de las generaciones"""
-        plt.figure(figsize=(10, 6))
-        plt.plot(self.mejor_fitness_historico)
-        plt.title('Evolución del Fitness')
-        plt.xlabel('Generación')
-        plt.ylabel('Fitness (mejor individuo)')
-        plt.grid(True)
-        plt.savefig('evolucion_fitness.png')
-        plt.show()
+    def graficar_evolucion(self, archivo='evolucion_fitness.png', mostrar=True):
+        """
+        Gráfica la evolución del fitness a lo largo de las generaciones.
+        Con mostrar=False solo guarda el archivo, sin pyplot ni pantalla.
+        """
+        # matplotlib se importa aquí para que el núcleo del AG solo dependa de NumPy
+        if not mostrar:
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(10, 6))
+            ax = fig.subplots()
+        else:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(self.mejor_fitness_historico)
+        ax.set_title('Evolución del Fitness')
+        ax.set_xlabel('Generación')
+        ax.set_ylabel('Fitness (mejor individuo)')
+        ax.grid(True)
+        fig.savefig(archivo)
+        if mostrar:
+            plt.show()
     
     def obtener_mejores_soluciones(self, n=3):
         """Retorna las n mejores soluciones encontradas"""
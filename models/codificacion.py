@@ -0,0 +1,223 @@
+import numpy as np
+from models.individuo_ag import IndividuoAG, GENES_POR_SEMAFORO, GEN_VERDE, GEN_AMARILLO, GEN_ROJO, GEN_DESFASE
+
+# Una codificación traduce entre el genotipo que manipulan los operadores
+# genéticos (matriz individuos x genes) y el plan por semáforo que se simula
+# (matriz individuos x semáforos·4, ver models/individuo_ag.py).
+#
+# Interfaz común:
+#   num_genes, limites(), parametros_operadores()
+#   poblacion_aleatoria(n, rng) -> genotipos
+#   reparar(genotipos) -> genotipos canónicos
+#   decodificar(genotipos) -> planes por semáforo
+#   codificar(planes) -> genotipos
+
+# Disposición de los genes de cada intersección en la codificación por fases:
+# [ciclo, desfase, reparto de la fase 1, ..., reparto de la fase P]
+GEN_CICLO = 0
+GEN_DESFASE_INTERSECCION = 1
+GEN_PRIMER_REPARTO = 2
+REPARTO_MIN, REPARTO_MAX = 1, 100  # Pesos relativos del verde de cada fase
+
+
+class CodificacionSemaforos:
+    """Codificación original: verde, amarillo, rojo y desfase independientes por semáforo"""
+
+    nombre = 'semaforo'
+
+    def __init__(self, restricciones):
+        self.restricciones = restricciones
+        self.num_semaforos = restricciones.num_semaforos
+        self.num_genes = self.num_semaforos * GENES_POR_SEMAFORO
+
+    def limites(self):
+        return self.restricciones.limites()
+
+    def parametros_operadores(self):
+        return {
+            'tamaño_bloque': GENES_POR_SEMAFORO,
+            # Escalas de la mutación multiplicativa: ±15% verde/rojo; el desfase
+            # se desplaza ±30% del rango permitido (también cuando vale cero)
+            'escalas': [0.15, 0.0, 0.15, 0.3],
+            'genes_mutables': [GEN_VERDE, GEN_ROJO, GEN_DESFASE],
+            'genes_aditivos': [GEN_DESFASE],
+        }
+
+    def poblacion_aleatoria(self, n, rng=None):
+        """Genotipos aleatorios con la distribución de IndividuoAG"""
+        return np.vstack([IndividuoAG(self.num_semaforos, rng).genes for _ in range(n)])
+
+    def reparar(self, genotipos):
+        return self.restricciones.reparar(genotipos)
+
+    def decodificar(self, genotipos):
+        return np.atleast_2d(genotipos)
+
+    def codificar(self, planes):
+        return self.reparar(np.atleast_2d(planes).reshape(-1, self.num_genes))
+
+
+class CodificacionFases:
+    """
+    Codificación por intersección: un ciclo común, un reparto por fase y un
+    desfase. Cada semáforo de la intersección es una fase y las fases se
+    suceden dentro del ciclo (verde y ámbar de una, luego la siguiente), de
+    modo que dos accesos de la misma intersección nunca están en verde a la
+    vez. Las intersecciones con un solo semáforo tienen además la fase de la
+    calle transversal sin semáforo.
+
+    El verde de cada fase es el mínimo más la parte del tiempo restante que
+    le toca según su reparto; el ámbar de cada fase es el del plan actual de
+    la red. El semáforo de la fase j, que empieza en inicio_j segundos
+    después del desfase de la intersección, recibe
+    desfase = -(desfase + inicio_j) mod ciclo.
+
+    Los bloques tienen el mismo tamaño en todas las intersecciones (2 más el
+    máximo de fases); los repartos de fases inexistentes se ignoran. Los
+    corredores de las restricciones no se aplican en esta codificación.
+    """
+
+    nombre = 'fases'
+
+    def __init__(self, red_vial, restricciones):
+        self.restricciones = restricciones
+        self.num_semaforos = red_vial.num_semaforos
+        self.num_intersecciones = len(red_vial.intersecciones)
+        semaforos_por_interseccion = np.diff(red_vial.inicio_semaforos)
+        self.num_fases = np.maximum(semaforos_por_interseccion, 2)
+        self.max_fases = int(self.num_fases.max(initial=2))
+        self.tamaño_bloque = GEN_PRIMER_REPARTO + self.max_fases
+        self.num_genes = self.num_intersecciones * self.tamaño_bloque
+
+        # Fase (intersección, posición) de cada semáforo
+        self.interseccion_de_semaforo = red_vial.interseccion_de_semaforo
+        self.fase_de_semaforo = np.arange(self.num_semaforos) - red_vial.inicio_semaforos[self.interseccion_de_semaforo]
+        self.fase_activa = np.arange(self.max_fases) < self.num_fases[:, None]
+        self.fase_con_semaforo = np.arange(self.max_fases) < semaforos_por_interseccion[:, None]
+
+        # Ámbar de cada fase: el del semáforo en el plan actual (acotado) o el mínimo
+        r = restricciones
+        self.amarillo = np.full((self.num_intersecciones, self.max_fases), r.amarillo_min, dtype=np.int64)
+        self.amarillo[self.interseccion_de_semaforo, self.fase_de_semaforo] = np.clip(
+            red_vial.plan_actual()[:, GEN_AMARILLO], r.amarillo_min, r.amarillo_max)
+        self.amarillo[~self.fase_activa] = 0
+        self.tiempo_perdido = self.amarillo.sum(axis=1)
+
+        # Verde mínimo por fase y ciclo mínimo que lo permite (sin pasar del ciclo máximo)
+        self.verde_min = np.clip((r.ciclo_max - self.tiempo_perdido) // self.num_fases, 1, r.verde_min)
+        self.ciclo_min = np.clip(self.tiempo_perdido + self.num_fases * self.verde_min,
+                                 r.ciclo_min, r.ciclo_max)
+
+    def limites(self):
+        """Límites (inferior, superior) por gen para los operadores genéticos"""
+        inferior = np.full((self.num_intersecciones, self.tamaño_bloque), REPARTO_MIN)
+        superior = np.full((self.num_intersecciones, self.tamaño_bloque), REPARTO_MAX)
+        inferior[:, GEN_CICLO] = self.ciclo_min
+        superior[:, GEN_CICLO] = self.restricciones.ciclo_max
+        inferior[:, GEN_DESFASE_INTERSECCION] = 0
+        superior[:, GEN_DESFASE_INTERSECCION] = self.restricciones.ciclo_max - 1
+        return inferior.ravel(), superior.ravel()
+
+    def parametros_operadores(self):
+        return {
+            'tamaño_bloque': self.tamaño_bloque,
+            # ±15% el ciclo, ±30% del rango el desfase y ±50% cada reparto
+            'escalas': [0.15, 0.3] + [0.5] * self.max_fases,
+            'genes_mutables': list(range(self.tamaño_bloque)),
+            'genes_aditivos': [GEN_DESFASE_INTERSECCION],
+        }
+
+    def poblacion_aleatoria(self, n, rng=None):
+        """Genotipos aleatorios uniformes dentro de los límites"""
+        rng = rng if rng is not None else np.random.default_rng()
+        inferior, superior = self.limites()
+        return self.reparar(rng.integers(inferior, superior + 1, (n, self.num_genes)))
+
+    def _bloques(self, genotipos):
+        genotipos = np.rint(np.atleast_2d(genotipos)).astype(np.int64)
+        return genotipos.reshape(len(genotipos), self.num_intersecciones, self.tamaño_bloque)
+
+    def reparar(self, genotipos):
+        """Ciclo acotado, desfase módulo el ciclo y repartos acotados (los de fases inexistentes, al mínimo)"""
+        g = self._bloques(genotipos)
+        ciclo = np.clip(g[..., GEN_CICLO], self.ciclo_min, self.restricciones.ciclo_max)
+        g[..., GEN_CICLO] = ciclo
+        g[..., GEN_DESFASE_INTERSECCION] = np.mod(g[..., GEN_DESFASE_INTERSECCION], ciclo)
+        repartos = np.clip(g[..., GEN_PRIMER_REPARTO:], REPARTO_MIN, REPARTO_MAX)
+        g[..., GEN_PRIMER_REPARTO:] = np.where(self.fase_activa, repartos, REPARTO_MIN)
+        return g.reshape(len(g), -1)
+
+    def verdes(self, genotipos):
+        """Verde de cada fase (individuos x intersecciones x fases) y ciclo de cada intersección"""
+        g = self._bloques(genotipos)
+        ciclo = g[..., GEN_CICLO]
+        repartos = g[..., GEN_PRIMER_REPARTO:] * self.fase_activa
+        disponible = ciclo - self.tiempo_perdido - self.num_fases * self.verde_min
+        parte = np.floor(repartos / repartos.sum(axis=-1, keepdims=True) * disponible[..., None])
+        verde = np.where(self.fase_activa, self.verde_min[:, None] + parte.astype(np.int64), 0)
+        # Los segundos que no reparte el redondeo van a la primera fase
+        verde[..., 0] += ciclo - self.tiempo_perdido - verde.sum(axis=-1)
+        return verde, ciclo
+
+    def decodificar(self, genotipos):
+        """Plan por semáforo (individuos x semáforos·4) de cada genotipo"""
+        g = self._bloques(genotipos)
+        verde, ciclo = self.verdes(g)
+        duracion_fase = verde + self.amarillo
+        inicio_fase = np.cumsum(duracion_fase, axis=-1) - duracion_fase
+
+        k, j = self.interseccion_de_semaforo, self.fase_de_semaforo
+        planes = np.empty((len(g), self.num_semaforos, GENES_POR_SEMAFORO), dtype=np.int64)
+        ciclo_semaforo = ciclo[:, k]
+        planes[..., GEN_VERDE] = verde[:, k, j]
+        planes[..., GEN_AMARILLO] = self.amarillo[k, j]
+        planes[..., GEN_ROJO] = ciclo_semaforo - planes[..., GEN_VERDE] - planes[..., GEN_AMARILLO]
+        planes[..., GEN_DESFASE] = np.mod(-(g[:, k, GEN_DESFASE_INTERSECCION] + inicio_fase[:, k, j]),
+                                          ciclo_semaforo)
+        return planes.reshape(len(g), -1)
+
+    def codificar(self, planes):
+        """
+        Genotipo aproximado de planes por semáforo: ciclo mediano de cada
+        intersección, repartos proporcionales al verde de cada semáforo (el
+        tiempo sobrante para la fase sin semáforo) y desfase que hace
+        coincidir el inicio del verde de la primera fase
+        """
+        planes = np.atleast_2d(planes).reshape(-1, self.num_semaforos, GENES_POR_SEMAFORO)
+        n = len(planes)
+        ciclo_semaforo = planes[..., GEN_VERDE] + planes[..., GEN_AMARILLO] + planes[..., GEN_ROJO]
+        k, j = self.interseccion_de_semaforo, self.fase_de_semaforo
+
+        ciclos = np.full((n, self.num_intersecciones, self.max_fases), np.nan)
+        ciclos[:, k, j] = ciclo_semaforo
+        ciclo = np.nanmedian(np.where(self.fase_con_semaforo, ciclos, np.nan), axis=-1)
+        ciclo = np.rint(np.nan_to_num(ciclo, nan=self.restricciones.ciclo_min)).astype(np.int64)
+
+        verde = np.zeros((n, self.num_intersecciones, self.max_fases))
+        verde[:, k, j] = planes[..., GEN_VERDE]
+        sobrante = np.maximum(ciclo - self.tiempo_perdido - verde.sum(axis=-1), REPARTO_MIN)
+        sin_semaforo = self.fase_activa & ~self.fase_con_semaforo
+        verde = np.where(sin_semaforo, (sobrante / np.maximum(sin_semaforo.sum(axis=1), 1))[..., None], verde)
+
+        genotipos = np.empty((n, self.num_intersecciones, self.tamaño_bloque))
+        genotipos[..., GEN_CICLO] = ciclo
+        # Desfase de la primera fase (empieza en el segundo 0 del ciclo de la intersección)
+        genotipos[..., GEN_DESFASE_INTERSECCION] = 0
+        primeros = np.flatnonzero(j == 0)
+        genotipos[:, k[primeros], GEN_DESFASE_INTERSECCION] = -planes[:, primeros, GEN_DESFASE]
+        # Repartos en la escala [REPARTO_MIN, REPARTO_MAX], proporcionales al verde
+        escala = REPARTO_MAX / np.maximum(verde.max(axis=-1, keepdims=True), 1)
+        genotipos[..., GEN_PRIMER_REPARTO:] = np.maximum(np.rint(verde * escala), REPARTO_MIN)
+        return self.reparar(genotipos.reshape(n, -1))
+
+
+CODIFICACIONES = {'semaforo': CodificacionSemaforos, 'fases': CodificacionFases}
+
+
+def crear_codificacion(nombre, red_vial, restricciones):
+    """Crea la codificación por nombre ('semaforo' o 'fases')"""
+    if nombre == 'semaforo':
+        return CodificacionSemaforos(restricciones)
+    if nombre == 'fases':
+        return CodificacionFases(red_vial, restricciones)
+    raise ValueError(f"Codificación desconocida '{nombre}'. Opciones: {', '.join(CODIFICACIONES)}")
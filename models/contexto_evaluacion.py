@@ -0,0 +1,237 @@
+import numpy as np
+from models.curvas import curvas_acumuladas, metricas_curvas, segundos_en_verde, unir_metricas
+from models.estadisticas import EstadisticasEspera
+from models.individuo_ag import GENES_POR_SEMAFORO, GEN_VERDE, GEN_AMARILLO, GEN_ROJO, GEN_DESFASE
+
+# Elementos (cola x segundo al generar llegadas, cola x vehículo al resumir
+# esperas) que se procesan juntos: acota los temporales a un bloque de colas
+# en lugar de toda la red
+ELEMENTOS_POR_BLOQUE = 1 << 20
+
+
+class ContextoEvaluacion:
+    """
+    Estado de simulación preasignado y reutilizable para evaluar cromosomas.
+
+    Reproduce RedVial.simular_llegada_poisson + RedVial.simular_trafico sin
+    crear objetos Semaforo ni deques: cada cola es una fila de un arreglo de
+    tiempos de llegada con un puntero de cabeza, y los búferes se reinician
+    en su lugar entre evaluaciones; el bucle por segundo escribe todos sus
+    intermedios en arreglos preasignados. El tiempo de salida de cada vehículo
+    atendido se anota en un búfer paralelo, y al final las esperas se resumen
+    de una vez en un EstadisticasEspera (sin listas por vehículo). Con esos
+    mismos búferes se construyen las curvas acumuladas de llegadas y salidas
+    de cada cola (metricas_curvas) sin volver a simular.
+    """
+
+    def __init__(self, red_vial):
+        # Una cola por semáforo, direccionada por el índice global de la red
+        self.num_semaforos = red_vial.num_semaforos
+        self.num_colas = self.num_semaforos
+        self.genes_base = red_vial.plan_actual()
+
+        # Capacidad de cada acceso precalculada por la red (veh/s de verde y vehículos)
+        self.saturacion = np.asarray(red_vial.saturacion, dtype=np.float64).copy()
+        self.almacenamiento = np.asarray(red_vial.almacenamiento, dtype=np.float64).copy()
+        self.max_atendidos = max(1, int(np.ceil(self.saturacion.max(initial=0))))
+        self._desplazamientos = np.arange(self.max_atendidos)
+        self._filas = np.arange(self.num_colas)[:, None]
+
+        # Búferes reutilizables
+        self._vaciar_buferes()
+        self.num_llegadas = np.zeros(self.num_colas, dtype=np.int64)
+        self.cabeza = np.zeros(self.num_colas, dtype=np.int64)
+        self._llegados = np.zeros(self.num_colas, dtype=np.int64)
+        self.duracion = 0  # Horizonte de la última simulación
+        self.estadisticas_espera = EstadisticasEspera()  # De la última simulación
+        self._genes = self.genes_base.copy()
+        self._fase = np.zeros(self.num_semaforos, dtype=np.int64)
+        self._verde = np.zeros(self.num_semaforos, dtype=bool)
+        self._atendidos = np.zeros(self.num_colas, dtype=np.int64)
+        self._credito = np.zeros(self.num_colas, dtype=np.float64)
+        self._capacidad = np.zeros(self.num_colas, dtype=np.float64)
+        self._pendientes = np.zeros(self.num_colas, dtype=np.int64)
+        self._indices = np.zeros((self.num_colas, self.max_atendidos), dtype=np.int64)
+        self._no_salen = np.zeros((self.num_colas, self.max_atendidos), dtype=bool)
+
+    def _vaciar_buferes(self):
+        """Búferes de llegadas y salidas vacíos (se dimensionan al generar llegadas)"""
+        self._capacidad_buffer = 0
+        self.tiempos_llegada = np.empty((self.num_colas, 0), dtype=np.int64)
+        # Las salidas tienen una posición extra al final: el sumidero donde el bucle
+        # por segundo escribe los vehículos que no salen, sin filtrar índices
+        self._salidas = np.empty(1, dtype=np.int64)
+        self.tiempos_salida = self._salidas[:0].reshape(self.num_colas, 0)
+        self._base_fila = np.zeros((self.num_colas, 1), dtype=np.int64)
+        self._columnas = np.arange(0)
+        self._atendido = np.zeros((self.num_colas, 0), dtype=bool)
+        self.llegadas_por_segundo = np.zeros((0, self.num_colas), dtype=np.uint8)  # (segundo, cola)
+        self._segundos = np.arange(0)
+
+    def __getstate__(self):
+        # Al enviarse a otro proceso no se copian los búferes de llegadas
+        estado = self.__dict__.copy()
+        estado['num_llegadas'] = np.zeros(self.num_colas, dtype=np.int64)
+        estado['cabeza'] = np.zeros(self.num_colas, dtype=np.int64)
+        for nombre in ('_capacidad_buffer', 'tiempos_llegada', '_salidas', 'tiempos_salida', '_base_fila',
+                       '_columnas', '_atendido', 'llegadas_por_segundo', '_segundos'):
+            del estado[nombre]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._vaciar_buferes()
+
+    def _reservar(self, capacidad):
+        """Asegura espacio para `capacidad` llegadas por cola (solo crece)"""
+        if capacidad > self._capacidad_buffer:
+            self._capacidad_buffer = max(capacidad, 2 * self._capacidad_buffer)
+            tamaño = self.num_colas * self._capacidad_buffer
+            self.tiempos_llegada = np.empty((self.num_colas, self._capacidad_buffer), dtype=np.int64)
+            self._salidas = np.empty(tamaño + 1, dtype=np.int64)
+            self.tiempos_salida = self._salidas[:tamaño].reshape(self.num_colas, self._capacidad_buffer)
+            self._base_fila = self._filas * self._capacidad_buffer
+            self._columnas = np.arange(self._capacidad_buffer)
+            self._atendido = np.zeros((self.num_colas, self._capacidad_buffer), dtype=bool)
+
+    def cargar_plan(self, genes):
+        """Copia los tiempos del cromosoma sobre el plan base (en su lugar)"""
+        genes = np.asarray(genes, dtype=np.int64).reshape(-1, GENES_POR_SEMAFORO)
+        num = min(len(genes), self.num_semaforos)
+        self._genes[:] = self.genes_base
+        self._genes[:num] = genes[:num]
+
+    def generar_llegadas(self, tasa_llegada, duracion, rng=None):
+        """
+        Genera llegadas Poisson por segundo y cola y las ordena en los búferes.
+        Los conteos se sortean por bloques de colas, en el mismo orden que un
+        único sorteo (colas x duracion), y se guardan en el búfer reutilizable
+        llegadas_por_segundo; luego se escriben los tiempos de llegada bloque
+        por bloque. Ningún temporal crece con el tamaño de la red.
+        """
+        rng = rng if rng is not None else np.random
+        if self.llegadas_por_segundo.shape != (duracion, self.num_colas):
+            self.llegadas_por_segundo = np.zeros((duracion, self.num_colas), dtype=np.uint8)
+        bloque = max(1, ELEMENTOS_POR_BLOQUE // max(1, duracion))
+        bloques = [slice(inicio, min(inicio + bloque, self.num_colas))
+                   for inicio in range(0, self.num_colas, bloque)]
+
+        # Conteos por segundo (fila contigua por segundo); el tipo entero solo se
+        # amplía si algún conteo no cabe
+        for colas in bloques:
+            conteos = rng.poisson(tasa_llegada, (colas.stop - colas.start, duracion))
+            maximo = int(conteos.max(initial=0))
+            if maximo > np.iinfo(self.llegadas_por_segundo.dtype).max:
+                self.llegadas_por_segundo = self.llegadas_por_segundo.astype(np.min_scalar_type(maximo))
+            self.llegadas_por_segundo[:, colas] = conteos.T
+            conteos.sum(axis=1, out=self.num_llegadas[colas])
+        self.cabeza[:] = 0
+        self._reservar(max(1, int(self.num_llegadas.max(initial=0))))
+
+        # Tiempos de llegada de cada cola, ya ordenados, escritos fila por fila
+        if len(self._segundos) != bloque * duracion:
+            self._segundos = np.tile(np.arange(duracion), bloque)
+        for colas in bloques:
+            conteos = self.llegadas_por_segundo[:, colas].T.ravel()
+            llegadas = self.num_llegadas[colas]
+            tiempos = np.repeat(self._segundos[:len(conteos)], conteos)
+            filas = np.repeat(np.arange(colas.start, colas.stop), llegadas)
+            inicio_fila = np.cumsum(llegadas) - llegadas
+            columnas = np.arange(len(tiempos)) - inicio_fila[filas - colas.start]
+            self.tiempos_llegada[filas, columnas] = tiempos
+
+    def reiniciar_colas(self):
+        """Vuelve a poner todas las llegadas generadas en cola (mismas llegadas, otro plan)"""
+        self.cabeza[:] = 0
+
+    def simular(self, duracion):
+        """Atiende las colas segundo a segundo; retorna (tiempo promedio, congestión)"""
+        verde_t = self._genes[:, GEN_VERDE]
+        ciclo = verde_t + self._genes[:, GEN_AMARILLO] + self._genes[:, GEN_ROJO]
+        desfase = self._genes[:, GEN_DESFASE]
+        sumidero = len(self._salidas) - 1
+        self._llegados[:] = 0
+        self._credito[:] = 0
+        horizonte = len(self.llegadas_por_segundo)
+
+        for t in range(duracion):
+            # Estado de todos los semáforos en el segundo t
+            np.add(desfase, t, out=self._fase)
+            np.remainder(self._fase, ciclo, out=self._fase)
+            np.less(self._fase, verde_t, out=self._verde)
+
+            # Capacidad de cada cola en verde: su flujo de saturación más la fracción
+            # de vehículo acumulada en los segundos previos del mismo verde (en rojo
+            # o amarillo el crédito se pierde), sin exceder los vehículos que ya
+            # llegaron y siguen en cola
+            if t < horizonte:
+                np.add(self._llegados, self.llegadas_por_segundo[t], out=self._llegados)
+            np.add(self._credito, self.saturacion, out=self._credito)
+            np.multiply(self._credito, self._verde, out=self._credito)
+            np.floor(self._credito, out=self._capacidad)
+            np.subtract(self._credito, self._capacidad, out=self._credito)
+            np.copyto(self._atendidos, self._capacidad, casting='unsafe')
+            np.subtract(self._llegados, self.cabeza, out=self._pendientes)
+            np.minimum(self._atendidos, self._pendientes, out=self._atendidos)
+
+            # Vehículos que salen de la cabeza de cada cola: se anota su tiempo de
+            # salida; las posiciones de los que no salen apuntan al sumidero
+            np.add(self.cabeza[:, None], self._desplazamientos, out=self._indices)
+            np.add(self._indices, self._base_fila, out=self._indices)
+            np.greater_equal(self._desplazamientos, self._atendidos[:, None], out=self._no_salen)
+            np.copyto(self._indices, sumidero, where=self._no_salen)
+            self._salidas[self._indices] = t
+            self.cabeza += self._atendidos
+
+        self.duracion = duracion
+        # Las esperas se resumen por bloques de colas (sumas exactas: son enteras)
+        self.estadisticas_espera = EstadisticasEspera()
+        bloque = max(1, ELEMENTOS_POR_BLOQUE // self._capacidad_buffer)
+        for inicio in range(0, self.num_colas, bloque):
+            self.estadisticas_espera.agregar_lote(self.esperas_atendidos(slice(inicio, inicio + bloque)))
+        if self.estadisticas_espera.conteo:
+            tiempo_promedio = self.estadisticas_espera.media()
+            congestion = int((self.num_llegadas - self.cabeza).sum())
+        else:
+            tiempo_promedio = 30  # Valores por defecto del simulador original
+            congestion = 100
+        return tiempo_promedio, congestion
+
+    def esperas_atendidos(self, colas=slice(None)):
+        """Esperas de los vehículos atendidos en la última simulación en las colas indicadas"""
+        atendido = self._atendido[colas]
+        np.less(self._columnas, self.cabeza[colas, None], out=atendido)
+        return self.tiempos_salida[colas][atendido] - self.tiempos_llegada[colas][atendido]
+
+    def curvas_acumuladas(self, colas=slice(None)):
+        """
+        Curvas acumuladas de la última simulación para las colas indicadas:
+        (A, D), matrices (colas x duracion) con las llegadas y salidas hasta
+        cada segundo inclusive
+        """
+        llegadas = curvas_acumuladas(self.tiempos_llegada[colas], self.num_llegadas[colas], self.duracion)
+        salidas = curvas_acumuladas(self.tiempos_salida[colas], self.cabeza[colas], self.duracion)
+        return llegadas, salidas
+
+    def metricas_curvas(self, bloque=4096):
+        """
+        Métricas por cola de la última simulación a partir de sus curvas
+        acumuladas: demora total (incluidos los vehículos que siguen en cola),
+        cola promedio y máxima, segundos con la cola por encima del
+        almacenamiento del acceso, rendimiento y utilización del verde. Las curvas
+        se construyen por bloques de colas para acotar la memoria en redes grandes.
+        """
+        verde = segundos_en_verde(self._genes, self.duracion)
+        partes = []
+        for inicio in range(0, self.num_colas, bloque):
+            colas = slice(inicio, inicio + bloque)
+            llegadas, salidas = self.curvas_acumuladas(colas)
+            partes.append(metricas_curvas(llegadas, salidas, verde[colas], self.saturacion[colas],
+                                          self.almacenamiento[colas]))
+        return unir_metricas(partes)
+
+    def evaluar(self, genes, tasa_llegada=0.2, duracion=3600, rng=None):
+        """Evalúa un cromosoma: carga el plan, genera llegadas y simula"""
+        self.cargar_plan(genes)
+        self.generar_llegadas(tasa_llegada, duracion, rng)
+        return self.simular(duracion)
@@ -0,0 +1,108 @@
+import numpy as np
+from models.individuo_ag import GENES_POR_SEMAFORO, GEN_VERDE, GEN_AMARILLO, GEN_ROJO, GEN_DESFASE
+
+VELOCIDAD_POR_DEFECTO_KMH = 40.0  # Para tramos sin calle registrada (distancia en línea recta)
+
+
+class CoordinacionRed:
+    """
+    Grafo de conexiones de la red para medir la coordinación de los semáforos.
+
+    Las conexiones son las de Interseccion.conexiones más las calles
+    registradas (en ambos sentidos si son de doble sentido), sin repetir;
+    algunas redes exportadas de OSM solo tienen tramos válidos en las calles.
+    Se guardan en forma CSR (inicio[k]:inicio[k+1] son las
+    posiciones de las conexiones que salen de la intersección k) y cada
+    conexión u -> v lleva:
+    - el semáforo de u que despacha hacia v: el que controla la llegada desde
+      v por la misma calle si existe (mismo eje), si no el primero de u
+    - el semáforo de v que recibe desde u: el que controla ese acceso
+      (RedVial.calcular_capacidades), si no el primero de v
+    - el tiempo de viaje en segundos: longitud / velocidad máxima de la calle,
+      o la distancia haversine a 40 km/h; 0 si no hay datos
+    Las conexiones que tocan intersecciones sin semáforos se omiten.
+    """
+
+    def __init__(self, red_vial):
+        num_intersecciones = len(red_vial.intersecciones)
+        pares = {}
+        for interseccion in red_vial.intersecciones:
+            for conexion in interseccion.conexiones:
+                if conexion.indice is not None:
+                    pares[(interseccion.indice, conexion.indice)] = None
+        destino_acceso, origen_acceso, _ = red_vial.accesos()
+        pares.update(dict.fromkeys(zip(origen_acceso.tolist(), destino_acceso.tolist())))
+        origen = np.array([u for u, _ in pares], dtype=np.int64)
+        destino = np.array([v for _, v in pares], dtype=np.int64)
+
+        # Solo conexiones entre intersecciones con semáforos, ordenadas por origen
+        num_semaforos = np.diff(red_vial.inicio_semaforos)
+        validas = (num_semaforos[origen] > 0) & (num_semaforos[destino] > 0) & (origen != destino)
+        orden = np.argsort(origen[validas], kind='stable')
+        self.origen = origen[validas][orden]
+        self.destino = destino[validas][orden]
+        self.inicio = np.concatenate([[0], np.cumsum(np.bincount(self.origen, minlength=num_intersecciones))])
+        self.num_conexiones = len(self.origen)
+
+        self.semaforo_origen, self.semaforo_destino = self._semaforos_de_conexiones(red_vial)
+        self.tiempo_viaje = self._tiempos_de_viaje(red_vial)
+
+    def _semaforos_de_conexiones(self, red_vial):
+        """Semáforo despachador (en el origen) y receptor (en el destino) de cada conexión"""
+        # Posición local del acceso (origen -> destino) entre los accesos del destino
+        destino_acceso, origen_acceso, _ = red_vial.accesos()
+        inicio_acceso = np.searchsorted(destino_acceso, np.arange(len(red_vial.intersecciones)))
+        posicion_acceso = {}
+        for i, (d, o) in enumerate(zip(destino_acceso.tolist(), origen_acceso.tolist())):
+            posicion_acceso.setdefault((o, d), i - int(inicio_acceso[d]))
+
+        inicio = red_vial.inicio_semaforos
+        num_semaforos = np.diff(inicio)
+
+        def semaforo(llegada_desde, interseccion):
+            # El semáforo j controla el acceso j mod n, así que el acceso a lo controla el a mod m
+            a = np.array([posicion_acceso.get((o, k), 0) for o, k in zip(llegada_desde.tolist(), interseccion.tolist())],
+                         dtype=np.int64)
+            return inicio[interseccion] + a % num_semaforos[interseccion]
+
+        return semaforo(self.destino, self.origen), semaforo(self.origen, self.destino)
+
+    def _tiempos_de_viaje(self, red_vial):
+        """Segundos de viaje de cada conexión"""
+        ids = [interseccion.id for interseccion in red_vial.intersecciones]
+        tiempo = np.zeros(self.num_conexiones)
+        conocido = np.zeros(self.num_conexiones, dtype=bool)
+        for i, (u, v) in enumerate(zip(self.origen.tolist(), self.destino.tolist())):
+            calle = red_vial.calles.get((ids[u], ids[v]))
+            if calle is None:
+                inversa = red_vial.calles.get((ids[v], ids[u]))
+                calle = inversa if inversa and inversa['bidireccional'] else None
+            if calle and calle['longitud'] and calle['velocidad_max']:
+                tiempo[i] = calle['longitud'] / (calle['velocidad_max'] / 3.6)
+                conocido[i] = True
+
+        sin_calle = ~conocido & red_vial.tiene_coordenadas()[self.origen] & red_vial.tiene_coordenadas()[self.destino]
+        distancia = red_vial.distancia_haversine(self.origen[sin_calle], self.destino[sin_calle])
+        tiempo[sin_calle] = distancia / (VELOCIDAD_POR_DEFECTO_KMH / 3.6)
+        return tiempo
+
+    def desincronizacion(self, planes):
+        """
+        Desincronización de cada plan (matriz planes x semáforos·4 o un solo
+        plan): suma sobre las conexiones de la diferencia de ciclos más la
+        distancia circular entre el inicio del verde del receptor y el inicio
+        del verde del despachador más el tiempo de viaje (la onda verde ideal)
+        """
+        planes = np.atleast_2d(np.asarray(planes, dtype=np.int64))
+        planes = planes.reshape(len(planes), -1, GENES_POR_SEMAFORO)
+        if self.num_conexiones == 0:
+            return np.zeros(len(planes))
+        ciclo = planes[..., GEN_VERDE] + planes[..., GEN_AMARILLO] + planes[..., GEN_ROJO]
+        desfase = planes[..., GEN_DESFASE]
+
+        ciclo_u, ciclo_v = ciclo[:, self.semaforo_origen], ciclo[:, self.semaforo_destino]
+        # El verde del semáforo s empieza cuando (t + desfase) mod ciclo = 0, es decir en t = -desfase
+        error = np.mod(desfase[:, self.semaforo_origen] - desfase[:, self.semaforo_destino] - self.tiempo_viaje,
+                       ciclo_v)
+        diferencia_desfase = np.minimum(error, ciclo_v - error)
+        return (np.abs(ciclo_u - ciclo_v) + diferencia_desfase).sum(axis=1)
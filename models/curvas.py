@@ -0,0 +1,78 @@
+import numpy as np
+from models.individuo_ag import GEN_VERDE, GEN_AMARILLO, GEN_ROJO, GEN_DESFASE
+
+
+def curvas_acumuladas(tiempos, cantidades, duracion):
+    """
+    Curva acumulada por cola: N[q, t] = eventos de la cola q con tiempo <= t.
+
+    `tiempos` es una matriz (colas x capacidad) cuyas primeras `cantidades[q]`
+    columnas de la fila q son tiempos ordenados; el resto de columnas y los
+    tiempos posteriores al horizonte se ignoran.
+    """
+    num_colas = len(cantidades)
+    validos = (np.arange(tiempos.shape[1]) < np.asarray(cantidades)[:, None]) & (tiempos < duracion)
+    filas = np.broadcast_to(np.arange(num_colas)[:, None], tiempos.shape)[validos]
+    conteos = np.bincount(filas * duracion + tiempos[validos], minlength=num_colas * duracion)
+    return np.cumsum(conteos.reshape(num_colas, duracion), axis=1)
+
+
+def segundos_en_verde(genes, duracion):
+    """Segundos de verde de cada semáforo en [0, duracion), sin recorrer el tiempo"""
+    verde = genes[:, GEN_VERDE]
+    ciclo = verde + genes[:, GEN_AMARILLO] + genes[:, GEN_ROJO]
+    completos, resto = np.divmod(duracion, ciclo)
+    # El ciclo incompleto final cubre las fases [inicio, inicio + resto) módulo ciclo
+    inicio = (genes[:, GEN_DESFASE] + completos * ciclo) % ciclo
+    fin = inicio + resto
+    parcial = (np.clip(np.minimum(fin, verde) - inicio, 0, None)
+               + np.clip(fin - np.maximum(inicio, ciclo), 0, None).clip(max=verde))
+    return completos * verde + parcial
+
+
+def metricas_curvas(llegadas, salidas, segundos_verde, capacidad_por_segundo, almacenamiento=np.inf):
+    """
+    Métricas por cola a partir de las curvas acumuladas de llegadas y salidas
+    (colas x duracion). La cola al final del segundo t es A(t) - D(t), de modo
+    que su suma en el tiempo es la demora total en vehículo-segundos, incluidos
+    los vehículos que siguen esperando al final del horizonte. La capacidad
+    (veh/s de verde) y el almacenamiento (vehículos) pueden ser escalares o
+    arreglos por cola.
+    """
+    duracion = llegadas.shape[1]
+    cola = llegadas - salidas
+    salidos = salidas[:, -1]
+    capacidad = capacidad_por_segundo * segundos_verde
+    return {
+        'duracion': duracion,
+        'demora_total': cola.sum(axis=1),
+        'cola_promedio': cola.mean(axis=1),
+        'cola_maxima': cola.max(axis=1),
+        'segundos_desborde': (cola > np.reshape(almacenamiento, (-1, 1))).sum(axis=1),
+        'llegadas': llegadas[:, -1],
+        'salidas': salidos,
+        'capacidad_verde': capacidad,
+        'rendimiento': salidos / duracion,  # Vehículos por segundo
+        'utilizacion_verde': np.divide(salidos, capacidad, out=np.zeros(len(salidos)), where=capacidad > 0),
+    }
+
+
+def unir_metricas(partes):
+    """Concatena las métricas por cola de varios bloques de colas"""
+    return {clave: (partes[0][clave] if clave == 'duracion' else np.concatenate([p[clave] for p in partes]))
+            for clave in partes[0]}
+
+
+def totales_red(metricas):
+    """Métricas agregadas de toda la red a partir de las métricas por cola"""
+    capacidad = float(metricas['capacidad_verde'].sum())
+    salidas = int(metricas['salidas'].sum())
+    return {
+        'demora_total': float(metricas['demora_total'].sum()),
+        'demora_por_vehiculo': float(metricas['demora_total'].sum()) / max(1, int(metricas['llegadas'].sum())),
+        'cola_promedio': float(metricas['cola_promedio'].sum()),
+        'cola_maxima': int(metricas['cola_maxima'].max(initial=0)),
+        'segundos_desborde': int(metricas['segundos_desborde'].sum()),
+        'rendimiento_hora': 3600 * salidas / metricas['duracion'],
+        'utilizacion_verde': salidas / capacidad if capacidad else 0.0,
+    }
@@ -0,0 +1,78 @@
+import hashlib
+import numpy as np
+
+
+def huella_genes(genes):
+    """Huella estable (hex) de un vector de genes, igual para genotipos idénticos"""
+    datos = np.ascontiguousarray(genes, dtype=np.int64).tobytes()
+    return hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+
+class IndiceGenotipos:
+    """Índice hash de los cromosomas presentes en la generación actual"""
+
+    def __init__(self, individuos=None):
+        self.huellas = set()
+        if individuos:
+            self.reconstruir(individuos)
+
+    def reconstruir(self, individuos):
+        """Vuelve a indexar la población (se llama una vez por generación)"""
+        self.huellas = {huella_genes(ind.genotipo) for ind in individuos}
+
+    def agregar(self, genes):
+        """Agrega un genotipo; retorna False si ya estaba en el índice"""
+        huella = huella_genes(genes)
+        if huella in self.huellas:
+            return False
+        self.huellas.add(huella)
+        return True
+
+    def contiene(self, genes):
+        return huella_genes(genes) in self.huellas
+
+    def filas_duplicadas(self, matriz):
+        """
+        Máscara de las filas de la matriz que ya están en el índice o que repiten
+        una fila anterior de la misma matriz. Las filas nuevas quedan indexadas.
+        """
+        duplicadas = np.zeros(len(matriz), dtype=bool)
+        for i, fila in enumerate(np.rint(matriz)):
+            duplicadas[i] = not self.agregar(fila)
+        return duplicadas
+
+    def __len__(self):
+        return len(self.huellas)
+
+
+def diversidad(matriz):
+    """
+    Métrica barata de diversidad de una población.
+
+    Retorna un diccionario con:
+    - unicos: número de genotipos distintos
+    - proporcion_unicos: unicos / tamaño de la población
+    - entropia: entropía media por gen, normalizada a [0, 1]
+    """
+    matriz = np.rint(np.asarray(matriz)).astype(np.int64)
+    num_individuos, num_genes = matriz.shape
+    if num_individuos == 0 or num_genes == 0:
+        return {'unicos': 0, 'proporcion_unicos': 0.0, 'entropia': 0.0}
+
+    unicos = len(np.unique(matriz, axis=0))
+
+    # Conteo de valores por gen con un solo bincount: cada columna usa su propio rango
+    valores = matriz - matriz.min(axis=0)
+    rango = int(valores.max()) + 1
+    codigos = valores + np.arange(num_genes) * rango
+    conteos = np.bincount(codigos.ravel(), minlength=num_genes * rango).reshape(num_genes, rango)
+    p = conteos / num_individuos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropia_genes = -np.where(p > 0, p * np.log(p), 0.0).sum(axis=1)
+    entropia = float(entropia_genes.mean() / np.log(num_individuos)) if num_individuos > 1 else 0.0
+
+    return {
+        'unicos': unicos,
+        'proporcion_unicos': unicos / num_individuos,
+        'entropia': entropia,
+    }
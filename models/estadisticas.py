@@ -0,0 +1,144 @@
+import math
+import numpy as np
+
+
+class EstadisticasEspera:
+    """
+    Acumulador de tiempos de espera en memoria constante.
+
+    Lleva conteo, suma, suma de cuadrados, mínimo y máximo, más un esbozo de
+    cuantiles con cubetas logarítmicas (al estilo DDSketch): la cubeta i cubre
+    (gamma^(i-1), gamma^i] con gamma = (1 + alfa) / (1 - alfa), de modo que
+    cualquier cuantil se estima con error relativo menor que `alfa`. El número
+    de cubetas crece con el logaritmo del rango de valores, no con el número
+    de vehículos. Dos acumuladores con el mismo alfa se combinan sumando sus
+    cubetas (entre colas, escenarios o procesos).
+    """
+
+    def __init__(self, alfa=0.01):
+        self.alfa = alfa
+        self.gamma = (1 + alfa) / (1 - alfa)
+        self._log_gamma = math.log(self.gamma)
+        self.conteo = 0
+        self.suma = 0.0
+        self.suma_cuadrados = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.ceros = 0  # Valores <= 0 (el logaritmo no está definido)
+        self._primera_cubeta = 0
+        self._cubetas = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def desde_valores(cls, valores, alfa=0.01):
+        """Acumulador con todos los valores de un arreglo"""
+        estadisticas = cls(alfa)
+        estadisticas.agregar_lote(valores)
+        return estadisticas
+
+    def _asegurar_cubetas(self, primera, ultima):
+        """Amplía el arreglo de cubetas para cubrir los índices [primera, ultima]"""
+        if len(self._cubetas) == 0:
+            self._primera_cubeta = primera
+            self._cubetas = np.zeros(ultima - primera + 1, dtype=np.int64)
+            return
+        actual_ultima = self._primera_cubeta + len(self._cubetas) - 1
+        nueva_primera = min(primera, self._primera_cubeta)
+        nueva_ultima = max(ultima, actual_ultima)
+        if nueva_primera == self._primera_cubeta and nueva_ultima == actual_ultima:
+            return
+        cubetas = np.zeros(nueva_ultima - nueva_primera + 1, dtype=np.int64)
+        inicio = self._primera_cubeta - nueva_primera
+        cubetas[inicio:inicio + len(self._cubetas)] = self._cubetas
+        self._primera_cubeta, self._cubetas = nueva_primera, cubetas
+
+    def agregar(self, valor):
+        """Agrega un valor"""
+        self.conteo += 1
+        self.suma += valor
+        self.suma_cuadrados += valor * valor
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+        if valor <= 0:
+            self.ceros += 1
+            return
+        indice = math.ceil(math.log(valor) / self._log_gamma)
+        self._asegurar_cubetas(indice, indice)
+        self._cubetas[indice - self._primera_cubeta] += 1
+
+    def agregar_lote(self, valores):
+        """Agrega todos los valores de un arreglo con operaciones vectorizadas"""
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        if len(valores) == 0:
+            return
+        self.conteo += len(valores)
+        self.suma += float(valores.sum())
+        self.suma_cuadrados += float(np.dot(valores, valores))
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+        positivos = valores[valores > 0]
+        self.ceros += len(valores) - len(positivos)
+        if len(positivos) == 0:
+            return
+        indices = np.ceil(np.log(positivos) / self._log_gamma).astype(np.int64)
+        primera, ultima = int(indices.min()), int(indices.max())
+        self._asegurar_cubetas(primera, ultima)
+        desde = primera - self._primera_cubeta
+        self._cubetas[desde:desde + ultima - primera + 1] += np.bincount(indices - primera)
+
+    def combinar(self, otra):
+        """Suma en este acumulador los valores de otro (mismo alfa); retorna self"""
+        if not math.isclose(self.alfa, otra.alfa):
+            raise ValueError("Solo se pueden combinar esbozos con el mismo alfa")
+        self.conteo += otra.conteo
+        self.suma += otra.suma
+        self.suma_cuadrados += otra.suma_cuadrados
+        self.minimo = min(self.minimo, otra.minimo)
+        self.maximo = max(self.maximo, otra.maximo)
+        self.ceros += otra.ceros
+        if len(otra._cubetas):
+            primera = otra._primera_cubeta
+            self._asegurar_cubetas(primera, primera + len(otra._cubetas) - 1)
+            desde = primera - self._primera_cubeta
+            self._cubetas[desde:desde + len(otra._cubetas)] += otra._cubetas
+        return self
+
+    def __iadd__(self, otra):
+        return self.combinar(otra)
+
+    def media(self):
+        return self.suma / self.conteo if self.conteo else math.nan
+
+    def varianza(self):
+        """Varianza muestral"""
+        if self.conteo < 2:
+            return math.nan
+        return max(0.0, (self.suma_cuadrados - self.suma ** 2 / self.conteo) / (self.conteo - 1))
+
+    def desviacion(self):
+        return math.sqrt(self.varianza()) if self.conteo >= 2 else math.nan
+
+    def cuantil(self, q):
+        """Estimación del cuantil q (0 a 1) con error relativo menor que alfa"""
+        if self.conteo == 0:
+            return math.nan
+        rango = q * (self.conteo - 1)
+        if rango < self.ceros:
+            return min(self.minimo, 0.0)  # Los valores <= 0 no se distinguen entre sí
+        acumulado = np.cumsum(self._cubetas) + self.ceros
+        i = int(np.searchsorted(acumulado, rango, side='right'))
+        i = min(i, len(self._cubetas) - 1)
+        valor = 2 * self.gamma ** (self._primera_cubeta + i) / (self.gamma + 1)
+        return min(max(valor, self.minimo), self.maximo)
+
+    def resumen(self):
+        """Diccionario con conteo, media, desviación, p50, p95, p99 y máximo"""
+        return {
+            'conteo': self.conteo,
+            'media': self.media(),
+            'desviacion': self.desviacion(),
+            'p50': self.cuantil(0.50),
+            'p95': self.cuantil(0.95),
+            'p99': self.cuantil(0.99),
+            'maximo': self.maximo if self.conteo else math.nan,
+        }
@@ -0,0 +1,148 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from models.individuo_ag import IndividuoAG, GENES_POR_SEMAFORO
+
+NUM_OBJETIVOS = 3  # Tiempo de espera, congestión y desincronización
+
+# Estado de cada proceso trabajador: red vial, parámetros de la simulación
+# y vistas sobre la memoria compartida con el proceso principal
+_red_trabajador = None
+_simulacion_trabajador = None
+_memoria_trabajador = None
+
+
+def _vistas(bloques, capacidad, num_genes):
+    """Arreglos (planes, desincronización, semillas, resultados) sobre los bloques de memoria compartida"""
+    planes = np.ndarray((capacidad, num_genes), dtype=np.int64, buffer=bloques[0].buf)
+    desincronizacion = np.ndarray(capacidad, dtype=np.float64, buffer=bloques[1].buf)
+    semillas = np.ndarray(capacidad, dtype=np.int64, buffer=bloques[2].buf)
+    resultados = np.ndarray((capacidad, 1 + NUM_OBJETIVOS), dtype=np.float64, buffer=bloques[3].buf)
+    return planes, desincronizacion, semillas, resultados
+
+
+def _inicializar_trabajador(red_vial, tasa_llegada, duracion_sim, nombres=None, capacidad=0, num_genes=0):
+    global _red_trabajador, _simulacion_trabajador, _memoria_trabajador
+    _red_trabajador = red_vial
+    _simulacion_trabajador = (tasa_llegada, duracion_sim)
+    if nombres is not None:
+        bloques = [SharedMemory(name=nombre) for nombre in nombres]
+        _memoria_trabajador = (bloques, _vistas(bloques, capacidad, num_genes))
+
+
+def _evaluar_plan(genes, desincronizacion, semilla=None):
+    """Simula un plan (llegadas con la semilla dada) en el proceso trabajador y retorna (fitness, objetivos)"""
+    tasa_llegada, duracion_sim = _simulacion_trabajador
+    individuo = IndividuoAG.desde_genes(genes)
+    individuo.calcular_fitness(_red_trabajador, tasa_llegada, duracion_sim, desincronizacion=desincronizacion,
+                               rng=np.random.default_rng(semilla))
+    return individuo.fitness, individuo.objetivos
+
+
+def _evaluar_ranura(ranura):
+    """Simula el plan de una ranura de la memoria compartida y escribe ahí su resultado"""
+    planes, desincronizacion, semillas, resultados = _memoria_trabajador[1]
+    fitness, objetivos = _evaluar_plan(planes[ranura].copy(), float(desincronizacion[ranura]), int(semillas[ranura]))
+    resultados[ranura, 0] = fitness
+    resultados[ranura, 1:] = objetivos
+    return ranura
+
+
+class EvaluadorParalelo:
+    """
+    Reparte la simulación de planes entre procesos. Cada trabajador recibe la
+    red una sola vez al arrancar y reutiliza su contexto de evaluación.
+
+    Los planes, su desincronización (ya calculada en bloque en el proceso
+    principal), la semilla de sus llegadas y los resultados viven en arreglos
+    de memoria compartida con `capacidad` ranuras: el proceso principal
+    escribe el plan en una ranura libre, por la tubería solo viaja el índice
+    de la ranura y el trabajador lee el plan y escribe fitness y objetivos en
+    el mismo lugar, sin serializar individuos.
+
+    `enviar` retorna un Future con (fitness, objetivos), de modo que el AG
+    estacionario puede atender cada resultado en cuanto llega; si no hay
+    ranuras libres espera a que se libere una. Con procesos=1 se evalúa en el
+    propio proceso y el Future se entrega ya resuelto.
+    """
+
+    def __init__(self, red_vial, tasa_llegada, duracion_sim, procesos=None, capacidad=None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self._pool = None
+        self._bloques = []
+        if self.procesos == 1:
+            _inicializar_trabajador(red_vial, tasa_llegada, duracion_sim)
+            return
+
+        self.capacidad = max(capacidad or 0, self.procesos)
+        num_genes = red_vial.num_semaforos * GENES_POR_SEMAFORO
+        tamaños = (self.capacidad * num_genes * 8, self.capacidad * 8, self.capacidad * 8,
+                   self.capacidad * (1 + NUM_OBJETIVOS) * 8)
+        self._bloques = [SharedMemory(create=True, size=max(1, tamaño)) for tamaño in tamaños]
+        self.planes, self.desincronizacion, self.semillas, self.resultados = _vistas(
+            self._bloques, self.capacidad, num_genes)
+        self._libres = list(range(self.capacidad))
+        self._condicion = threading.Condition()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.procesos, initializer=_inicializar_trabajador,
+            initargs=(red_vial, tasa_llegada, duracion_sim, [b.name for b in self._bloques],
+                      self.capacidad, num_genes))
+
+    def enviar(self, genes, desincronizacion, semilla=None):
+        """Escribe el plan en una ranura libre, encola su índice y retorna el Future del resultado"""
+        futuro = Future()
+        if self._pool is None:
+            futuro.set_result(_evaluar_plan(genes, desincronizacion, semilla))
+            return futuro
+        if semilla is None:
+            semilla = np.random.default_rng().integers(0, 2 ** 63)
+
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._libres)
+            ranura = self._libres.pop()
+        self.planes[ranura] = genes
+        self.desincronizacion[ranura] = desincronizacion
+        self.semillas[ranura] = semilla
+
+        def terminar(tarea):
+            # Se ejecuta en el hilo del pool: copia el resultado y libera la ranura
+            try:
+                tarea.result()
+                futuro.set_result((float(self.resultados[ranura, 0]), self.resultados[ranura, 1:].copy()))
+            except BaseException as error:
+                futuro.set_exception(error)
+            with self._condicion:
+                self._libres.append(ranura)
+                self._condicion.notify()
+
+        self._pool.submit(_evaluar_ranura, ranura).add_done_callback(terminar)
+        return futuro
+
+    def evaluar(self, planes, desincronizacion, semillas=None):
+        """(fitness, objetivos) de cada plan, en el orden de los planes"""
+        if semillas is None:
+            semillas = [None] * len(planes)
+        futuros = [self.enviar(genes, d, s) for genes, d, s in zip(planes, desincronizacion, semillas)]
+        return [futuro.result() for futuro in futuros]
+
+    def cerrar(self):
+        """Detiene los procesos trabajadores y libera la memoria compartida"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._bloques:
+            self.planes = self.desincronizacion = self.semillas = self.resultados = None
+            for bloque in self._bloques:
+                bloque.close()
+                bloque.unlink()
+            self._bloques = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
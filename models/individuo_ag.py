@@ -1,62 +1,94 @@
-import random
+import numpy as np
 from models.semaforo import Semaforo
-from collections import deque
+
+# Disposición de los genes de cada semáforo dentro del vector plano del individuo
+GEN_VERDE = 0
+GEN_AMARILLO = 1
+GEN_ROJO = 2
+GEN_DESFASE = 3
+GENES_POR_SEMAFORO = 4
 
 class IndividuoAG:
-    def __init__(self, num_semaforos):
-        self.cromosoma = []
+    def __init__(self, num_semaforos, rng=None):
         self.fitness = 0
+        self.objetivos = None  # (tiempo promedio, congestión, desincronización)
+        self._cromosoma = None
+        self._genotipo = None
         
-        # Generar cromosoma aleatorio
-        for i in range(num_semaforos):
-            tiempo_verde = random.randint(15, 60)
-            tiempo_amarillo = random.randint(3, 5)
-            tiempo_rojo = random.randint(20, 60)
-            desfase = random.randint(0, 30)
-            
-            self.cromosoma.append(Semaforo(i, tiempo_verde, tiempo_amarillo, tiempo_rojo, desfase))
+        # Generar cromosoma aleatorio (una fila de genes por semáforo) con el
+        # generador del AG, para que una ejecución con semilla sea reproducible
+        rng = rng if rng is not None else np.random.default_rng()
+        genes = np.empty((num_semaforos, GENES_POR_SEMAFORO), dtype=np.int64)
+        genes[:, GEN_VERDE] = rng.integers(15, 61, num_semaforos)
+        genes[:, GEN_AMARILLO] = rng.integers(3, 6, num_semaforos)
+        genes[:, GEN_ROJO] = rng.integers(20, 61, num_semaforos)
+        genes[:, GEN_DESFASE] = rng.integers(0, 31, num_semaforos)
+        self.genes = genes.ravel()
 
-    def calcular_fitness(self, red_vial, tasa_llegada=0.2, duracion_sim=3600):
-        """Calcula el fitness del individuo basado en la simulación de tráfico"""
-        # Reset simulation time
-        red_vial.tiempo_simulacion = 0
-        
-        # Actualizar la configuración de semáforos en la red vial
-        semaforo_idx = 0
-        for interseccion in red_vial.intersecciones:
-            # Guardar los IDs originales
-            ids_originales = [sem.id for sem in interseccion.semaforos]
-            
-            for i, _ in enumerate(interseccion.semaforos):
-                if semaforo_idx < len(self.cromosoma):
-                    # Crear una copia del semáforo del cromosoma pero mantener el ID original
-                    nuevo_semaforo = Semaforo(
-                        id=ids_originales[i],
-                        tiempo_verde=self.cromosoma[semaforo_idx].tiempo_verde,
-                        tiempo_amarillo=self.cromosoma[semaforo_idx].tiempo_amarillo,
-                        tiempo_rojo=self.cromosoma[semaforo_idx].tiempo_rojo,
-                        desfase=self.cromosoma[semaforo_idx].desfase
-                    )
-                    interseccion.semaforos[i] = nuevo_semaforo
-                    semaforo_idx += 1
-        
-        # Reiniciar las colas de vehículos
-        for interseccion in red_vial.intersecciones:
-            for semaforo_id in interseccion.cola_vehiculos:
-                interseccion.cola_vehiculos[semaforo_id] = deque() 
-        
-        # Simular llegadas de vehículos con distribución Poisson
-        red_vial.simular_llegada_poisson(tasa_llegada, duracion_sim)
+    @classmethod
+    def desde_genes(cls, genes, genotipo=None):
+        """
+        Crea un individuo a partir de su plan por semáforo y, si la codificación
+        del AG no es la de semáforos, del genotipo que lo produjo
+        """
+        individuo = cls.__new__(cls)
+        individuo.fitness = 0
+        individuo.objetivos = None
+        individuo._cromosoma = None
+        individuo.genes = np.asarray(genes, dtype=np.int64).ravel()
+        individuo._genotipo = None if genotipo is None else np.asarray(genotipo, dtype=np.int64).ravel()
+        return individuo
+
+    @property
+    def genotipo(self):
+        """Genes que manipulan los operadores genéticos (por defecto, el plan por semáforo)"""
+        return self.genes if self._genotipo is None else self._genotipo
+
+    @property
+    def cromosoma(self):
+        """Lista de semáforos construida bajo demanda a partir de los genes"""
+        if self._cromosoma is None:
+            self._cromosoma = [
+                Semaforo(i, int(verde), int(amarillo), int(rojo), int(desfase))
+                for i, (verde, amarillo, rojo, desfase) in enumerate(self.genes.reshape(-1, GENES_POR_SEMAFORO))
+            ]
+        return self._cromosoma
+
+    @cromosoma.setter
+    def cromosoma(self, semaforos):
+        self.genes = np.array(
+            [[s.tiempo_verde, s.tiempo_amarillo, s.tiempo_rojo, s.desfase] for s in semaforos],
+            dtype=np.int64
+        ).reshape(-1)
+        self._cromosoma = None
+        self._genotipo = None
+
+    def calcular_fitness(self, red_vial, tasa_llegada=0.2, duracion_sim=3600, contexto=None,
+                         desincronizacion=None, rng=None):
+        """
+        Calcula el fitness del individuo basado en la simulación de tráfico.
+        La desincronización puede venir ya calculada para toda la población
+        (CoordinacionRed.desincronizacion sobre la matriz de planes). `rng`
+        genera las llegadas (por defecto np.random).
+        """
+        # El contexto reutiliza los búferes de simulación de la red en lugar de
+        # crear semáforos y colas nuevas en cada evaluación
+        if contexto is None:
+            contexto = red_vial.obtener_contexto_evaluacion()
         
-        # Simular el tráfico y obtener métricas
-        tiempo_promedio, congestion = red_vial.simular_trafico(duracion_sim)
+        # Simular llegadas Poisson y tráfico con la configuración del cromosoma
+        tiempo_promedio, congestion = contexto.evaluar(self.genes, tasa_llegada, duracion_sim, rng)
         
         # Fix: Ensure metrics are positive
         tiempo_promedio = max(0.01, abs(tiempo_promedio))
         congestion = max(0.01, abs(congestion))
         
         # Calcular desincronización
-        desincronizacion = self.calcular_desincronizacion()
+        if desincronizacion is None:
+            desincronizacion = self.calcular_desincronizacion(red_vial)
+        
+        # Objetivos sin ponderar (todos a minimizar) para el modo multiobjetivo
+        self.objetivos = np.array([tiempo_promedio, congestion, desincronizacion], dtype=float)
         
         # Calcular fitness (menor tiempo de espera y congestión es mejor)
         alpha = 0.3  # Peso para la congestión
@@ -70,22 +102,10 @@ class IndividuoAG:
         self.fitness = 1 / denominator
         return self.fitness
 
-    def calcular_desincronizacion(self):
-        """Calcula una medida de desincronización entre semáforos adyacentes"""
-        desincronizacion = 0
-        
-        # Ejemplo simple: comparar ciclos y desfases de semáforos consecutivos
-        for i in range(len(self.cromosoma) - 1):
-            s1 = self.cromosoma[i]
-            s2 = self.cromosoma[i + 1]
-            
-            # Diferencia de ciclos (idealmente deberían ser similares)
-            diff_ciclo = abs(s1.ciclo_total - s2.ciclo_total)
-            
-            # Diferencia de desfases (dependiendo del diseño vial)
-            diff_desfase = min(abs(s1.desfase - s2.desfase), 
-                              abs(s1.desfase - s2.desfase + s1.ciclo_total))
-            
-            desincronizacion += diff_ciclo + diff_desfase
-            
-        return desincronizacion
\ No newline at end of file
+    def calcular_desincronizacion(self, red_vial):
+        """
+        Desincronización sobre las conexiones reales de la red: diferencia de
+        ciclos y desviación de la onda verde (según el tiempo de viaje) de cada
+        par de semáforos conectados
+        """
+        return float(red_vial.obtener_coordinacion().desincronizacion(self.genes)[0])
@@ -6,9 +6,12 @@ class Interseccion:
         self.id = id
         self.semaforos = semaforos  # Lista de semáforos en esta intersección
         self.conexiones = conexiones if conexiones else []  # Conexiones a otras intersecciones
-        self.cola_vehiculos = {s.id: deque() for s in semaforos}  # Colas de vehículos por dirección
+        # Una cola de vehículos por semáforo, en la misma posición que en `semaforos`
+        # (dos semáforos con el mismo ID no comparten cola)
+        self.cola_vehiculos = [deque() for _ in semaforos]
         self.nombre = nombre
         self.coordenadas = coordenadas
+        self.indice = None  # Posición en RedVial.intersecciones (la asigna RedVial)
     
     def __str__(self):
         return f"Intersección {self.id}: {len(self.semaforos)} semáforos, {len(self.conexiones)} conexiones"
\ No newline at end of file
@@ -0,0 +1,78 @@
+import numpy as np
+
+# Utilidades de NSGA-II sobre matrices de objetivos (una fila por individuo,
+# una columna por objetivo). Todos los objetivos se minimizan.
+
+
+def matriz_dominancia(objetivos):
+    """dominancia[i, j] es True si el individuo i domina al individuo j"""
+    F = np.asarray(objetivos, dtype=float)
+    menor_igual = (F[:, None, :] <= F[None, :, :]).all(axis=2)
+    menor = (F[:, None, :] < F[None, :, :]).any(axis=2)
+    return menor_igual & menor
+
+
+def ordenamiento_no_dominado(objetivos):
+    """
+    Ordenamiento rápido no dominado.
+    Retorna el rango de cada individuo (0 = frente de Pareto).
+    """
+    dominancia = matriz_dominancia(objetivos)
+    num_individuos = dominancia.shape[0]
+    rangos = np.full(num_individuos, -1, dtype=np.int64)
+
+    # Cuántos individuos dominan a cada uno; el frente actual son los que llegan a cero
+    dominado_por = dominancia.sum(axis=0)
+    frente_actual = dominado_por == 0
+    rango = 0
+    while frente_actual.any():
+        rangos[frente_actual] = rango
+        dominado_por = dominado_por - dominancia[frente_actual].sum(axis=0)
+        dominado_por[rangos >= 0] = -1
+        frente_actual = dominado_por == 0
+        rango += 1
+    return rangos
+
+
+def distancia_hacinamiento(objetivos, rangos):
+    """
+    Distancia de hacinamiento de cada individuo dentro de su frente.
+    Los extremos de cada frente reciben distancia infinita.
+    """
+    F = np.asarray(objetivos, dtype=float)
+    num_individuos, num_objetivos = F.shape
+    distancia = np.zeros(num_individuos)
+    if num_individuos == 0:
+        return distancia
+
+    for k in range(num_objetivos):
+        # Ordenar por frente y, dentro de cada frente, por el objetivo k
+        orden = np.lexsort((F[:, k], rangos))
+        valores = F[orden, k]
+        frente = rangos[orden]
+        inicio = np.r_[True, frente[1:] != frente[:-1]]
+        fin = np.r_[frente[1:] != frente[:-1], True]
+
+        # Normalizar por la amplitud del objetivo en cada frente
+        id_frente = np.cumsum(inicio) - 1
+        amplitud = valores[fin][id_frente] - valores[inicio][id_frente]
+        amplitud = np.where(amplitud > 0, amplitud, 1.0)
+
+        d = np.zeros(num_individuos)
+        if num_individuos > 2:
+            d[1:-1] = (valores[2:] - valores[:-2]) / amplitud[1:-1]
+        d[inicio | fin] = np.inf
+        distancia[orden] += d
+
+    return distancia
+
+
+def orden_nsga2(objetivos):
+    """
+    Índices ordenados del mejor al peor según (rango ascendente, hacinamiento
+    descendente), junto con los rangos calculados.
+    """
+    rangos = ordenamiento_no_dominado(objetivos)
+    hacinamiento = distancia_hacinamiento(objetivos, rangos)
+    orden = np.lexsort((-hacinamiento, rangos))
+    return orden, rangos
@@ -0,0 +1,179 @@
+import numpy as np
+
+# Los operadores trabajan sobre la matriz de población completa (una fila por
+# individuo, una columna por gen) y producen toda la descendencia de una
+# generación con unas cuantas operaciones de arreglos.
+#
+# Firma común:
+#   cruce(padres1, padres2, prob_cruce, rng, limites, **parametros) -> (hijos1, hijos2)
+#   mutacion(poblacion, prob_mutacion, rng, limites, **parametros) -> poblacion_mutada
+#
+# `limites` es una tupla (inferior, superior) con un valor por gen.
+
+
+def _filas_que_cruzan(num_filas, prob_cruce, rng):
+    """Máscara (num_filas, 1) con las parejas que efectivamente se cruzan"""
+    return (rng.random(num_filas) < prob_cruce)[:, None]
+
+
+def _mascara_por_bloques(mascara_bloques, tamaño_bloque):
+    """Expande una máscara por bloque (semáforo) a una máscara por gen"""
+    return np.repeat(mascara_bloques, tamaño_bloque, axis=1)
+
+
+def cruce_dos_puntos(padres1, padres2, prob_cruce, rng, limites=None, tamaño_bloque=1, **_):
+    """Cruce de dos puntos; los puntos de corte caen entre bloques de genes"""
+    num_filas, num_genes = padres1.shape
+    num_bloques = num_genes // tamaño_bloque
+    if num_bloques == 0:
+        return padres1.copy(), padres2.copy()
+
+    punto1 = rng.integers(0, num_bloques, num_filas)
+    punto2 = rng.integers(punto1, num_bloques)
+    bloques = np.arange(num_bloques)
+    segmento = (bloques >= punto1[:, None]) & (bloques < punto2[:, None])
+
+    mascara = _mascara_por_bloques(segmento, tamaño_bloque) & _filas_que_cruzan(num_filas, prob_cruce, rng)
+    hijos1 = np.where(mascara, padres2, padres1)
+    hijos2 = np.where(mascara, padres1, padres2)
+    return hijos1, hijos2
+
+
+def cruce_uniforme(padres1, padres2, prob_cruce, rng, limites=None, tamaño_bloque=1, **_):
+    """Cruce uniforme: cada bloque se hereda de uno u otro padre con igual probabilidad"""
+    num_filas, num_genes = padres1.shape
+    num_bloques = num_genes // tamaño_bloque
+
+    intercambio = rng.random((num_filas, num_bloques)) < 0.5
+    mascara = _mascara_por_bloques(intercambio, tamaño_bloque) & _filas_que_cruzan(num_filas, prob_cruce, rng)
+    hijos1 = np.where(mascara, padres2, padres1)
+    hijos2 = np.where(mascara, padres1, padres2)
+    return hijos1, hijos2
+
+
+def cruce_blx(padres1, padres2, prob_cruce, rng, limites=None, alfa=0.5, **_):
+    """Cruce de mezcla BLX-alfa: hijos uniformes en el intervalo extendido de los padres"""
+    minimo = np.minimum(padres1, padres2)
+    maximo = np.maximum(padres1, padres2)
+    extension = alfa * (maximo - minimo)
+    inferior = minimo - extension
+    superior = maximo + extension
+
+    cruza = _filas_que_cruzan(padres1.shape[0], prob_cruce, rng)
+    hijos1 = np.where(cruza, rng.uniform(inferior, superior), padres1)
+    hijos2 = np.where(cruza, rng.uniform(inferior, superior), padres2)
+    return _recortar(hijos1, limites), _recortar(hijos2, limites)
+
+
+def cruce_sbx(padres1, padres2, prob_cruce, rng, limites=None, eta=15.0, **_):
+    """Cruce binario simulado (SBX) con índice de distribución eta"""
+    u = rng.random(padres1.shape)
+    beta = np.where(
+        u <= 0.5,
+        (2.0 * u) ** (1.0 / (eta + 1.0)),
+        (1.0 / (2.0 * (1.0 - u))) ** (1.0 / (eta + 1.0))
+    )
+
+    # Cada gen participa con probabilidad 0.5, como en la formulación original
+    mascara = (rng.random(padres1.shape) < 0.5) & _filas_que_cruzan(padres1.shape[0], prob_cruce, rng)
+    suma = padres1 + padres2
+    diferencia = padres2 - padres1
+    hijos1 = np.where(mascara, 0.5 * (suma - beta * diferencia), padres1)
+    hijos2 = np.where(mascara, 0.5 * (suma + beta * diferencia), padres2)
+    return _recortar(hijos1, limites), _recortar(hijos2, limites)
+
+
+def mutacion_multiplicativa(poblacion, prob_mutacion, rng, limites=None, tamaño_bloque=1,
+                            escalas=None, genes_mutables=None, genes_aditivos=(), **_):
+    """
+    Mutación por bloque: con probabilidad prob_mutacion se elige un gen mutable
+    del bloque y se multiplica por (1 + U(-escala, escala)).
+    Los genes_aditivos (posiciones dentro del bloque) se desplazan en cambio
+    U(-escala, escala)·(superior - inferior), de modo que un valor cero también muta.
+    """
+    num_filas, num_genes = poblacion.shape
+    num_bloques = num_genes // tamaño_bloque
+    if num_bloques == 0:
+        return poblacion.copy()
+    if genes_mutables is None:
+        genes_mutables = np.arange(tamaño_bloque)
+    genes_mutables = np.asarray(genes_mutables)
+    if escalas is None:
+        escalas = np.full(tamaño_bloque, 0.15)
+    escalas = np.asarray(escalas, dtype=float)
+
+    muta = rng.random((num_filas, num_bloques)) < prob_mutacion
+    posicion = genes_mutables[rng.integers(0, len(genes_mutables), (num_filas, num_bloques))]
+    cambio = np.where(muta, rng.uniform(-1.0, 1.0, (num_filas, num_bloques)) * escalas[posicion], 0.0)
+
+    columnas = np.arange(num_bloques) * tamaño_bloque + posicion
+    filas = np.arange(num_filas)[:, None]
+    mutada = poblacion.astype(float, copy=True)
+    valores = mutada[filas, columnas]
+    if len(genes_aditivos) and limites is not None:
+        aditivo = np.isin(posicion, genes_aditivos)
+        rango = (limites[1] - limites[0])[columnas]
+        mutada[filas, columnas] = np.where(aditivo, valores + cambio * rango, valores * (1.0 + cambio))
+    else:
+        mutada[filas, columnas] = valores * (1.0 + cambio)
+    return _recortar(mutada, limites)
+
+
+def mutacion_gaussiana(poblacion, prob_mutacion, rng, limites=None, sigma=0.1, **_):
+    """Suma ruido normal con desviación sigma·(superior - inferior) a cada gen elegido"""
+    if limites is None:
+        rango = np.abs(poblacion).max(axis=0) + 1.0
+    else:
+        rango = limites[1] - limites[0]
+    muta = rng.random(poblacion.shape) < prob_mutacion
+    ruido = rng.normal(0.0, 1.0, poblacion.shape) * (sigma * rango)
+    return _recortar(np.where(muta, poblacion + ruido, poblacion), limites)
+
+
+def mutacion_polinomial(poblacion, prob_mutacion, rng, limites, eta=20.0, **_):
+    """Mutación polinomial de Deb acotada por los límites de cada gen"""
+    inferior, superior = limites
+    rango = np.maximum(superior - inferior, 1e-12)
+    x = poblacion.astype(float)
+    delta1 = (x - inferior) / rango
+    delta2 = (superior - x) / rango
+    u = rng.random(x.shape)
+    exponente = 1.0 / (eta + 1.0)
+
+    delta_q = np.where(
+        u < 0.5,
+        (2.0 * u + (1.0 - 2.0 * u) * (1.0 - delta1) ** (eta + 1.0)) ** exponente - 1.0,
+        1.0 - (2.0 * (1.0 - u) + 2.0 * (u - 0.5) * (1.0 - delta2) ** (eta + 1.0)) ** exponente
+    )
+    muta = rng.random(x.shape) < prob_mutacion
+    return _recortar(np.where(muta, x + delta_q * rango, x), limites)
+
+
+def _recortar(poblacion, limites):
+    """Mantiene los genes dentro de sus límites"""
+    if limites is None:
+        return poblacion
+    return np.clip(poblacion, limites[0], limites[1])
+
+
+OPERADORES_CRUCE = {
+    'dos_puntos': cruce_dos_puntos,
+    'uniforme': cruce_uniforme,
+    'blx': cruce_blx,
+    'sbx': cruce_sbx,
+}
+
+OPERADORES_MUTACION = {
+    'multiplicativa': mutacion_multiplicativa,
+    'gaussiana': mutacion_gaussiana,
+    'polinomial': mutacion_polinomial,
+}
+
+
+def obtener_operador(registro, nombre):
+    """Busca un operador por nombre en un registro (acepta también funciones)"""
+    if callable(nombre):
+        return nombre
+    if nombre not in registro:
+        raise ValueError(f"Operador desconocido '{nombre}'. Opciones: {', '.join(sorted(registro))}")
+    return registro[nombre]
@@ -0,0 +1,49 @@
+import numpy as np
+from models.individuo_ag import GENES_POR_SEMAFORO
+
+# Plan de referencia sin optimizar: verde, amarillo, rojo y desfase
+PLAN_ORIGINAL = (30, 3, 30, 0)
+
+
+class PlanSemaforico:
+    """
+    Plan de tiempos superpuesto a una red vial.
+
+    Guarda solo una matriz (semáforos x 4) con verde, amarillo, rojo y desfase
+    en el orden en que la red recorre sus semáforos; la topología, las
+    coordenadas y las colas siguen siendo las de la red original, que no se
+    copia ni se modifica. Comparar N planes cuesta O(N x semáforos).
+    """
+
+    def __init__(self, red_vial, genes, nombre=''):
+        self.red_vial = red_vial
+        self.genes = np.asarray(genes, dtype=np.int64).reshape(-1, GENES_POR_SEMAFORO)
+        self.nombre = nombre
+
+    @classmethod
+    def actual(cls, red_vial, nombre=''):
+        """Plan con los tiempos que tienen ahora los semáforos de la red"""
+        return cls(red_vial, red_vial.plan_actual(), nombre)
+
+    @classmethod
+    def desde_solucion(cls, red_vial, solucion, nombre=''):
+        """Plan de la red con los tiempos de un IndividuoAG (los semáforos sobrantes conservan los suyos)"""
+        genes = red_vial.plan_actual()
+        genes_solucion = np.asarray(solucion.genes, dtype=np.int64).reshape(-1, GENES_POR_SEMAFORO)
+        num = min(len(genes), len(genes_solucion))
+        genes[:num] = genes_solucion[:num]
+        return cls(red_vial, genes, nombre)
+
+    @classmethod
+    def original(cls, red_vial, plan=PLAN_ORIGINAL, nombre='Original'):
+        """Plan sin optimizar: los mismos tiempos en todos los semáforos"""
+        return cls(red_vial, np.tile(np.array(plan, dtype=np.int64), (red_vial.num_semaforos, 1)), nombre)
+
+    @property
+    def num_semaforos(self):
+        return len(self.genes)
+
+    def simular(self, tasa_llegada=0.2, duracion=3600, rng=None):
+        """Simula el plan sobre la red; retorna (tiempo promedio, congestión)"""
+        contexto = self.red_vial.obtener_contexto_evaluacion()
+        return contexto.evaluar(self.genes, tasa_llegada, duracion, rng)
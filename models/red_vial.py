@@ -1,61 +1,198 @@
+import hashlib
+import math
 import numpy as np
+from models.contexto_evaluacion import ContextoEvaluacion
+from models.coordinacion import CoordinacionRed
+from models.estadisticas import EstadisticasEspera
+
+RADIO_TIERRA_M = 6371000.0
+
+# Capacidades de los accesos
+SATURACION_POR_CARRIL = 1900 / 3600  # Flujo de saturación base: 1900 veh/h por carril
+# Sin datos de calle: un carril a velocidad libre (factor de velocidad 1), en la
+# misma escala que los accesos con calle
+SATURACION_POR_DEFECTO = SATURACION_POR_CARRIL
+LONGITUD_VEHICULO_M = 7.5            # Espacio que ocupa un vehículo detenido en la cola
+
+
+def normalizar_coordenadas(coordenadas):
+    """Convierte coordenadas (dict lat/lng, lista/tupla u objeto) en (lat, lon) o None"""
+    if not coordenadas:
+        return None
+    try:
+        if isinstance(coordenadas, dict):
+            # Las claves pueden ser 'lat'/'lng' o 'latitude'/'longitude'
+            keys = coordenadas.keys()
+            lat_key = next((k for k in keys if 'lat' in k.lower()), None)
+            lng_key = next((k for k in keys if 'lng' in k.lower() or 'lon' in k.lower()), None)
+            if lat_key and lng_key:
+                return float(coordenadas[lat_key]), float(coordenadas[lng_key])
+            return None
+        if isinstance(coordenadas, (list, tuple)) and len(coordenadas) >= 2:
+            return float(coordenadas[0]), float(coordenadas[1])
+        return float(coordenadas.latitude), float(coordenadas.longitude)
+    except (AttributeError, ValueError, TypeError):
+        return None
+
 
 class RedVial:
     def __init__(self, intersecciones):
         self.intersecciones = intersecciones
         self.tiempo_simulacion = 0
         self.flujos_calles = {}
+        self.calles = {}  # (desde_id, hasta_id) -> longitud, velocidad_max, carriles, bidireccional
+        self._contexto_evaluacion = None
+        self._coordinacion = None
+        self.estadisticas_espera = EstadisticasEspera()  # De la última simulación
+        
+        # Índice denso de intersecciones y coordenadas normalizadas una sola vez:
+        # fila k = (lat, lon) de la intersección k, NaN si no tiene coordenadas válidas
+        self.indice_interseccion = {}
+        self.coordenadas = np.full((len(intersecciones), 2), np.nan, dtype=np.float64)
+        
+        # Índice global denso de semáforos: el semáforo s ocupa la posición s del
+        # cromosoma y de todos los arreglos por semáforo (self.semaforos, self.colas);
+        # ids_semaforos[s] = (ID de intersección, ID de semáforo) de origen, que pueden
+        # repetirse. Los semáforos de la intersección k son inicio_semaforos[k]:inicio_semaforos[k+1]
+        self.semaforos = []
+        self.colas = []
+        self.ids_semaforos = []
+        self.inicio_semaforos = np.zeros(len(intersecciones) + 1, dtype=np.int64)
+        for k, interseccion in enumerate(intersecciones):
+            interseccion.indice = k
+            self.indice_interseccion[interseccion.id] = k
+            posicion = normalizar_coordenadas(interseccion.coordenadas)
+            if posicion is not None:
+                self.coordenadas[k] = posicion
+            for semaforo, cola in zip(interseccion.semaforos, interseccion.cola_vehiculos):
+                semaforo.indice = len(self.semaforos)
+                self.semaforos.append(semaforo)
+                self.colas.append(cola)
+                self.ids_semaforos.append((interseccion.id, semaforo.id))
+            self.inicio_semaforos[k + 1] = len(self.semaforos)
+        self.num_semaforos = len(self.semaforos)
+        self.interseccion_de_semaforo = np.repeat(np.arange(len(intersecciones)),
+                                                  np.diff(self.inicio_semaforos))
+        
+        # Capacidad de cada acceso (semáforo): flujo de saturación en veh/s de verde
+        # y vehículos que caben en la calle; sin datos de calles, un carril sin límite de cola
+        self.saturacion = np.full(self.num_semaforos, SATURACION_POR_DEFECTO)
+        self.almacenamiento = np.full(self.num_semaforos, np.inf)
+    
+    def plan_actual(self):
+        """Matriz (semáforos x 4) con verde, amarillo, rojo y desfase actuales de la red"""
+        return np.array([[s.tiempo_verde, s.tiempo_amarillo, s.tiempo_rojo, s.desfase]
+                         for s in self.semaforos], dtype=np.int64).reshape(-1, 4)
+    
+    def buscar_semaforos(self, interseccion_id, semaforo_id):
+        """Índices globales de los semáforos con esos IDs de origen"""
+        k = self.indice_interseccion[interseccion_id]
+        return [s for s in range(self.inicio_semaforos[k], self.inicio_semaforos[k + 1])
+                if self.ids_semaforos[s][1] == semaforo_id]
+    
+    def tiene_coordenadas(self):
+        """Máscara de las intersecciones con coordenadas válidas"""
+        return ~np.isnan(self.coordenadas).any(axis=1)
+    
+    def distancia_haversine(self, origenes, destinos):
+        """Distancia en metros entre pares de intersecciones (arreglos de índices)"""
+        lat1, lon1 = np.radians(self.coordenadas[origenes]).T
+        lat2, lon2 = np.radians(self.coordenadas[destinos]).T
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * RADIO_TIERRA_M * np.arcsin(np.sqrt(a))
     
     def simular_llegada_poisson(self, tasa_llegada, duracion=3600):
         """Simula la llegada de vehículos siguiendo una distribución de Poisson"""
         for t in range(duracion):
-            # Para cada intersección
-            for interseccion in self.intersecciones:
-                # Para cada dirección en la intersección
-                for semaforo_id in interseccion.cola_vehiculos:
-                    # Generar llegadas según distribución de Poisson
-                    num_llegadas = np.random.poisson(tasa_llegada)
-                    for _ in range(num_llegadas):
-                        # Añadir vehículo a la cola con su tiempo de llegada
-                        interseccion.cola_vehiculos[semaforo_id].append(t)
+            # Para cada semáforo (índice global), su propia cola
+            for cola in self.colas:
+                # Generar llegadas según distribución de Poisson
+                num_llegadas = np.random.poisson(tasa_llegada)
+                for _ in range(num_llegadas):
+                    # Añadir vehículo a la cola con su tiempo de llegada
+                    cola.append(t)
 
 
     def simular_trafico(self, duracion=3600):
         """Simula el tráfico durante un período de tiempo"""
-        tiempos_espera = []
+        # Las esperas se juntan en una lista y se pasan una sola vez al acumulador
+        # (conteo, suma, cuantiles) con agregar_lote, como en ContextoEvaluacion
+        esperas = []
+        # Crédito de capacidad de cada acceso: la fracción de vehículo que no alcanzó
+        # a salir pasa al segundo siguiente mientras siga el verde
+        credito = [0.0] * self.num_semaforos
+        saturacion = self.saturacion.tolist()
         
         for t in range(duracion):
             self.tiempo_simulacion = t
             
-            # Para cada intersección
-            for interseccion in self.intersecciones:
-                # Para cada semáforo en la intersección
-                for semaforo in interseccion.semaforos:
-                    estado = semaforo.get_estado(t)
-                    
-                    # Si el semáforo está en verde, procesar vehículos
-                    if estado == "verde":
-                        cola = interseccion.cola_vehiculos[semaforo.id]
-                        # Procesar hasta 3 vehículos por segundo de verde (capacidad)
-                        for _ in range(min(3, len(cola))):
-                            if cola:
-                                tiempo_llegada = cola.popleft()
-                                tiempo_espera = t - tiempo_llegada
-                                # Fix: Ensure tiempo_espera is never negative
-                                if tiempo_espera >= 0:
-                                    tiempos_espera.append(tiempo_espera)
+            # Para cada semáforo (índice global) y su cola
+            for s, (semaforo, cola) in enumerate(zip(self.semaforos, self.colas)):
+                estado = semaforo.get_estado(t)
+                
+                # Si el semáforo está en verde, procesar vehículos
+                if estado == "verde":
+                    # Procesar según el flujo de saturación del acceso,
+                    # solo los que ya llegaron a la cola
+                    credito[s] += saturacion[s]
+                    capacidad = math.floor(credito[s])
+                    credito[s] -= capacidad
+                    servidos = 0
+                    while servidos < capacidad and cola and cola[0] <= t:
+                        esperas.append(t - cola.popleft())
+                        servidos += 1
+                else:
+                    credito[s] = 0.0
         
-        # Fix: Check for empty tiempos_espera list
-        if tiempos_espera:
-            tiempo_promedio = sum(tiempos_espera) / len(tiempos_espera)
-            congestión = sum([len(cola) for interseccion in self.intersecciones 
-                            for cola in interseccion.cola_vehiculos.values()])
+        tiempos_espera = EstadisticasEspera.desde_valores(esperas)
+        self.estadisticas_espera = tiempos_espera
+        
+        # Sin vehículos atendidos se usan valores por defecto
+        if tiempos_espera.conteo:
+            tiempo_promedio = tiempos_espera.media()
+            congestión = sum([len(cola) for cola in self.colas])
         else:
             tiempo_promedio = 30  # Default value if no data
             congestión = 100      # Default value indicating congestion
             
         return tiempo_promedio, congestión
 
+    def obtener_contexto_evaluacion(self):
+        """
+        Contexto de evaluación con búferes preasignados para esta red.
+        Se crea una sola vez y se reutiliza en todas las evaluaciones de fitness.
+        """
+        if self._contexto_evaluacion is None:
+            self._contexto_evaluacion = ContextoEvaluacion(self)
+        return self._contexto_evaluacion
+
+    def obtener_coordinacion(self):
+        """
+        Grafo de conexiones con los semáforos y tiempos de viaje de cada tramo
+        para medir la desincronización. Se construye una sola vez, después de
+        cargar las calles.
+        """
+        if self._coordinacion is None:
+            self._coordinacion = CoordinacionRed(self)
+        return self._coordinacion
+
+    def huella(self):
+        """Huella estable de la topología, coordenadas, semáforos y flujos de la red"""
+        h = hashlib.blake2b(digest_size=16)
+        for interseccion in self.intersecciones:
+            h.update(repr((
+                interseccion.id,
+                interseccion.nombre,
+                interseccion.coordenadas,
+                [conexion.id for conexion in interseccion.conexiones],
+                [(s.id, s.tiempo_verde, s.tiempo_amarillo, s.tiempo_rojo, s.desfase)
+                 for s in interseccion.semaforos]
+            )).encode('utf-8'))
+        h.update(repr(sorted(self.flujos_calles.items())).encode('utf-8'))
+        h.update(repr(sorted(self.calles.items())).encode('utf-8'))
+        return h.hexdigest()
+
     def agregar_flujo_calle(self, desde_id, hasta_id, flujo_mañana, flujo_tarde, flujo_noche):
         """Agrega información de flujo entre dos intersecciones"""
         self.flujos_calles[(desde_id, hasta_id)] = {
@@ -64,3 +201,75 @@ class RedVial:
             'noche': flujo_noche
         }
 
+    def agregar_calle(self, desde_id, hasta_id, longitud=None, velocidad_max=None, carriles=None,
+                      bidireccional=False):
+        """Agrega los atributos físicos de la calle entre dos intersecciones"""
+        self.calles[(desde_id, hasta_id)] = {
+            'longitud': longitud,
+            'velocidad_max': velocidad_max,
+            'carriles': carriles,
+            'bidireccional': bidireccional
+        }
+
+    def accesos(self):
+        """
+        Calles que llegan a cada intersección (las de doble sentido llegan a ambos
+        extremos). Retorna (destino, origen, clave) como arreglos de índices de
+        intersección ordenados por destino, con la clave de la calle en self.calles
+        """
+        destinos, origenes, claves = [], [], []
+        for clave, calle in self.calles.items():
+            desde, hasta = (self.indice_interseccion.get(i) for i in clave)
+            if desde is None or hasta is None:
+                continue
+            destinos.append(hasta)
+            origenes.append(desde)
+            claves.append(clave)
+            if calle['bidireccional']:
+                destinos.append(desde)
+                origenes.append(hasta)
+                claves.append(clave)
+        orden = np.argsort(np.array(destinos, dtype=np.int64), kind='stable')
+        return (np.array(destinos, dtype=np.int64)[orden], np.array(origenes, dtype=np.int64)[orden],
+                [claves[i] for i in orden])
+
+    def calcular_capacidades(self):
+        """
+        Precalcula el flujo de saturación (veh/s de verde) y el almacenamiento
+        (vehículos) de cada semáforo a partir de las calles que llegan a su
+        intersección. El semáforo j de una intersección con n accesos controla el
+        acceso j mod n; si varios semáforos comparten acceso, se reparten sus
+        carriles y su longitud por igual. Los semáforos de intersecciones sin
+        calles de llegada toman un carril a velocidad libre, como una calle sin
+        datos de carriles ni velocidad.
+        """
+        destino, _, claves = self.accesos()
+        carriles = np.array([self.calles[c]['carriles'] or 1 for c in claves], dtype=np.float64)
+        velocidad = np.array([self.calles[c]['velocidad_max'] or np.nan for c in claves], dtype=np.float64)
+        longitud = np.array([self.calles[c]['longitud'] or np.nan for c in claves], dtype=np.float64)
+
+        # Calles lentas descargan algo menos: 85 % a 20 km/h o menos, 100 % desde 50 km/h
+        factor_velocidad = np.where(np.isnan(velocidad), 1.0, np.interp(velocidad, [20, 50], [0.85, 1.0]))
+        saturacion_acceso = carriles * SATURACION_POR_CARRIL * factor_velocidad
+        almacenamiento_acceso = np.where(np.isnan(longitud), np.inf, longitud * carriles / LONGITUD_VEHICULO_M)
+
+        # Acceso de cada semáforo y cuántos semáforos lo comparten
+        num_intersecciones = len(self.intersecciones)
+        num_accesos = np.bincount(destino, minlength=num_intersecciones)
+        inicio_accesos = np.concatenate([[0], np.cumsum(num_accesos)])
+        k = self.interseccion_de_semaforo
+        local = np.arange(self.num_semaforos) - self.inicio_semaforos[k]
+        n = num_accesos[k]
+        con_acceso = n > 0
+        m = np.diff(self.inicio_semaforos)[k]
+        posicion = local[con_acceso] % n[con_acceso]
+        acceso = inicio_accesos[k[con_acceso]] + posicion
+        compartido = m[con_acceso] // n[con_acceso] + (posicion < m[con_acceso] % n[con_acceso])
+
+        self.saturacion = np.full(self.num_semaforos, SATURACION_POR_DEFECTO)
+        self.almacenamiento = np.full(self.num_semaforos, np.inf)
+        self.saturacion[con_acceso] = saturacion_acceso[acceso] / compartido
+        self.almacenamiento[con_acceso] = almacenamiento_acceso[acceso] / compartido
+        self._contexto_evaluacion = None  # El contexto copia las capacidades al crearse
+        self._coordinacion = None
+
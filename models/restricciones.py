@@ -0,0 +1,107 @@
+import numpy as np
+from models.individuo_ag import GENES_POR_SEMAFORO, GEN_VERDE, GEN_AMARILLO, GEN_ROJO, GEN_DESFASE
+
+# Agrupaciones de semáforos que comparten la duración de ciclo
+CORREDORES = ('ninguno', 'interseccion', 'calles')
+
+
+class RestriccionesSemaforos:
+    """
+    Restricciones de factibilidad de los planes semafóricos y reparación
+    vectorizada de la matriz de población.
+
+    La reparación deja cada genotipo en forma canónica: tiempos enteros dentro
+    de sus límites, ciclo dentro de [ciclo_min, ciclo_max] (común en cada
+    corredor) y desfase normalizado módulo el ciclo. Así dos planes
+    equivalentes producen exactamente los mismos genes y la misma huella.
+    """
+
+    def __init__(self, num_semaforos, verde_min=15, verde_max=90, amarillo_min=3, amarillo_max=5,
+                 rojo_min=10, rojo_max=90, ciclo_min=40, ciclo_max=180, corredores=None):
+        self.num_semaforos = num_semaforos
+        self.verde_min, self.verde_max = verde_min, verde_max
+        self.amarillo_min, self.amarillo_max = amarillo_min, amarillo_max
+        self.rojo_min, self.rojo_max = rojo_min, rojo_max
+        self.ciclo_min, self.ciclo_max = ciclo_min, ciclo_max
+
+        # Cada corredor es una lista de índices de semáforo (posición en el cromosoma)
+        # que deben compartir la misma duración de ciclo
+        self.corredores = [np.asarray(c, dtype=np.int64) for c in (corredores or []) if len(c) > 1]
+
+    def limites(self):
+        """Límites (inferior, superior) por gen para los operadores genéticos"""
+        inferior = np.array([self.verde_min, self.amarillo_min, self.rojo_min, 0])
+        superior = np.array([self.verde_max, self.amarillo_max, self.rojo_max, self.ciclo_max - 1])
+        return (np.tile(inferior, self.num_semaforos), np.tile(superior, self.num_semaforos))
+
+    def reparar(self, matriz):
+        """Repara y canoniza una matriz de población (individuos x genes)"""
+        matriz = np.atleast_2d(matriz)
+        genes = np.rint(matriz).astype(np.int64).reshape(len(matriz), -1, GENES_POR_SEMAFORO)
+        verde = np.clip(genes[..., GEN_VERDE], self.verde_min, self.verde_max)
+        amarillo = np.clip(genes[..., GEN_AMARILLO], self.amarillo_min, self.amarillo_max)
+        rojo = np.clip(genes[..., GEN_ROJO], self.rojo_min, self.rojo_max)
+
+        # Ciclo objetivo: el propio acotado, o el común del corredor
+        ciclo = np.clip(verde + amarillo + rojo, self.ciclo_min, self.ciclo_max)
+        for corredor in self.corredores:
+            ciclo_comun = np.rint(np.median(ciclo[:, corredor], axis=1)).astype(np.int64)
+            ciclo[:, corredor] = ciclo_comun[:, None]
+
+        verde, rojo = self._ajustar_a_ciclo(verde, amarillo, rojo, ciclo)
+
+        genes[..., GEN_VERDE] = verde
+        genes[..., GEN_AMARILLO] = amarillo
+        genes[..., GEN_ROJO] = rojo
+        genes[..., GEN_DESFASE] = np.mod(genes[..., GEN_DESFASE], verde + amarillo + rojo)
+        return genes.reshape(len(matriz), -1)
+
+    def _ajustar_a_ciclo(self, verde, amarillo, rojo, ciclo):
+        """Absorbe la diferencia con el ciclo objetivo primero en el rojo y luego en el verde"""
+        rojo = np.clip(ciclo - verde - amarillo, self.rojo_min, self.rojo_max)
+        verde = np.clip(ciclo - amarillo - rojo, self.verde_min, self.verde_max)
+        return verde, rojo
+
+    @classmethod
+    def corredores_red(cls, red_vial, agrupacion):
+        """Corredores de la red según la agrupación ('ninguno', 'interseccion' o 'calles')"""
+        if agrupacion == 'ninguno':
+            return []
+        if agrupacion == 'interseccion':
+            return cls.corredores_por_interseccion(red_vial)
+        if agrupacion == 'calles':
+            return cls.corredores_por_calles(red_vial)
+        raise ValueError(f"Agrupación de corredores desconocida '{agrupacion}'. Opciones: {', '.join(CORREDORES)}")
+
+    @staticmethod
+    def corredores_por_interseccion(red_vial):
+        """Un corredor por intersección: sus semáforos comparten el ciclo"""
+        inicio = red_vial.inicio_semaforos.tolist()
+        return [list(range(inicio[k], inicio[k + 1])) for k in range(len(red_vial.intersecciones))]
+
+    @staticmethod
+    def corredores_por_calles(red_vial):
+        """
+        Un corredor por componente conexa del grafo de calles (flujos_calles):
+        todos los semáforos de intersecciones encadenadas comparten el ciclo
+        """
+        posicion = {interseccion.id: [s.indice for s in interseccion.semaforos]
+                    for interseccion in red_vial.intersecciones}
+
+        # Unión-búsqueda sobre los IDs de intersección
+        padre = {id_: id_ for id_ in posicion}
+
+        def raiz(x):
+            while padre[x] != x:
+                padre[x] = padre[padre[x]]
+                x = padre[x]
+            return x
+
+        for desde_id, hasta_id in red_vial.flujos_calles:
+            if desde_id in padre and hasta_id in padre:
+                padre[raiz(desde_id)] = raiz(hasta_id)
+
+        grupos = {}
+        for id_, semaforos in posicion.items():
+            grupos.setdefault(raiz(id_), []).extend(semaforos)
+        return [grupo for grupo in grupos.values() if len(grupo) > 1]
@@ -6,6 +6,7 @@ class Semaforo:
         self.tiempo_rojo = tiempo_rojo
         self.desfase = desfase
         self.ciclo_total = tiempo_verde + tiempo_amarillo + tiempo_rojo
+        self.indice = None  # Índice global denso en la red (lo asigna RedVial)
     
     def get_estado(self, tiempo_simulacion):
         # Calcula el estado del semáforo (verde, amarillo, rojo) en un tiempo dado
@@ -0,0 +1,148 @@
+import json
+import numpy as np
+from models.codificacion import (CodificacionFases, GEN_CICLO, GEN_DESFASE_INTERSECCION, GEN_PRIMER_REPARTO,
+                                 REPARTO_MIN, REPARTO_MAX)
+from models.individuo_ag import GENES_POR_SEMAFORO
+
+# Estrategias para sembrar la población inicial del AG
+SIEMBRAS = ('webster', 'onda_verde', 'actual')
+
+PERDIDA_ARRANQUE = 2     # Segundos perdidos al arrancar cada fase (Webster)
+SATURACION_MAXIMA = 0.95  # Con Y mayor la fórmula de Webster diverge: se usa el ciclo máximo
+
+
+def genotipo_webster(codificacion, saturacion, demanda, ciclo_comun=False):
+    """
+    Ciclo y repartos de Webster de cada intersección, en la codificación por
+    fases (una fase por semáforo, ver models/codificacion.py).
+
+    Con y = demanda / saturación de cada fase, Y = suma de y y L = ámbar más
+    PERDIDA_ARRANQUE por fase, el ciclo es (1.5·L + 5) / (1 - Y), acotado a
+    los límites de la codificación, y los repartos son proporcionales a y.
+    La fase de la calle transversal sin semáforo toma el y medio de la
+    intersección. Con ciclo_comun=True todas las intersecciones usan el
+    mayor de los ciclos (necesario para una onda verde).
+    """
+    c = codificacion
+    y_semaforo = np.broadcast_to(np.asarray(demanda, dtype=np.float64), saturacion.shape) / saturacion
+    y = np.zeros((c.num_intersecciones, c.max_fases))
+    y[c.interseccion_de_semaforo, c.fase_de_semaforo] = y_semaforo
+    num_con_semaforo = c.fase_con_semaforo.sum(axis=1)
+    y_medio = y.sum(axis=1) / np.maximum(num_con_semaforo, 1)
+    y = np.where(c.fase_activa & ~c.fase_con_semaforo, y_medio[:, None], y)
+
+    flujo_critico = y.sum(axis=1)
+    perdido = c.tiempo_perdido + PERDIDA_ARRANQUE * c.num_fases
+    with np.errstate(divide='ignore'):
+        ciclo = np.where(flujo_critico < SATURACION_MAXIMA,
+                         (1.5 * perdido + 5) / (1 - np.minimum(flujo_critico, SATURACION_MAXIMA)),
+                         c.restricciones.ciclo_max)
+    ciclo = np.clip(np.rint(ciclo), c.ciclo_min, c.restricciones.ciclo_max)
+    if ciclo_comun and len(ciclo):
+        ciclo[:] = ciclo.max()
+
+    genotipo = np.zeros((c.num_intersecciones, c.tamaño_bloque), dtype=np.int64)
+    genotipo[:, GEN_CICLO] = ciclo
+    escala = REPARTO_MAX / np.maximum(y.max(axis=1, keepdims=True), 1e-12)
+    genotipo[:, GEN_PRIMER_REPARTO:] = np.clip(np.rint(y * escala), REPARTO_MIN, REPARTO_MAX)
+    return codificacion.reparar(genotipo.reshape(1, -1))[0]
+
+
+def inicios_onda_verde(coordinacion, inicio_fase, num_intersecciones):
+    """
+    Inicio de cada intersección (segundo en que arranca su primera fase) para
+    una onda verde: recorrido en anchura del grafo de conexiones por niveles
+    (vectorizado) desde la primera intersección de cada componente, en el que
+    el verde del receptor de cada tramo empieza un tiempo de viaje después del
+    verde del despachador. `inicio_fase` es, por semáforo, el segundo en que
+    empieza su fase dentro del ciclo de su intersección.
+    """
+    co = coordinacion
+    inicio = np.full(num_intersecciones, np.nan)
+    for raiz in range(num_intersecciones):
+        if not np.isnan(inicio[raiz]):
+            continue
+        inicio[raiz] = 0.0
+        frente = np.array([raiz])
+        while len(frente):
+            # Todas las conexiones que salen del frente (rangos CSR concatenados)
+            cantidad = co.inicio[frente + 1] - co.inicio[frente]
+            desplazamiento = np.arange(cantidad.sum()) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+            tramos = np.repeat(co.inicio[frente], cantidad) + desplazamiento
+            tramos = tramos[np.isnan(inicio[co.destino[tramos]])]
+            # Cada intersección nueva se fija por el primer tramo que la alcanza
+            frente, primero = np.unique(co.destino[tramos], return_index=True)
+            tramos = tramos[primero]
+            inicio[frente] = (inicio[co.origen[tramos]] + inicio_fase[co.semaforo_origen[tramos]]
+                              + co.tiempo_viaje[tramos] - inicio_fase[co.semaforo_destino[tramos]])
+    return inicio
+
+
+def genotipo_onda_verde(codificacion, coordinacion, saturacion, demanda):
+    """Webster con ciclo común y desfases de onda verde, en la codificación por fases"""
+    c = codificacion
+    genotipo = genotipo_webster(c, saturacion, demanda, ciclo_comun=True)
+    verde, ciclo = c.verdes(genotipo)
+    duracion_fase = verde[0] + c.amarillo
+    inicio_fase = (np.cumsum(duracion_fase, axis=-1) - duracion_fase)[c.interseccion_de_semaforo, c.fase_de_semaforo]
+    inicio = inicios_onda_verde(coordinacion, inicio_fase, c.num_intersecciones)
+    bloques = genotipo.reshape(c.num_intersecciones, c.tamaño_bloque)
+    bloques[:, GEN_DESFASE_INTERSECCION] = np.mod(np.rint(inicio), ciclo[0])
+    return c.reparar(bloques.reshape(1, -1))[0]
+
+
+def planes_previos(fuente, num_semaforos):
+    """
+    Planes por semáforo de ejecuciones anteriores. `fuente` puede ser una lista
+    de individuos, planes o matrices de genes, o el archivo JSON Lines de
+    main_lotes.py (sus 'mejor_genes', del mejor fitness al peor). Se descartan
+    los planes que no tienen el número de semáforos de la red.
+    """
+    if isinstance(fuente, str):
+        with open(fuente, 'r', encoding='utf-8') as f:
+            resultados = []
+            for linea in f:
+                try:
+                    resultado = json.loads(linea)
+                except ValueError:
+                    continue
+                if 'mejor_genes' in resultado:
+                    resultados.append(resultado)
+        resultados.sort(key=lambda r: r.get('mejor_fitness', 0), reverse=True)
+        fuente = [r['mejor_genes'] for r in resultados]
+
+    planes = []
+    for solucion in fuente:
+        genes = np.asarray(getattr(solucion, 'genes', solucion), dtype=np.int64).ravel()
+        if len(genes) == num_semaforos * GENES_POR_SEMAFORO:
+            planes.append(genes)
+    return planes
+
+
+def planes_semilla(red_vial, restricciones, estrategias=SIEMBRAS, demanda=0.2, soluciones_previas=None):
+    """
+    Planes por semáforo (matriz planes x semáforos·4) de las estrategias de
+    siembra indicadas, más las soluciones previas:
+    - 'webster': ciclo y repartos de Webster por intersección, fases sucesivas
+    - 'onda_verde': Webster con ciclo común y desfases de onda verde
+    - 'actual': el plan con el que se cargó la red (tiempo_*_inicial)
+    `demanda` es la tasa de llegada por cola en veh/s (escalar o por semáforo).
+    """
+    planes = []
+    desconocidas = set(estrategias) - set(SIEMBRAS)
+    if desconocidas:
+        raise ValueError(f"Siembra desconocida {sorted(desconocidas)}. Opciones: {', '.join(SIEMBRAS)}")
+    if 'webster' in estrategias or 'onda_verde' in estrategias:
+        fases = CodificacionFases(red_vial, restricciones)
+        if 'webster' in estrategias:
+            planes.append(fases.decodificar(genotipo_webster(fases, red_vial.saturacion, demanda))[0])
+        if 'onda_verde' in estrategias:
+            genotipo = genotipo_onda_verde(fases, red_vial.obtener_coordinacion(), red_vial.saturacion, demanda)
+            planes.append(fases.decodificar(genotipo)[0])
+    if 'actual' in estrategias:
+        planes.append(red_vial.plan_actual().ravel())
+    if soluciones_previas is not None:
+        planes.extend(planes_previos(soluciones_previas, red_vial.num_semaforos))
+    if not planes:
+        return np.empty((0, red_vial.num_semaforos * GENES_POR_SEMAFORO), dtype=np.int64)
+    return np.vstack(planes)
@@ -0,0 +1,135 @@
+"""
+Almacén persistente de evaluaciones del algoritmo genético.
+
+Guarda en una base SQLite el fitness y los objetivos de cada plan evaluado,
+con la clave (huella de la red, huella de los parámetros de simulación,
+huella del cromosoma), para que ejecuciones posteriores sobre la misma red y
+con los mismos parámetros no vuelvan a simular esos planes. La base usa el
+modo WAL, de modo que varios procesos pueden leer mientras otro escribe; las
+escrituras se agrupan en lotes dentro de una sola transacción.
+
+Uso:
+    with AlmacenEvaluaciones('evaluaciones.sqlite') as almacen:
+        ag = AlgoritmoGenetico(..., almacen=almacen)
+        ag.ejecutar()
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+# Se incrementa con cada cambio del simulador o del fitness que altera el resultado
+# de un mismo plan, para no reutilizar evaluaciones de otra versión:
+#   1: versión inicial del almacén
+#   2: accesos sin datos de calle con la saturación de un carril
+VERSION_SIMULADOR = 2
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS evaluaciones (
+    red TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    cromosoma TEXT NOT NULL,
+    fitness REAL NOT NULL,
+    objetivos TEXT NOT NULL,
+    creado REAL NOT NULL,
+    PRIMARY KEY (red, parametros, cromosoma)
+) WITHOUT ROWID
+"""
+
+_MAX_VARIABLES = 500  # Huellas por consulta IN (...), por debajo del límite de SQLite
+
+
+def huella_parametros(**parametros):
+    """Huella estable de los parámetros de simulación (y de la versión del simulador)"""
+    datos = json.dumps(dict(parametros, version=VERSION_SIMULADOR), sort_keys=True)
+    return hashlib.blake2b(datos.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class AlmacenEvaluaciones:
+    """Evaluaciones persistentes por (red, parámetros, cromosoma) en SQLite"""
+
+    def __init__(self, archivo='evaluaciones.sqlite', tamaño_lote=256, espera_bloqueo=30.0):
+        self.archivo = archivo
+        self.tamaño_lote = tamaño_lote
+        self.espera_bloqueo = espera_bloqueo
+        self._pendientes = []
+        self._conexion = None
+        self.aciertos = 0
+        self.consultas = 0
+
+    def __getstate__(self):
+        # Cada proceso abre su propia conexión; los pendientes no se copian
+        estado = self.__dict__.copy()
+        estado['_conexion'] = None
+        estado['_pendientes'] = []
+        return estado
+
+    @property
+    def conexion(self):
+        """Conexión abierta bajo demanda (una por proceso)"""
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.archivo, timeout=self.espera_bloqueo)
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute('PRAGMA synchronous=NORMAL')
+            self._conexion.execute(_ESQUEMA)
+            self._conexion.commit()
+        return self._conexion
+
+    def claves(self, red_vial, **parametros):
+        """(huella de la red, huella de los parámetros de simulación) para buscar y agregar"""
+        return red_vial.huella(), huella_parametros(**parametros)
+
+    def buscar(self, red, parametros, huellas):
+        """Diccionario huella -> (fitness, objetivos) de las huellas ya almacenadas"""
+        huellas = list(dict.fromkeys(huellas))
+        encontradas = {}
+        for pendiente in self._pendientes:
+            if pendiente[0] == red and pendiente[1] == parametros:
+                encontradas[pendiente[2]] = (pendiente[3], json.loads(pendiente[4]))
+        faltantes = [h for h in huellas if h not in encontradas]
+        for inicio in range(0, len(faltantes), _MAX_VARIABLES):
+            lote = faltantes[inicio:inicio + _MAX_VARIABLES]
+            filas = self.conexion.execute(
+                f"SELECT cromosoma, fitness, objetivos FROM evaluaciones "
+                f"WHERE red = ? AND parametros = ? AND cromosoma IN ({','.join('?' * len(lote))})",
+                [red, parametros, *lote])
+            for cromosoma, fitness, objetivos in filas:
+                encontradas[cromosoma] = (fitness, json.loads(objetivos))
+        resultado = {h: encontradas[h] for h in huellas if h in encontradas}
+        self.consultas += len(huellas)
+        self.aciertos += len(resultado)
+        return resultado
+
+    def agregar(self, red, parametros, huella, fitness, objetivos):
+        """Agrega una evaluación al lote pendiente; se escribe al llenarse el lote"""
+        objetivos = json.dumps([float(x) for x in objetivos]) if objetivos is not None else 'null'
+        self._pendientes.append((red, parametros, huella, float(fitness), objetivos, time.time()))
+        if len(self._pendientes) >= self.tamaño_lote:
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe las evaluaciones pendientes en una sola transacción"""
+        if not self._pendientes:
+            return
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR IGNORE INTO evaluaciones (red, parametros, cromosoma, fitness, objetivos, creado) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self._pendientes)
+        self._pendientes = []
+
+    def cerrar(self):
+        """Escribe lo pendiente y cierra la conexión"""
+        self.vaciar()
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def __len__(self):
+        self.vaciar()
+        return self.conexion.execute("SELECT COUNT(*) FROM evaluaciones").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
@@ -0,0 +1,76 @@
+import json
+from models.interseccion import Interseccion
+from models.red_vial import RedVial
+from models.semaforo import Semaforo
+
+
+def cargar_red_vial(archivo_json):
+    """Carga la red vial desde un archivo JSON"""
+    with open(archivo_json, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    return red_desde_datos(datos)
+
+
+def red_desde_datos(datos):
+    """Construye la red vial a partir del diccionario con 'intersecciones' y 'calles'"""
+    # Crear diccionario de intersecciones para referenciar
+    intersecciones_dict = {}
+    
+    # Primero crear todas las intersecciones con sus semáforos
+    for interseccion_data in datos['intersecciones']:
+        semaforos = []
+        for semaforo_data in interseccion_data['semaforos']:
+            semaforo = Semaforo(
+                id=semaforo_data['id'],
+                tiempo_verde=semaforo_data['tiempo_verde_inicial'],
+                tiempo_amarillo=semaforo_data['tiempo_amarillo_inicial'],
+                tiempo_rojo=semaforo_data['tiempo_rojo_inicial'],
+                desfase=0  # Inicialmente sin desfase
+            )
+            semaforos.append(semaforo)
+
+        # Incluir coordenadas si están disponibles
+        coordenadas = interseccion_data.get('coordenadas', None)
+        
+        interseccion = Interseccion(
+            id=interseccion_data['id'],
+            semaforos=semaforos,
+            nombre=interseccion_data.get('nombre', ''),
+            coordenadas=coordenadas
+        )
+        intersecciones_dict[interseccion.id] = interseccion
+
+            # Luego establecer las conexiones entre intersecciones
+    for interseccion_data in datos['intersecciones']:
+        interseccion = intersecciones_dict[interseccion_data['id']]
+        for conexion_id in interseccion_data['conexiones']:
+            if conexion_id in intersecciones_dict:
+                interseccion.conexiones.append(intersecciones_dict[conexion_id])
+    
+    # Crear la red vial
+    red = RedVial(list(intersecciones_dict.values()))
+    
+    # Configurar las calles y flujos de tráfico
+    for calle_data in datos['calles']:
+        desde = intersecciones_dict[calle_data['desde_interseccion']]
+        hasta = intersecciones_dict[calle_data['hasta_interseccion']]
+        red.agregar_flujo_calle(
+            desde.id, 
+            hasta.id, 
+            calle_data['flujo_promedio']['mañana'],
+            calle_data['flujo_promedio']['tarde'],
+            calle_data['flujo_promedio']['noche']
+        )
+        red.agregar_calle(
+            desde.id,
+            hasta.id,
+            longitud=calle_data.get('longitud'),
+            velocidad_max=calle_data.get('velocidad_max'),
+            carriles=calle_data.get('carriles'),
+            bidireccional=calle_data.get('bidireccional', False)
+        )
+    
+    # Capacidad de cada acceso a partir de carriles, velocidad y longitud de las calles
+    red.calcular_capacidades()
+    
+    return red
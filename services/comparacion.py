@@ -0,0 +1,181 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from models.curvas import totales_red
+from models.estadisticas import EstadisticasEspera
+
+# Métricas de las curvas acumuladas que se promedian entre réplicas
+METRICAS_CURVAS = ('demora_total', 'demora_por_vehiculo', 'cola_promedio', 'cola_maxima',
+                   'segundos_desborde', 'rendimiento_hora', 'utilizacion_verde')
+
+# Estado de cada proceso trabajador: contexto de evaluación y matriz de planes
+_contexto_trabajador = None
+_planes_trabajador = None
+
+
+def _inicializar_trabajador(contexto, planes):
+    global _contexto_trabajador, _planes_trabajador
+    _contexto_trabajador = contexto
+    _planes_trabajador = planes
+
+
+def _simular_replicas(semillas, tasa_llegada, duracion):
+    """
+    Simula todas las réplicas indicadas para todos los planes.
+    Cada réplica genera sus llegadas una sola vez y las comparte entre planes
+    (números aleatorios comunes), de modo que las diferencias son pareadas.
+    Retorna las métricas por plan y réplica, las métricas de las curvas
+    acumuladas por plan y réplica y, por plan, las estadísticas de espera de
+    todas sus réplicas combinadas.
+    """
+    contexto, planes = _contexto_trabajador, _planes_trabajador
+    resultados = np.empty((len(planes), len(semillas), 2))
+    curvas = np.empty((len(planes), len(semillas), len(METRICAS_CURVAS)))
+    estadisticas = [EstadisticasEspera() for _ in planes]
+    for r, semilla in enumerate(semillas):
+        contexto.generar_llegadas(tasa_llegada, duracion, np.random.default_rng(semilla))
+        for p, genes in enumerate(planes):
+            contexto.cargar_plan(genes)
+            contexto.reiniciar_colas()
+            resultados[p, r] = contexto.simular(duracion)
+            totales = totales_red(contexto.metricas_curvas())
+            curvas[p, r] = [totales[clave] for clave in METRICAS_CURVAS]
+            estadisticas[p].combinar(contexto.estadisticas_espera)
+    return resultados, curvas, estadisticas
+
+
+# Hasta estos grados de libertad el cuantil se obtiene invirtiendo la distribución
+# exacta; por encima la expansión de Cornish-Fisher ya es precisa
+MAX_GRADOS_EXACTOS = 100
+
+
+def probabilidad_t(t, grados_libertad):
+    """P(|T| < t) de la t de Student con grados de libertad enteros (forma cerrada)"""
+    v = int(grados_libertad)
+    theta = math.atan(t / math.sqrt(v))
+    coseno2 = math.cos(theta) ** 2
+    impar = v % 2
+    inicio = 2 if impar else 1
+    suma, termino = 0.0, 1.0
+    for i in range((v - 1) // 2 if impar else v // 2):
+        suma += termino
+        termino *= coseno2 * (inicio + 2 * i) / (inicio + 2 * i + 1)
+    if impar:
+        return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * suma)
+    return math.sin(theta) * suma
+
+
+def cuantil_t(probabilidad, grados_libertad):
+    """
+    Cuantil de la t de Student. Con pocos grados de libertad se invierte por
+    bisección la distribución exacta; con muchos se usa la expansión de
+    Cornish-Fisher sobre la normal.
+    """
+    z = NormalDist().inv_cdf(probabilidad)
+    if grados_libertad <= 0 or math.isinf(grados_libertad):
+        return z
+    v = grados_libertad
+    if v <= MAX_GRADOS_EXACTOS and v == int(v) and probabilidad != 0.5:
+        objetivo = abs(2 * probabilidad - 1)
+        bajo, alto = 0.0, max(1.0, 2 * abs(z))
+        while probabilidad_t(alto, v) < objetivo:
+            alto *= 2
+        for _ in range(100):
+            medio = (bajo + alto) / 2
+            if probabilidad_t(medio, v) < objetivo:
+                bajo = medio
+            else:
+                alto = medio
+        return math.copysign((bajo + alto) / 2, z)
+    return (z
+            + (z ** 3 + z) / (4 * v)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3))
+
+
+def intervalo_confianza(muestras, nivel=0.95):
+    """Media y semiancho del intervalo de confianza t de una muestra"""
+    muestras = np.asarray(muestras, dtype=float)
+    n = len(muestras)
+    media = float(muestras.mean()) if n else float('nan')
+    if n < 2:
+        return media, float('nan')
+    error_estandar = muestras.std(ddof=1) / math.sqrt(n)
+    return media, float(cuantil_t(0.5 + nivel / 2, n - 1) * error_estandar)
+
+
+def comparar_planes(contexto, planes, replicas=30, tasa_llegada=0.4, duracion=3600,
+                    semilla=0, procesos=None, nivel=0.95):
+    """
+    Evalúa la referencia (planes[0]) y los planes candidatos en réplicas con
+    semillas compartidas, repartiendo las réplicas entre procesos.
+
+    Parámetros:
+    - contexto: ContextoEvaluacion de la red
+    - planes: lista de matrices de genes (semáforos x 4); la primera es la referencia
+    - replicas: número de réplicas por plan
+    - semilla: semilla base; la réplica r usa la semilla (semilla, r) en todos los planes
+    - procesos: número de procesos (None = todos los núcleos, 1 = en serie)
+    - nivel: nivel de confianza de los intervalos
+
+    Retorna una lista de diccionarios, uno por plan, con la media y el semiancho
+    del intervalo de tiempo de espera y congestión, el resumen de las esperas
+    de todos los vehículos de todas las réplicas (p50, p95, p99...), el promedio
+    de las métricas de las curvas acumuladas (demora total, cola promedio y
+    máxima, rendimiento, utilización del verde) y, para los
+    candidatos, la mejora porcentual respecto a la referencia con su intervalo pareado.
+    """
+    planes = np.stack([np.asarray(p, dtype=np.int64) for p in planes])
+    semillas = [(semilla, r) for r in range(replicas)]
+
+    if procesos == 1 or replicas < 2:
+        _inicializar_trabajador(contexto, planes)
+        muestras, curvas, estadisticas = _simular_replicas(semillas, tasa_llegada, duracion)
+    else:
+        procesos = min(procesos or os.cpu_count() or 1, replicas)
+        lotes = [semillas[i::procesos] for i in range(procesos)]
+        with ProcessPoolExecutor(max_workers=len(lotes), initializer=_inicializar_trabajador,
+                                 initargs=(contexto, planes)) as pool:
+            partes = list(pool.map(_simular_replicas, lotes,
+                                   [tasa_llegada] * len(lotes), [duracion] * len(lotes)))
+        # Reordenar las réplicas en el orden de las semillas
+        # y combinar las estadísticas de espera de todos los procesos
+        muestras = np.empty((len(planes), replicas, 2))
+        curvas = np.empty((len(planes), replicas, len(METRICAS_CURVAS)))
+        estadisticas = [EstadisticasEspera() for _ in planes]
+        for i, (parte, curvas_parte, estadisticas_parte) in enumerate(partes):
+            muestras[:, i::procesos] = parte
+            curvas[:, i::procesos] = curvas_parte
+            for total, estadistica in zip(estadisticas, estadisticas_parte):
+                total.combinar(estadistica)
+
+    # Mismo piso que simular_y_obtener_metricas para evitar divisiones por cero
+    muestras = np.maximum(muestras, 0.01)
+    referencia = muestras[0]
+
+    resultados = []
+    for p in range(len(planes)):
+        tiempo, ic_tiempo = intervalo_confianza(muestras[p, :, 0], nivel)
+        congestion, ic_congestion = intervalo_confianza(muestras[p, :, 1], nivel)
+        resultado = {
+            'tiempo_espera': tiempo, 'ic_tiempo_espera': ic_tiempo,
+            'congestion': congestion, 'ic_congestion': ic_congestion,
+            'replicas': replicas,
+            'espera': estadisticas[p].resumen(),
+            'curvas': dict(zip(METRICAS_CURVAS, curvas[p].mean(axis=0).tolist())),
+        }
+        if p > 0:
+            # Mejora porcentual pareada réplica a réplica (misma semilla)
+            for clave, columna in (('tiempo_espera', 0), ('congestion', 1)):
+                mejora = 100 * (referencia[:, columna] - muestras[p, :, columna]) / referencia[:, columna]
+                media, semiancho = intervalo_confianza(mejora, nivel)
+                resultado[f'mejora_{clave}'] = media
+                resultado[f'ic_mejora_{clave}'] = semiancho
+                # Significativa si el intervalo no contiene el cero
+                resultado[f'mejora_{clave}_significativa'] = bool(abs(media) > semiancho)
+        resultados.append(resultado)
+    return resultados
@@ -0,0 +1,231 @@
+"""
+Generador de redes viales sintéticas sin conexión a OSM.
+
+Produce redes en cuadrícula, radiales o planas aleatorias de cualquier tamaño
+con coordenadas, semáforos, conexiones y calles con flujos, en el mismo
+esquema JSON que lee cargar_red_vial. Todo se calcula con arreglos de NumPy,
+de modo que una red de 100 000 intersecciones se genera en segundos.
+
+Uso:
+    python -m services.generador_redes 2000 --tipo radial --salida red_2000.json
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+TIPOS_RED = ('cuadricula', 'radial', 'aleatoria')
+DIRECCIONES = ('Norte-Sur', 'Este-Oeste', 'Sur-Norte', 'Oeste-Este')
+CENTRO_TUXTLA = (16.7602, -93.1193)
+METROS_POR_GRADO = 111320.0
+
+
+def _cuadricula(num, separacion, rng):
+    """Posiciones (x, y) en metros y aristas de una cuadrícula regular"""
+    lado = math.ceil(math.sqrt(num))
+    indices = np.arange(num)
+    fila, columna = np.divmod(indices, lado)
+    posiciones = np.column_stack([columna, fila]).astype(float) * separacion
+
+    derecha = indices[(columna + 1 < lado) & (indices + 1 < num)]
+    abajo = indices[indices + lado < num]
+    aristas = np.concatenate([np.column_stack([derecha, derecha + 1]),
+                              np.column_stack([abajo, abajo + lado])])
+    return posiciones, aristas
+
+
+def _radial(num, separacion, rng):
+    """
+    Anillos concéntricos separados `separacion` metros alrededor de una
+    intersección central; el anillo r tiene unas 2·pi·r intersecciones y cada
+    una se une con sus vecinas del anillo y con la más cercana del anillo interior
+    """
+    # Tamaño de cada anillo y anillo/posición de cada intersección (la 0 es el centro)
+    tamaños = np.maximum(4, np.rint(2 * np.pi * np.arange(1, num + 1))).astype(np.int64)
+    fin_anillo = np.cumsum(tamaños)
+    tamaños = tamaños[:np.searchsorted(fin_anillo, num - 1) + 1]
+    inicio_anillo = np.concatenate([[1], 1 + fin_anillo[:len(tamaños) - 1]])
+    indices = np.arange(1, num)
+    anillo = np.searchsorted(fin_anillo, indices - 1, side='right')
+    posicion = indices - inicio_anillo[anillo]
+    tamaño = tamaños[anillo]
+
+    angulo = 2 * np.pi * posicion / tamaño
+    distancia = (anillo + 1) * separacion
+    posiciones = np.zeros((num, 2))
+    posiciones[1:] = np.column_stack([distancia * np.cos(angulo), distancia * np.sin(angulo)])
+
+    # Tramo al siguiente del anillo (cerrando el anillo solo si está completo)
+    ultima = posicion + 1 == tamaño
+    siguiente = np.where(ultima, indices + 1 - tamaño, indices + 1)
+    en_anillo = np.where(ultima, inicio_anillo[anillo] + tamaño - 1 < num, siguiente < num)
+
+    # Tramo hacia la intersección del anillo interior con el ángulo más parecido
+    interior = np.zeros_like(indices)
+    previo = anillo > 0
+    tamaño_previo = tamaños[anillo[previo] - 1]
+    interior[previo] = (inicio_anillo[anillo[previo] - 1]
+                        + np.rint(posicion[previo] / tamaño[previo] * tamaño_previo).astype(np.int64) % tamaño_previo)
+
+    aristas = np.concatenate([
+        np.column_stack([indices[en_anillo], siguiente[en_anillo]]),
+        np.column_stack([interior, indices]),
+    ])
+    return posiciones, aristas
+
+
+def _aleatoria(num, separacion, rng, prob_tramo=0.85, prob_diagonal=0.3):
+    """
+    Red plana aleatoria: cuadrícula con posiciones perturbadas, tramos eliminados
+    al azar y como mucho una diagonal por manzana (así ninguna calle se cruza)
+    """
+    posiciones, aristas = _cuadricula(num, separacion, rng)
+    posiciones += rng.uniform(-0.35, 0.35, posiciones.shape) * separacion
+    aristas = aristas[rng.random(len(aristas)) < prob_tramo]
+
+    lado = math.ceil(math.sqrt(num))
+    esquina = np.arange(num)
+    esquina = esquina[(esquina % lado + 1 < lado) & (esquina + lado + 1 < num)]
+    esquina = esquina[rng.random(len(esquina)) < prob_diagonal]
+    descendente = rng.random(len(esquina)) < 0.5
+    diagonales = np.where(descendente[:, None],
+                          np.column_stack([esquina, esquina + lado + 1]),
+                          np.column_stack([esquina + 1, esquina + lado]))
+    return posiciones, np.concatenate([aristas, diagonales])
+
+
+GENERADORES = {'cuadricula': _cuadricula, 'radial': _radial, 'aleatoria': _aleatoria}
+
+
+def generar_red(num_intersecciones, tipo='cuadricula', semilla=None, separacion=150.0,
+                centro=CENTRO_TUXTLA, semaforos_por_interseccion=None, prob_bidireccional=0.8):
+    """
+    Genera una red sintética en el esquema JSON de cargar_red_vial.
+
+    Parámetros:
+    - num_intersecciones: número de intersecciones
+    - tipo: 'cuadricula', 'radial' o 'aleatoria' (plana aleatoria)
+    - semilla: semilla del generador aleatorio
+    - separacion: distancia típica entre intersecciones vecinas, en metros
+    - centro: (lat, lng) del centro de la red
+    - semaforos_por_interseccion: fijo (1 a 4) o None para uno por calle que llega (máximo 4)
+    - prob_bidireccional: proporción de calles de doble sentido
+
+    Retorna un diccionario con 'intersecciones' y 'calles'.
+    """
+    if tipo not in GENERADORES:
+        raise ValueError(f"Tipo de red desconocido '{tipo}'. Opciones: {', '.join(TIPOS_RED)}")
+    rng = np.random.default_rng(semilla)
+    num = int(num_intersecciones)
+    posiciones, aristas = GENERADORES[tipo](num, separacion, rng)
+    num_calles = len(aristas)
+    desde, hasta = aristas[:, 0], aristas[:, 1]
+
+    # Coordenadas geográficas alrededor del centro
+    lat0, lng0 = centro
+    lat = lat0 + (posiciones[:, 1] - posiciones[:, 1].mean()) / METROS_POR_GRADO
+    lng = lng0 + (posiciones[:, 0] - posiciones[:, 0].mean()) / (METROS_POR_GRADO * math.cos(math.radians(lat0)))
+
+    # Atributos de las calles; las más cercanas al centro llevan más tráfico
+    longitud = np.maximum(np.rint(np.linalg.norm(posiciones[desde] - posiciones[hasta], axis=1)), 1)
+    radio_red = np.linalg.norm(posiciones - posiciones.mean(axis=0), axis=1)
+    cercania = 1 - radio_red / max(radio_red.max(), 1.0)
+    demanda = 0.5 * (cercania[desde] + cercania[hasta])
+    arterial = rng.random(num_calles) < 0.15 + 0.35 * demanda
+    carriles = np.where(arterial, rng.integers(2, 4, num_calles), rng.integers(1, 3, num_calles))
+    velocidad = np.where(arterial, rng.choice([50, 60], num_calles), rng.choice([30, 40], num_calles))
+    bidireccional = rng.random(num_calles) < prob_bidireccional
+    base = (100 + 300 * demanda) * carriles * rng.uniform(0.7, 1.3, num_calles)
+    flujos = np.rint(base[:, None] * np.array([1.0, 0.8, 0.3])).astype(np.int64)
+
+    # Conexiones: hacia el destino siempre y de regreso solo en doble sentido
+    origen_conexion = np.concatenate([desde, hasta[bidireccional]])
+    destino_conexion = np.concatenate([hasta, desde[bidireccional]])
+    orden = np.argsort(origen_conexion, kind='stable')
+    cortes = np.searchsorted(origen_conexion[orden], np.arange(1, num))
+    conexiones = np.split(destino_conexion[orden] + 1, cortes)
+
+    # Semáforos: uno por calle que llega a la intersección (1 a 4) o un número fijo
+    if semaforos_por_interseccion is None:
+        grado = np.bincount(aristas.ravel(), minlength=num)
+        num_semaforos = np.clip(grado, 1, 4)
+    else:
+        num_semaforos = np.full(num, int(semaforos_por_interseccion))
+    total_semaforos = int(num_semaforos.sum())
+    verde = rng.integers(20, 61, total_semaforos)
+    amarillo = rng.integers(3, 6, total_semaforos)
+    rojo = rng.integers(20, 61, total_semaforos)
+    inicio = np.concatenate([[0], np.cumsum(num_semaforos)])
+    direccion = np.arange(total_semaforos) - np.repeat(inicio[:-1], num_semaforos)
+
+    verde, amarillo, rojo, direccion = verde.tolist(), amarillo.tolist(), rojo.tolist(), direccion.tolist()
+    semaforos = [{
+        'id': s + 1,
+        'direccion': DIRECCIONES[direccion[s] % 4],
+        'tiempo_verde_inicial': verde[s],
+        'tiempo_amarillo_inicial': amarillo[s],
+        'tiempo_rojo_inicial': rojo[s],
+    } for s in range(total_semaforos)]
+
+    inicio = inicio.tolist()
+    lat, lng = np.round(lat, 7).tolist(), np.round(lng, 7).tolist()
+    intersecciones = [{
+        'id': k + 1,
+        'nombre': f"Intersección {k + 1}",
+        'coordenadas': {'lat': lat[k], 'lng': lng[k]},
+        'semaforos': semaforos[inicio[k]:inicio[k + 1]],
+        'conexiones': conexiones[k].tolist(),
+    } for k in range(num)]
+
+    desde, hasta = (desde + 1).tolist(), (hasta + 1).tolist()
+    longitud, carriles, velocidad = longitud.astype(int).tolist(), carriles.tolist(), velocidad.tolist()
+    bidireccional, flujos = bidireccional.tolist(), flujos.tolist()
+    calles = [{
+        'id': c + 1,
+        'nombre': f"Calle {c + 1}",
+        'desde_interseccion': desde[c],
+        'hasta_interseccion': hasta[c],
+        'longitud': longitud[c],
+        'velocidad_max': velocidad[c],
+        'carriles': carriles[c],
+        'bidireccional': bidireccional[c],
+        'flujo_promedio': {'mañana': flujos[c][0], 'tarde': flujos[c][1], 'noche': flujos[c][2]},
+    } for c in range(num_calles)]
+
+    return {'intersecciones': intersecciones, 'calles': calles}
+
+
+def guardar_red(datos, archivo_salida, compacto=False):
+    """Guarda la red en JSON (compacto: sin sangría, para redes grandes)"""
+    with open(archivo_salida, 'w', encoding='utf-8') as f:
+        if compacto:
+            # json.dumps usa el codificador en C; json.dump escribe por fragmentos en Python
+            f.write(json.dumps(datos, ensure_ascii=False, separators=(',', ':')))
+        else:
+            json.dump(datos, f, indent=4, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una red vial sintética sin conexión a OSM")
+    parser.add_argument('intersecciones', type=int, help="número de intersecciones")
+    parser.add_argument('--tipo', choices=TIPOS_RED, default='cuadricula')
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--separacion', type=float, default=150.0, help="metros entre intersecciones vecinas")
+    parser.add_argument('--semaforos', type=int, choices=range(1, 5), default=None,
+                        help="semáforos por intersección (por defecto: uno por calle que llega)")
+    parser.add_argument('--salida', default='red_sintetica.json')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    datos = generar_red(args.intersecciones, args.tipo, args.semilla, args.separacion,
+                        semaforos_por_interseccion=args.semaforos)
+    guardar_red(datos, args.salida, compacto=args.intersecciones > 1000)
+    num_semaforos = sum(len(i['semaforos']) for i in datos['intersecciones'])
+    print(f"Archivo generado: {args.salida} ({args.intersecciones} intersecciones, "
+          f"{num_semaforos} semáforos, {len(datos['calles'])} calles) en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
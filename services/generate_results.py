@@ -1,313 +1,543 @@
-from models.semaforo import Semaforo
+from models.plan_semaforico import PlanSemaforico
+from services.comparacion import comparar_planes
 import base64
 import folium
+from branca.element import MacroElement
+from jinja2 import Template
 from matplotlib.cm import get_cmap
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.colors as mcolors
+import numpy as np
+import hashlib
 import io
-from collections import deque
-import copy
+import math
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+# Registro de las huellas de los mapas generados, para no volver a dibujarlos
+ARCHIVO_MANIFIESTO = '.manifiesto_resultados.json'
+VERSION_MAPAS = 3
+
+# Formatos disponibles para la distribución de tiempos en los popups:
+# 'png' (matplotlib, el más pesado), 'svg' (pastel vectorial en línea) y
+# 'css' (barra apilada con divs, la opción más ligera)
+FORMATOS_GRAFICOS = ('png', 'svg', 'css')
+COLORES_FASES = (('Verde', 'green'), ('Amarillo', 'yellow'), ('Rojo', 'red'))
+
+# Formatos de mapa: 'folium' (un marcador y una línea de folium por elemento) y
+# 'geojson' (una sola capa GeoJSON con propiedades por elemento, estilizada en
+# el navegador; pensada para redes de miles de intersecciones)
+FORMATOS_MAPA = ('folium', 'geojson')
+
+LEYENDA_FLUJO_HTML = '''
+        <div style="position: fixed; 
+                    bottom: 50px; left: 50px; width: 200px; height: 140px; 
+                    border:2px solid grey; z-index:9999; font-size:14px;
+                    background-color: white; padding: 10px;
+                    border-radius: 5px;">
+            <p style="margin-top: 0; margin-bottom: 5px;"><b>Flujo de tráfico</b></p>
+            <div style="display: flex; align-items: center; margin-bottom: 5px;">
+                <div style="background-color: #ffffb2; width: 20px; height: 10px; margin-right: 5px;"></div>
+                <div>Bajo</div>
+            </div>
+            <div style="display: flex; align-items: center; margin-bottom: 5px;">
+                <div style="background-color: #fecc5c; width: 20px; height: 10px; margin-right: 5px;"></div>
+                <div>Medio</div>
+            </div>
+            <div style="display: flex; align-items: center; margin-bottom: 5px;">
+                <div style="background-color: #fd8d3c; width: 20px; height: 10px; margin-right: 5px;"></div>
+                <div>Alto</div>
+            </div>
+            <div style="display: flex; align-items: center;">
+                <div style="background-color: #e31a1c; width: 20px; height: 10px; margin-right: 5px;"></div>
+                <div>Muy alto</div>
+            </div>
+        </div>
+        '''
+
+
+@lru_cache(maxsize=None)
+def _grafico_tiempos_png(verde, amarillo, rojo):
+    """Gráfico de pastel de la distribución de tiempos, en base64 (uno por combinación)"""
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    ax.pie([verde, amarillo, rojo], labels=[nombre for nombre, _ in COLORES_FASES],
+           colors=[color for _, color in COLORES_FASES], autopct='%1.1f%%')
+    ax.set_title('Distribución de tiempos')
+    img = io.BytesIO()
+    fig.savefig(img, format='png', bbox_inches='tight')
+    return f'<img src="data:image/png;base64,{base64.b64encode(img.getvalue()).decode()}" width="300">'
+
+
+@lru_cache(maxsize=None)
+def _grafico_tiempos_svg(verde, amarillo, rojo):
+    """Pastel vectorial en línea con la distribución de tiempos"""
+    total = verde + amarillo + rojo
+    radio, centro = 60, 65
+    partes = []
+    angulo = -math.pi / 2
+    for valor, (nombre, color) in zip((verde, amarillo, rojo), COLORES_FASES):
+        if valor <= 0:
+            continue
+        fraccion = valor / total
+        fin = angulo + 2 * math.pi * fraccion
+        x1, y1 = centro + radio * math.cos(angulo), centro + radio * math.sin(angulo)
+        x2, y2 = centro + radio * math.cos(fin), centro + radio * math.sin(fin)
+        arco_largo = 1 if fraccion > 0.5 else 0
+        if fraccion >= 1:
+            partes.append(f'<circle cx="{centro}" cy="{centro}" r="{radio}" fill="{color}"/>')
+        else:
+            partes.append(f'<path d="M{centro},{centro} L{x1:.1f},{y1:.1f} '
+                          f'A{radio},{radio} 0 {arco_largo} 1 {x2:.1f},{y2:.1f} Z" fill="{color}">'
+                          f'<title>{nombre}: {fraccion:.1%}</title></path>')
+        angulo = fin
+    leyenda = ', '.join(f'{nombre} {valor / total:.1%}'
+                        for valor, (nombre, _) in zip((verde, amarillo, rojo), COLORES_FASES))
+    return (f'<svg width="130" height="130" viewBox="0 0 130 130">{"".join(partes)}</svg>'
+            f'<br><small>{leyenda}</small>')
+
+
+@lru_cache(maxsize=None)
+def _grafico_tiempos_css(verde, amarillo, rojo):
+    """Barra apilada con divs: la representación más ligera de la distribución"""
+    total = verde + amarillo + rojo
+    segmentos = ''.join(
+        f'<div title="{nombre}: {valor / total:.1%}" '
+        f'style="width:{100 * valor / total:.1f}%;background:{color}"></div>'
+        for valor, (nombre, color) in zip((verde, amarillo, rojo), COLORES_FASES)
+    )
+    return f'<div style="display:flex;width:300px;height:14px">{segmentos}</div>'
+
+
+def grafico_tiempos(verde, amarillo, rojo, formato='png'):
+    """HTML con la distribución de tiempos de un semáforo, reutilizado entre semáforos iguales"""
+    if formato not in FORMATOS_GRAFICOS:
+        raise ValueError(f"Formato de gráfico desconocido '{formato}'. Opciones: {', '.join(FORMATOS_GRAFICOS)}")
+    if verde + amarillo + rojo <= 0:
+        return ''
+    graficar = {'png': _grafico_tiempos_png, 'svg': _grafico_tiempos_svg, 'css': _grafico_tiempos_css}[formato]
+    return graficar(int(verde), int(amarillo), int(rojo))
+
+
+def renderizar_mapa(capa_base, genes, archivo_salida, formato_graficos='png'):
+    """
+    Dibuja y guarda un mapa a partir de la capa base compartida y un plan
+    (una fila verde, amarillo, rojo, desfase por semáforo)
+    """
+    mapa = folium.Map(location=capa_base['centro'], zoom_start=14, tiles='OpenStreetMap')
+    
+    for interseccion in capa_base['intersecciones']:
+        # Añadir marcador para cada intersección
+        popup_text = f"<b>Intersección: {interseccion['nombre'] or interseccion['id']}</b><br>"
+        popup_text += "<b>Semáforos:</b><br>"
+        for indice, semaforo_id in interseccion['semaforos']:
+            verde, amarillo, rojo, desfase = genes[indice]
+            popup_text += f"ID: {semaforo_id}<br>"
+            popup_text += f"Verde: {verde}s, Amarillo: {amarillo}s, Rojo: {rojo}s, Desfase: {desfase}s<br>"
+        
+        # Distribución de tiempos con el primer semáforo como ejemplo
+        if interseccion['semaforos']:
+            indice, semaforo_id = interseccion['semaforos'][0]
+            verde, amarillo, rojo, _ = genes[indice]
+            popup_text += f"<b>Distribución de tiempos, semáforo {semaforo_id}:</b><br>"
+            popup_text += grafico_tiempos(verde, amarillo, rojo, formato_graficos)
+        
+        try:
+            folium.Marker(
+                list(interseccion['posicion']),
+                popup=folium.Popup(popup_text, max_width=400),
+                tooltip=f"Intersección {interseccion['id']}",
+                icon=folium.Icon(icon='traffic-light', prefix='fa', color='blue')
+            ).add_to(mapa)
+        except ValueError as e:
+            print(f"Error al crear marcador para la intersección {interseccion['id']}: {e}")
+    
+    for calle in capa_base['calles']:
+        try:
+            folium.PolyLine(
+                calle['puntos'],
+                color=calle['color'],
+                weight=calle['grosor'],
+                opacity=0.8,
+                popup=calle['popup']
+            ).add_to(mapa)
+        except ValueError:
+            continue
+    
+    mapa.get_root().html.add_child(folium.Element(LEYENDA_FLUJO_HTML))
+    mapa.save(archivo_salida)
+    return mapa
+
+
+def capa_geojson(capa_base, genes):
+    """
+    FeatureCollection con la red y el plan: una línea por calle (flujo, color y
+    grosor) y un punto por intersección con los tiempos de sus semáforos como
+    [id, verde, amarillo, rojo, desfase]. Las coordenadas van en [lng, lat].
+    """
+    genes = np.asarray(genes, dtype=np.int64)
+    elementos = []
+    for calle in capa_base['calles']:
+        elementos.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString',
+                         'coordinates': [[round(lng, 6), round(lat, 6)] for lat, lng in calle['puntos']]},
+            'properties': {'flujo': round(calle['flujo'], 1), 'color': calle['color'],
+                           'grosor': round(calle['grosor'], 2)},
+        })
+    for interseccion in capa_base['intersecciones']:
+        lat, lng = interseccion['posicion']
+        elementos.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(lng, 6), round(lat, 6)]},
+            'properties': {
+                'id': interseccion['id'],
+                'nombre': interseccion['nombre'],
+                'semaforos': [[semaforo_id] + genes[indice].tolist()
+                              for indice, semaforo_id in interseccion['semaforos']],
+            },
+        })
+    return {'type': 'FeatureCollection', 'features': elementos}
+
+
+def archivo_geojson(archivo_salida):
+    """Archivo .geojson que acompaña a un mapa HTML en formato 'geojson'"""
+    return os.path.splitext(archivo_salida)[0] + '.geojson'
+
+
+class CapaGeoJSONSemaforos(MacroElement):
+    """
+    Capa Leaflet única con los datos de capa_geojson incrustados. El estilo de
+    las calles, los marcadores y los popups se construyen en el navegador a
+    partir de las propiedades, dibujando sobre canvas.
+    """
+    _template = Template('''
+        {% macro script(this, kwargs) %}
+        (function() {
+            var datos = {{ this.datos }};
+            var fases = [["Verde", "green"], ["Amarillo", "yellow"], ["Rojo", "red"]];
+            function escapar(texto) {
+                return String(texto).replace(/[&<>"]/g, function(c) {
+                    return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c];
+                });
+            }
+            function barra(tiempos) {
+                var total = tiempos[0] + tiempos[1] + tiempos[2];
+                if (total <= 0) { return ""; }
+                return '<div style="display:flex;width:300px;height:14px">' + tiempos.map(function(valor, i) {
+                    var porcentaje = (100 * valor / total).toFixed(1);
+                    return '<div title="' + fases[i][0] + ": " + porcentaje + '%" style="width:' +
+                        porcentaje + "%;background:" + fases[i][1] + '"></div>';
+                }).join("") + "</div>";
+            }
+            function popupInterseccion(p) {
+                var html = "<b>Intersección: " + escapar(p.nombre || p.id) + "</b><br><b>Semáforos:</b><br>";
+                p.semaforos.forEach(function(s) {
+                    html += "ID: " + escapar(s[0]) + "<br>Verde: " + s[1] + "s, Amarillo: " + s[2] +
+                        "s, Rojo: " + s[3] + "s, Desfase: " + s[4] + "s<br>";
+                });
+                if (p.semaforos.length) {
+                    var s = p.semaforos[0];
+                    html += "<b>Distribución de tiempos, semáforo " + escapar(s[0]) + ":</b><br>" +
+                        barra(s.slice(1, 4));
+                }
+                return html;
+            }
+            L.geoJSON(datos, {
+                renderer: L.canvas(),
+                style: function(f) {
+                    return {color: f.properties.color, weight: f.properties.grosor, opacity: 0.8};
+                },
+                pointToLayer: function(f, latlng) {
+                    return L.circleMarker(latlng, {radius: 6, color: "#1f4e9c", weight: 1,
+                                                   fillColor: "#3388ff", fillOpacity: 0.9});
+                },
+                onEachFeature: function(f, capa) {
+                    if (f.geometry.type === "Point") {
+                        capa.bindTooltip("Intersección " + escapar(f.properties.id));
+                        capa.bindPopup(function() { return popupInterseccion(f.properties); }, {maxWidth: 400});
+                    } else {
+                        capa.bindPopup(function() {
+                            return "Flujo promedio: " + f.properties.flujo.toFixed(1) + " vehículos/h";
+                        });
+                    }
+                }
+            }).addTo({{ this._parent.get_name() }});
+        })();
+        {% endmacro %}
+    ''')
+
+    def __init__(self, datos):
+        super().__init__()
+        self._name = 'CapaGeoJSONSemaforos'
+        # JSON compacto; "</" se escapa para no cerrar la etiqueta <script>
+        self.datos = json.dumps(datos, separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+
+
+def renderizar_mapa_geojson(capa_base, genes, archivo_salida):
+    """
+    Guarda la red y el plan como un único GeoJSON compacto (archivo_geojson) y un
+    mapa HTML que lo dibuja en una sola capa con estilo del lado del cliente
+    """
+    datos = capa_geojson(capa_base, genes)
+    with open(archivo_geojson(archivo_salida), 'w', encoding='utf-8') as f:
+        json.dump(datos, f, separators=(',', ':'), ensure_ascii=False)
+    
+    mapa = folium.Map(location=capa_base['centro'], zoom_start=14, tiles='OpenStreetMap', prefer_canvas=True)
+    mapa.add_child(CapaGeoJSONSemaforos(datos))
+    mapa.get_root().html.add_child(folium.Element(LEYENDA_FLUJO_HTML))
+    mapa.save(archivo_salida)
+    return mapa
+
+
+def _renderizar_mapa_en_archivo(capa_base, genes, archivo_salida, formato_graficos, formato_mapa='folium'):
+    """Versión para procesos trabajadores: no devuelve el mapa, solo el archivo"""
+    if formato_mapa == 'geojson':
+        renderizar_mapa_geojson(capa_base, genes, archivo_salida)
+    else:
+        renderizar_mapa(capa_base, genes, archivo_salida, formato_graficos)
+    return archivo_salida
+
+
+def _huella_mapa(huella_red, genes, formato_graficos, formato_mapa='folium'):
+    """Huella de las entradas de un mapa: red, plan, formatos y versión del dibujo"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{huella_red}:{formato_graficos}:{formato_mapa}:{VERSION_MAPAS}".encode('utf-8'))
+    h.update(np.ascontiguousarray(genes, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def _cargar_manifiesto():
+    if not os.path.exists(ARCHIVO_MANIFIESTO):
+        return {}
+    try:
+        with open(ARCHIVO_MANIFIESTO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_manifiesto(manifiesto):
+    with open(ARCHIVO_MANIFIESTO, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+
 
 class GenerateResults:
+    
+    def __init__(self, formato_graficos='png', formato_mapa='folium'):
+        # Capas base ya preparadas, por huella de red
+        self._capas_base = {}
+        if formato_graficos not in FORMATOS_GRAFICOS:
+            raise ValueError(f"Formato de gráfico desconocido '{formato_graficos}'. "
+                             f"Opciones: {', '.join(FORMATOS_GRAFICOS)}")
+        if formato_mapa not in FORMATOS_MAPA:
+            raise ValueError(f"Formato de mapa desconocido '{formato_mapa}'. "
+                             f"Opciones: {', '.join(FORMATOS_MAPA)}")
+        self.formato_graficos = formato_graficos
+        self.formato_mapa = formato_mapa
   
-    def visualizar_red_vial(self, red_vial, mejor_solucion=None, archivo_salida='mapa_semaforos.html'):
+    def preparar_capa_base(self, red_vial):
         """
-        Visualiza la red vial y los semáforos optimizados en un mapa interactivo usando Folium
-        
-        Parámetros:
-        - red_vial: objeto RedVial con las intersecciones y conexiones
-        - mejor_solucion: objeto IndividuoAG con la mejor solución del algoritmo genético
-        - archivo_salida: nombre del archivo HTML donde se guardará el mapa
+        Prepara las capas que no dependen del plan semafórico (centro del mapa,
+        posición de las intersecciones y calles coloreadas por flujo). Se calcula
+        una vez por red y se comparte entre todos los mapas.
         """
-        # Obtener el centro aproximado del mapa (promedio de coordenadas)
-        coordenadas = [i.coordenadas for i in red_vial.intersecciones if i.coordenadas]
+        huella = red_vial.huella()
+        if huella in self._capas_base:
+            return self._capas_base[huella]
+        
+        # Las coordenadas ya vienen normalizadas desde la carga de la red
+        validas = red_vial.tiene_coordenadas()
+        for interseccion in red_vial.intersecciones:
+            if not validas[interseccion.indice]:
+                print(f"Advertencia: La intersección {interseccion.id} no tiene coordenadas válidas")
         
-        if not coordenadas:
+        if validas.any():
+            centro_mapa = red_vial.coordenadas[validas].mean(axis=0).tolist()
+        else:
             # Default coordinates for Tuxtla Gutiérrez if no coordinates in data
             centro_mapa = [16.7506, -93.1029]
-        else:
-            # Check the format of coordinates
-            first_coord = coordenadas[0]
-            
-            # If coordinates are in dictionary format
-            if isinstance(first_coord, dict):
-                # Determine the key names (they might be 'lat'/'lng' or 'latitude'/'longitude')
-                lat_key = next(key for key in first_coord.keys() if 'lat' in key.lower())
-                lng_key = next(key for key in first_coord.keys() if 'lon' in key.lower() or 'lng' in key.lower())
-                
-                latitudes = [c[lat_key] for c in coordenadas]
-                longitudes = [c[lng_key] for c in coordenadas]
-            # If coordinates are in a list/tuple format but need to be accessed differently
-            elif hasattr(first_coord, '__iter__') and not isinstance(first_coord, (str, bytes)):
-                latitudes = [c[0] if isinstance(c, (list, tuple)) else c.latitude for c in coordenadas]
-                longitudes = [c[1] if isinstance(c, (list, tuple)) else c.longitude for c in coordenadas]
-            else:
-                # Print debug info
-                print(f"Coordinate format: {type(first_coord)}")
-                print(f"Sample coordinate: {first_coord}")
-                # Default to center of Tuxtla Gutiérrez
-                centro_mapa = [16.7506, -93.1029]
-                return
-                
-            centro_mapa = [sum(latitudes) / len(latitudes), sum(longitudes) / len(longitudes)]
-        # Crear mapa base
-        mapa = folium.Map(location=centro_mapa, zoom_start=14, 
-                        tiles='OpenStreetMap')
-        
-        # Crear colormap para representar flujo de tráfico
-        cmap = get_cmap('YlOrRd')
         
         # Encontrar el flujo máximo para normalizar colores
         flujo_max = 0
         for (desde_id, hasta_id), flujos in red_vial.flujos_calles.items():
             for periodo, flujo in flujos.items():
                 flujo_max = max(flujo_max, flujo)
+        cmap = get_cmap('YlOrRd')
         
-        # Aplicar la solución del AG si existe
-        if mejor_solucion:
-            semaforo_idx = 0
-            for interseccion in red_vial.intersecciones:
-                ids_originales = [sem.id for sem in interseccion.semaforos]
-                for i, _ in enumerate(interseccion.semaforos):
-                    if semaforo_idx < len(mejor_solucion.cromosoma):
-                        # Actualizar semáforos con la mejor solución
-                        nuevo_semaforo = Semaforo(
-                            id=ids_originales[i],
-                            tiempo_verde=mejor_solucion.cromosoma[semaforo_idx].tiempo_verde,
-                            tiempo_amarillo=mejor_solucion.cromosoma[semaforo_idx].tiempo_amarillo,
-                            tiempo_rojo=mejor_solucion.cromosoma[semaforo_idx].tiempo_rojo,
-                            desfase=mejor_solucion.cromosoma[semaforo_idx].desfase
-                        )
-                        interseccion.semaforos[i] = nuevo_semaforo
-                        semaforo_idx += 1
-        
-        # Crear líneas para representar las calles
+        intersecciones = []
+        calles = []
         for interseccion in red_vial.intersecciones:
-            # Verificar si hay coordenadas y validar que sean numéricas
-            if not interseccion.coordenadas:
-                print(f"Advertencia: La intersección {interseccion.id} no tiene coordenadas")
-                continue
-            
-            # Imprimir para depuración
-            print(f"Procesando intersección: {interseccion.id}, coordenadas: {interseccion.coordenadas}, tipo: {type(interseccion.coordenadas)}")
-            
-            # Verificar el formato de las coordenadas y convertirlas a valores numéricos
-            try:
-                if isinstance(interseccion.coordenadas, dict):
-                    # Si es un diccionario, intenta extraer lat/lng o latitude/longitude
-                    keys = interseccion.coordenadas.keys()
-                    lat_key = next((k for k in keys if 'lat' in k.lower()), None)
-                    lng_key = next((k for k in keys if 'lng' in k.lower() or 'lon' in k.lower()), None)
-                    
-                    if lat_key and lng_key:
-                        origen_lat = float(interseccion.coordenadas[lat_key])
-                        origen_lon = float(interseccion.coordenadas[lng_key])
-                    else:
-                        print(f"Error: No se pueden identificar las claves lat/lng en: {interseccion.coordenadas}")
-                        continue
-                elif isinstance(interseccion.coordenadas, (list, tuple)) and len(interseccion.coordenadas) >= 2:
-                    # Si es una lista o tupla, toma los primeros dos elementos
-                    origen_lat = float(interseccion.coordenadas[0])
-                    origen_lon = float(interseccion.coordenadas[1])
-                else:
-                    # Intenta acceder a los atributos latitude/longitude
-                    try:
-                        origen_lat = float(interseccion.coordenadas.latitude)
-                        origen_lon = float(interseccion.coordenadas.longitude)
-                    except AttributeError:
-                        print(f"Error: Formato de coordenadas no reconocido: {interseccion.coordenadas}")
-                        continue
-            except (ValueError, TypeError) as e:
-                print(f"Error al convertir coordenadas para la intersección {interseccion.id}: {e}")
-                print(f"Valor de coordenadas: {interseccion.coordenadas}")
-                continue
+            # Índice global de cada semáforo (su posición en el cromosoma)
+            semaforos = [(sem.indice, sem.id) for sem in interseccion.semaforos]
             
-            # Añadir marcador para cada intersección
-            popup_text = f"<b>Intersección: {interseccion.nombre or interseccion.id}</b><br>"
-            popup_text += "<b>Semáforos:</b><br>"
-            
-            for semaforo in interseccion.semaforos:
-                popup_text += f"ID: {semaforo.id}<br>"
-                popup_text += f"Verde: {semaforo.tiempo_verde}s, "
-                popup_text += f"Amarillo: {semaforo.tiempo_amarillo}s, "
-                popup_text += f"Rojo: {semaforo.tiempo_rojo}s, "
-                popup_text += f"Desfase: {semaforo.desfase}s<br>"
-            
-            # Crear gráfico de pastel para mostrar distribución de tiempos en semáforo
-            if interseccion.semaforos:
-                fig, ax = plt.subplots(figsize=(4, 3))
-                semaforo = interseccion.semaforos[0]  # Tomamos el primer semáforo como ejemplo
-                tiempos = [semaforo.tiempo_verde, semaforo.tiempo_amarillo, semaforo.tiempo_rojo]
-                labels = ['Verde', 'Amarillo', 'Rojo']
-                colors = ['green', 'yellow', 'red']
-                ax.pie(tiempos, labels=labels, colors=colors, autopct='%1.1f%%')
-                ax.set_title(f'Distribución de tiempos\nSemáforo {semaforo.id}')
-                
-                # Convertir gráfico a imagen codificada en base64
-                img = io.BytesIO()
-                plt.savefig(img, format='png', bbox_inches='tight')
-                plt.close(fig)
-                img.seek(0)
-                img_str = base64.b64encode(img.read()).decode()
-                
-                # Añadir gráfico al popup
-                popup_text += f'<img src="data:image/png;base64,{img_str}" width="300">'
-            
-            # Verificar que las coordenadas sean válidas para folium
-            try:
-                folium.Marker(
-                    [origen_lat, origen_lon],
-                    popup=folium.Popup(popup_text, max_width=400),
-                    tooltip=f"Intersección {interseccion.id}",
-                    icon=folium.Icon(icon='traffic-light', prefix='fa', color='blue')
-                ).add_to(mapa)
-            except ValueError as e:
-                print(f"Error al crear marcador para la intersección {interseccion.id}: {e}")
-                print(f"Coordenadas: lat={origen_lat}, lon={origen_lon}")
+            if not validas[interseccion.indice]:
                 continue
+            origen = tuple(red_vial.coordenadas[interseccion.indice].tolist())
+            intersecciones.append({
+                'id': interseccion.id,
+                'nombre': interseccion.nombre,
+                'posicion': origen,
+                'semaforos': semaforos,
+            })
             
-            # Dibujar líneas para conectar las intersecciones
+            # Líneas para conectar las intersecciones
             for conexion in interseccion.conexiones:
-                if not conexion.coordenadas:
+                if not validas[conexion.indice]:
                     continue
                 
-                # Aplicar la misma lógica de validación de coordenadas para la conexión
-                try:
-                    if isinstance(conexion.coordenadas, dict):
-                        keys = conexion.coordenadas.keys()
-                        lat_key = next((k for k in keys if 'lat' in k.lower()), None)
-                        lng_key = next((k for k in keys if 'lng' in k.lower() or 'lon' in k.lower()), None)
-                        
-                        if lat_key and lng_key:
-                            destino_lat = float(conexion.coordenadas[lat_key])
-                            destino_lon = float(conexion.coordenadas[lng_key])
-                        else:
-                            continue
-                    elif isinstance(conexion.coordenadas, (list, tuple)) and len(conexion.coordenadas) >= 2:
-                        destino_lat = float(conexion.coordenadas[0])
-                        destino_lon = float(conexion.coordenadas[1])
-                    else:
-                        try:
-                            destino_lat = float(conexion.coordenadas.latitude)
-                            destino_lon = float(conexion.coordenadas.longitude)
-                        except AttributeError:
-                            continue
-                except (ValueError, TypeError):
-                    continue
-                
-                # Obtener el flujo de tráfico para esta calle
+                # Obtener el flujo de tráfico para esta calle (promedio de los tres periodos)
                 flujo_calle = 100  # Valor por defecto
-                
-                # Buscar el flujo real en los datos
                 if (interseccion.id, conexion.id) in red_vial.flujos_calles:
-                    # Tomar el promedio de los tres periodos
                     flujos = red_vial.flujos_calles[(interseccion.id, conexion.id)]
                     flujo_calle = (flujos['mañana'] + flujos['tarde'] + flujos['noche']) / 3
                 
-                # Normalizar el flujo para obtener color
+                # Normalizar el flujo para obtener color y grosor (entre 2 y 10)
                 flujo_norm = min(flujo_calle / flujo_max, 1.0) if flujo_max > 0 else 0.5
-                color_calle = mcolors.to_hex(cmap(flujo_norm))
-                
-                # Añadir línea con grosor proporcional al flujo
-                grosor = 2 + (flujo_norm * 8)  # Grosor entre 2 y 10
-                
-                try:
-                    folium.PolyLine(
-                        [(origen_lat, origen_lon), (destino_lat, destino_lon)],
-                        color=color_calle,
-                        weight=grosor,
-                        opacity=0.8,
-                        popup=f"Flujo promedio: {flujo_calle:.1f} vehículos/h"
-                    ).add_to(mapa)
-                except ValueError:
-                    continue
+                calles.append({
+                    'puntos': [origen, tuple(red_vial.coordenadas[conexion.indice].tolist())],
+                    'flujo': flujo_calle,
+                    'color': mcolors.to_hex(cmap(flujo_norm)),
+                    'grosor': 2 + (flujo_norm * 8),
+                    'popup': f"Flujo promedio: {flujo_calle:.1f} vehículos/h",
+                })
+        
+        capa_base = {'centro': centro_mapa, 'intersecciones': intersecciones, 'calles': calles}
+        self._capas_base[huella] = capa_base
+        return capa_base
+    
+    def plan_de_solucion(self, red_vial, solucion=None):
+        """
+        Matriz (semáforos x 4) con verde, amarillo, rojo y desfase de cada semáforo
+        de la red, tomando los de la solución cuando se indica
+        """
+        if solucion is None:
+            return red_vial.plan_actual()
+        return PlanSemaforico.desde_solucion(red_vial, solucion).genes
+    
+    def plan_original(self, red_vial):
+        """Plan sin optimizar usado como referencia (mismos tiempos en todos los semáforos)"""
+        return PlanSemaforico.original(red_vial).genes
+    
+    def visualizar_red_vial(self, red_vial, mejor_solucion=None, archivo_salida='mapa_semaforos.html'):
+        """
+        Visualiza la red vial y los semáforos optimizados en un mapa interactivo usando Folium
         
-        # Añadir leyenda para flujo de tráfico
-        leyenda_html = '''
-        <div style="position: fixed; 
-                    bottom: 50px; left: 50px; width: 200px; height: 140px; 
-                    border:2px solid grey; z-index:9999; font-size:14px;
-                    background-color: white; padding: 10px;
-                    border-radius: 5px;">
-            <p style="margin-top: 0; margin-bottom: 5px;"><b>Flujo de tráfico</b></p>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="background-color: #ffffb2; width: 20px; height: 10px; margin-right: 5px;"></div>
-                <div>Bajo</div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="background-color: #fecc5c; width: 20px; height: 10px; margin-right: 5px;"></div>
-                <div>Medio</div>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                <div style="background-color: #fd8d3c; width: 20px; height: 10px; margin-right: 5px;"></div>
-                <div>Alto</div>
-            </div>
-            <div style="display: flex; align-items: center;">
-                <div style="background-color: #e31a1c; width: 20px; height: 10px; margin-right: 5px;"></div>
-                <div>Muy alto</div>
-            </div>
-        </div>
-        '''
-        mapa.get_root().html.add_child(folium.Element(leyenda_html))
+        Parámetros:
+        - red_vial: objeto RedVial con las intersecciones y conexiones
+        - mejor_solucion: objeto IndividuoAG con la mejor solución del algoritmo genético
+        - archivo_salida: nombre del archivo HTML donde se guardará el mapa
         
-        # Guardar mapa a archivo HTML
-        mapa.save(archivo_salida)
-        print(f"Mapa guardado en {archivo_salida}")
+        También acepta un PlanSemaforico en lugar de red_vial.
+        """
+        if isinstance(red_vial, PlanSemaforico):
+            genes, red_vial = red_vial.genes, red_vial.red_vial
+        else:
+            genes = self.plan_de_solucion(red_vial, mejor_solucion)
+        capa_base = self.preparar_capa_base(red_vial)
+        if self.formato_mapa == 'geojson':
+            mapa = renderizar_mapa_geojson(capa_base, genes, archivo_salida)
+            print(f"Mapa guardado en {archivo_salida} (datos en {archivo_geojson(archivo_salida)})")
+        else:
+            mapa = renderizar_mapa(capa_base, genes, archivo_salida, self.formato_graficos)
+            print(f"Mapa guardado en {archivo_salida}")
         
         # Mostrar estadísticas de la solución
         if mejor_solucion:
             print("\nEstadísticas de la mejor solución:")
             print(f"Fitness: {mejor_solucion.fitness:.6f}")
-            # Puedes calcular otras estadísticas aquí
         
         return mapa
-
+    
+    def renderizar_mapas(self, red_vial, mapas, procesos=None, en_paralelo=None):
+        """
+        Renderiza varios mapas en paralelo compartiendo la capa base.
         
+        Parámetros:
+        - red_vial: objeto RedVial
+        - mapas: lista de tuplas (archivo_salida, genes) con genes de plan_de_solucion
+        - procesos: número de procesos (None = todos los núcleos, 1 = en serie)
+        - en_paralelo: función opcional que se ejecuta en el proceso principal
+          mientras se dibujan los mapas; recibe los procesos que quedan libres
+          (los mapas usan a lo sumo la mitad) y se retorna su resultado
+        
+        Solo se vuelven a dibujar los mapas cuyo plan o red cambiaron desde la última
+        ejecución; los mapas con el mismo plan se dibujan una vez y se copian.
+        """
+        capa_base = self.preparar_capa_base(red_vial)
+        huella_red = red_vial.huella()
+        manifiesto = _cargar_manifiesto()
+        
+        # Agrupar por huella para no dibujar dos veces el mismo plan
+        por_huella = {}
+        for archivo, genes in mapas:
+            huella = _huella_mapa(huella_red, genes, self.formato_graficos, self.formato_mapa)
+            generados = [archivo] + ([archivo_geojson(archivo)] if self.formato_mapa == 'geojson' else [])
+            if manifiesto.get(archivo) == huella and all(os.path.exists(a) for a in generados):
+                print(f"Sin cambios: {archivo}")
+                continue
+            por_huella.setdefault(huella, (genes, []))[1].append(archivo)
+        
+        def registrar(huella, archivos):
+            for copia in archivos[1:]:
+                shutil.copyfile(archivos[0], copia)
+                if self.formato_mapa == 'geojson':
+                    shutil.copyfile(archivo_geojson(archivos[0]), archivo_geojson(copia))
+            for archivo in archivos:
+                manifiesto[archivo] = huella
+                print(f"Mapa guardado en {archivo}")
+        
+        resultado = None
+        procesos = procesos or os.cpu_count() or 1
+        if procesos == 1 or len(por_huella) <= 1:
+            for huella, (genes, archivos) in por_huella.items():
+                _renderizar_mapa_en_archivo(capa_base, genes, archivos[0], self.formato_graficos,
+                                            self.formato_mapa)
+                registrar(huella, archivos)
+            if en_paralelo:
+                resultado = en_paralelo(procesos)
+        else:
+            # Los mapas y en_paralelo se reparten los procesos para no sobresuscribir la CPU
+            procesos_mapas = min(len(por_huella), procesos // 2)
+            with ProcessPoolExecutor(max_workers=procesos_mapas) as pool:
+                futuros = {
+                    pool.submit(_renderizar_mapa_en_archivo, capa_base, genes, archivos[0],
+                                self.formato_graficos, self.formato_mapa): (huella, archivos)
+                    for huella, (genes, archivos) in por_huella.items()
+                }
+                if en_paralelo:
+                    resultado = en_paralelo(procesos - procesos_mapas)
+                for futuro in as_completed(futuros):
+                    futuro.result()
+                    registrar(*futuros[futuro])
+        
+        _guardar_manifiesto(manifiesto)
+        return resultado
+
 
- 
     def crear_red_original(self, red_vial):
-        """Crea una copia de la red vial con la configuración original de semáforos"""
-        # Se debe implementar una copia profunda de la red vial aquí
-        # Este es un ejemplo simplificado
-        #return red_vial  # Asumiendo que la red vial actual es la original
         """
-        Crea una copia profunda de la red vial con la configuración original de semáforos
+        Crea el plan con la configuración original de semáforos sobre la red vial
         
         Parámetros:
         - red_vial: objeto RedVial con la configuración actual
         
         Retorna:
-        - Una copia profunda de la red vial original
+        - Un PlanSemaforico con los tiempos originales (la red no se copia)
         """
-        # Crear una copia profunda de la red vial
-        red_copia = copy.deepcopy(red_vial)
-        
-        # Restaurar los tiempos originales de los semáforos
-        for interseccion in red_copia.intersecciones:
-            for semaforo in interseccion.semaforos:
-                # Restaurar a valores típicos o los que consideres originales
-                semaforo.tiempo_verde = 30
-                semaforo.tiempo_amarillo = 3
-                semaforo.tiempo_rojo = 30
-                semaforo.desfase = 0
-                semaforo.ciclo_total = semaforo.tiempo_verde + semaforo.tiempo_amarillo + semaforo.tiempo_rojo
-        
-        return red_copia
-        
+        return PlanSemaforico.original(red_vial)
 
-    def simular_y_obtener_metricas(self, red_vial, duracion_sim):
-        """Simula el tráfico y retorna métricas de rendimiento"""
-        # Reiniciar colas de vehículos
-        for interseccion in red_vial.intersecciones:
-            for semaforo_id in interseccion.cola_vehiculos:
-                interseccion.cola_vehiculos[semaforo_id] = deque()
+    def simular_y_obtener_metricas(self, plan, duracion_sim):
+        """Simula el tráfico de un PlanSemaforico (o RedVial) y retorna métricas de rendimiento"""
+        if not isinstance(plan, PlanSemaforico):
+            plan = PlanSemaforico.actual(plan)
         
-        # Simular llegadas con tasa promedio
+        # Simular llegadas con tasa promedio y tráfico
         tasa_llegada = 0.4  # Ejemplo, ajustar según necesidad
-        red_vial.simular_llegada_poisson(tasa_llegada, duracion_sim)
-        
-        # Simular tráfico
-        tiempo_promedio, congestion = red_vial.simular_trafico(duracion_sim)
+        tiempo_promedio, congestion = plan.simular(tasa_llegada, duracion_sim)
 
         # Garantizar que no haya valores nulos o negativos
         tiempo_promedio = max(0.01, tiempo_promedio)
@@ -316,51 +546,20 @@ class GenerateResults:
         return tiempo_promedio, congestion
 
     def aplicar_solucion(self, red_vial, solucion):
-        """Aplica una solución del AG a una copia de la red vial y la retorna"""
-        # Se debe implementar una copia profunda de la red vial aquí
-        # y luego aplicar la solución
-        # Este es un ejemplo simplificado
-        #return red_vial  # Idealmente, retornaría una nueva instancia con la solución aplicada
         """
-        Aplica una solución del AG a una copia de la red vial
+        Aplica una solución del AG como un plan superpuesto a la red vial
         
         Parámetros:
         - red_vial: objeto RedVial original
         - solucion: objeto IndividuoAG con la solución a aplicar
         
         Retorna:
-        - Una copia de la red vial con la solución aplicada
+        - Un PlanSemaforico con la solución aplicada (sin copiar la topología)
         """
-        # Crear una copia profunda de la red vial
-        red_copia = copy.deepcopy(red_vial)
-        
-        # Aplicar la solución a la copia
-        semaforo_idx = 0
-        for interseccion in red_copia.intersecciones:
-            # Guardar los IDs originales
-            ids_originales = [sem.id for sem in interseccion.semaforos]
-            
-            for i, _ in enumerate(interseccion.semaforos):
-                if semaforo_idx < len(solucion.cromosoma):
-                    # Crear un nuevo semáforo con la configuración de la solución pero conservando el ID original
-                    nuevo_semaforo = Semaforo(
-                        id=ids_originales[i],
-                        tiempo_verde=solucion.cromosoma[semaforo_idx].tiempo_verde,
-                        tiempo_amarillo=solucion.cromosoma[semaforo_idx].tiempo_amarillo,
-                        tiempo_rojo=solucion.cromosoma[semaforo_idx].tiempo_rojo,
-                        desfase=solucion.cromosoma[semaforo_idx].desfase
-                    )
-                    interseccion.semaforos[i] = nuevo_semaforo
-                    semaforo_idx += 1
-        
-        # Reiniciar las colas de vehículos
-        for interseccion in red_copia.intersecciones:
-            for semaforo_id in interseccion.cola_vehiculos:
-                interseccion.cola_vehiculos[semaforo_id] = deque()
-        
-        return red_copia
-
-    def generar_visualizacion_comparativa(self, red_vial, soluciones, duracion_sim=3600):
+        return PlanSemaforico.desde_solucion(red_vial, solucion)
+
+    def generar_visualizacion_comparativa(self, red_vial, soluciones, duracion_sim=3600, replicas=30,
+                                          semilla=0, procesos=None):
         """
         Genera gráficos comparativos de las soluciones obtenidas por el algoritmo genético
         
@@ -368,79 +567,91 @@ class GenerateResults:
         - red_vial: objeto RedVial 
         - soluciones: lista de objetos IndividuoAG (mejores soluciones)
         - duracion_sim: duración de la simulación en segundos
+        - replicas: réplicas por plan; todas los planes usan las mismas semillas
+        - semilla: semilla base de las réplicas
+        - procesos: procesos para repartir las réplicas (None = todos los núcleos)
         """
-        # Configuración inicial sin optimizar
-        red_original = self.crear_red_original(red_vial)
-        
-        # Simular y obtener métricas para la configuración original
-        tiempo_esp_original, congestion_original = self.simular_y_obtener_metricas(red_original, duracion_sim)
-
-        # Fix: Ensure minimum values for metrics
-        tiempo_esp_original = max(0.01, tiempo_esp_original)
-        congestion_original = max(0.01, congestion_original)
-        
-        # Simular y obtener métricas para cada solución
-        tiempos_espera = [tiempo_esp_original]
-        congestiones = [congestion_original]
-        etiquetas = ['Original']
-        
-        for i, solucion in enumerate(soluciones):
-            red_tmp = self.aplicar_solucion(red_vial, solucion)
-            tiempo_esp, congestion = self.simular_y_obtener_metricas(red_tmp, duracion_sim)
-            
-            # Fix: Ensure metrics are valid
-            tiempo_esp = max(0.01, tiempo_esp)
-            congestion = max(0.01, congestion)
-            
-            tiempos_espera.append(tiempo_esp)
-            congestiones.append(congestion)
-            etiquetas.append(f'Solución {i+1}')
+        # Configuración original sin optimizar y planes de cada solución
+        planes = [self.crear_red_original(red_vial)]
+        planes += [self.aplicar_solucion(red_vial, solucion) for solucion in soluciones]
+        
+        # Simular todos los planes en réplicas pareadas y en paralelo
+        comparacion = comparar_planes(red_vial.obtener_contexto_evaluacion(), [plan.genes for plan in planes],
+                                      replicas=replicas, tasa_llegada=0.4, duracion=duracion_sim,
+                                      semilla=semilla, procesos=procesos)
+        
+        tiempos_espera = [r['tiempo_espera'] for r in comparacion]
+        congestiones = [r['congestion'] for r in comparacion]
+        ic_tiempos = [r['ic_tiempo_espera'] for r in comparacion]
+        ic_congestiones = [r['ic_congestion'] for r in comparacion]
+        tiempo_esp_original, congestion_original = tiempos_espera[0], congestiones[0]
+        etiquetas = ['Original'] + [f'Solución {i+1}' for i in range(len(soluciones))]
         
         # Crear gráfico de tiempos de espera
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+        fig = Figure(figsize=(15, 6))
+        ax1, ax2 = fig.subplots(1, 2)
         
         # Gráfico de tiempos de espera
-        colores = ['gray'] + [plt.cm.viridis(i/len(soluciones)) for i in range(len(soluciones))]
+        colores = ['gray'] + [get_cmap('viridis')(i/len(soluciones)) for i in range(len(soluciones))]
         
-        ax1.bar(etiquetas, tiempos_espera, color=colores)
-        ax1.set_title('Tiempo promedio de espera')
+        ax1.bar(etiquetas, tiempos_espera, color=colores, yerr=ic_tiempos, capsize=4)
+        ax1.set_title(f'Tiempo promedio de espera (IC 95%, {replicas} réplicas)')
         ax1.set_ylabel('Tiempo (segundos)')
         ax1.tick_params(axis='x', rotation=45)
 
-        # Fix: Only show improvement percentages if original time is meaningful
+        # Only show improvement percentages if original time is meaningful and the
+        # paired improvement is statistically significant
         if tiempo_esp_original > 0.1:  # Threshold for meaningful comparison
             for i in range(1, len(tiempos_espera)):
-                if tiempos_espera[i] < tiempo_esp_original:  # Only show if there's improvement
-                    porcentaje = ((tiempo_esp_original - tiempos_espera[i]) / tiempo_esp_original) * 100
-                    ax1.text(i, tiempos_espera[i] + 1, f'{porcentaje:.1f}%↓', 
-                            ha='center', va='bottom', fontweight='bold')
+                r = comparacion[i]
+                if r['mejora_tiempo_espera'] > 0 and r['mejora_tiempo_espera_significativa']:
+                    ax1.text(i, tiempos_espera[i] + ic_tiempos[i] + 1,
+                             f"{r['mejora_tiempo_espera']:.1f}±{r['ic_mejora_tiempo_espera']:.1f}%↓",
+                             ha='center', va='bottom', fontweight='bold')
         
         # Gráfico de congestión
-        ax2.bar(etiquetas, congestiones, color=colores)
-        ax2.set_title('Nivel de congestión')
+        ax2.bar(etiquetas, congestiones, color=colores, yerr=ic_congestiones, capsize=4)
+        ax2.set_title(f'Nivel de congestión (IC 95%, {replicas} réplicas)')
         ax2.set_ylabel('Vehículos en cola')
         ax2.tick_params(axis='x', rotation=45)
         
-        # Fix: Only show improvement percentages if there's meaningful congestion
+        # Only show improvement percentages if there's meaningful congestion and the
+        # paired improvement is statistically significant
         if congestion_original > 1:  # Threshold for meaningful comparison
             for i in range(1, len(congestiones)):
-                if congestiones[i] < congestion_original:  # Only show if there's improvement
-                    porcentaje = ((congestion_original - congestiones[i]) / congestion_original) * 100
-                    ax2.text(i, congestiones[i] + 1, f'{porcentaje:.1f}%↓', 
-                            ha='center', va='bottom', fontweight='bold')
+                r = comparacion[i]
+                if r['mejora_congestion'] > 0 and r['mejora_congestion_significativa']:
+                    ax2.text(i, congestiones[i] + ic_congestiones[i] + 1,
+                             f"{r['mejora_congestion']:.1f}±{r['ic_mejora_congestion']:.1f}%↓",
+                             ha='center', va='bottom', fontweight='bold')
         
-        plt.tight_layout()
-        plt.savefig('comparativa_soluciones.png')
+        fig.tight_layout()
+        fig.savefig('comparativa_soluciones.png')
         
         print("Gráfico comparativo generado y guardado como 'comparativa_soluciones.png'")
         
         # Crear tabla de resultados
-        self.crear_tabla_resultados(soluciones, tiempos_espera[1:], congestiones[1:], tiempo_esp_original, congestion_original)
+        self.crear_tabla_resultados(soluciones, tiempos_espera[1:], congestiones[1:], tiempo_esp_original,
+                                    congestion_original, comparacion)
         
         return fig
 
 
-    def crear_tabla_resultados(self,soluciones, tiempos_espera, congestiones, tiempo_original, congestion_original):
+    def crear_tabla_resultados(self,soluciones, tiempos_espera, congestiones, tiempo_original, congestion_original,
+                               comparacion=None):
+        """
+        comparacion: resultados opcionales de comparar_planes (original primero);
+        si se dan, se muestran los intervalos de confianza y la mejora pareada.
+        """
+        def con_intervalo(valor, indice, clave):
+            if comparacion is None:
+                return "{:.2f}".format(valor)
+            texto = "{:.2f} ± {:.2f}".format(valor, comparacion[indice]['ic_' + clave])
+            if clave == 'tiempo_espera' and 'espera' in comparacion[indice]:
+                # Cola de la distribución de esperas de todos los vehículos
+                espera = comparacion[indice]['espera']
+                texto += " <small>(p95 {:.1f}, p99 {:.1f})</small>".format(espera['p95'], espera['p99'])
+            return texto
         
         html = """
         <html>
@@ -487,16 +698,19 @@ class GenerateResults:
                 <tr>
                     <td>Original (sin optimizar)</td>
                     <td>-</td>
-                    <td>{:.2f}</td>
+                    <td>{}</td>
                     <td>-</td>
-                    <td>{:.2f}</td>
+                    <td>{}</td>
                     <td>-</td>
                 </tr>
-        """.format(tiempo_original, congestion_original)
+        """.format(con_intervalo(tiempo_original, 0, 'tiempo_espera'),
+                   con_intervalo(congestion_original, 0, 'congestion'))
 
         for i, solucion in enumerate(soluciones):
             # Fix: Handle edge case with appropriate checks
-            if tiempo_original > 0.1:  # Only calculate if original value is meaningful
+            if comparacion is not None and tiempo_original > 0.1:
+                texto_tiempo, clase_tiempo = self._texto_mejora(comparacion[i + 1], 'tiempo_espera')
+            elif tiempo_original > 0.1:  # Only calculate if original value is meaningful
                 mejora_tiempo = ((tiempo_original - tiempos_espera[i]) / tiempo_original) * 100
                 clase_tiempo = "mejora" if mejora_tiempo > 0 else "empeora"
                 texto_tiempo = "{:.2f}%{}".format(abs(mejora_tiempo), "↓" if mejora_tiempo > 0 else "↑")
@@ -506,7 +720,9 @@ class GenerateResults:
                 texto_tiempo = "N/A"
             
             # Fix: Handle edge case with appropriate checks
-            if congestion_original > 1:  # Only calculate if original value is meaningful
+            if comparacion is not None and congestion_original > 1:
+                texto_congestion, clase_congestion = self._texto_mejora(comparacion[i + 1], 'congestion')
+            elif congestion_original > 1:  # Only calculate if original value is meaningful
                 mejora_congestion = ((congestion_original - congestiones[i]) / congestion_original) * 100
                 clase_congestion = "mejora" if mejora_congestion > 0 else "empeora"
                 texto_congestion = "{:.2f}%{}".format(abs(mejora_congestion), "↓" if mejora_congestion > 0 else "↑")
@@ -519,18 +735,27 @@ class GenerateResults:
                 <tr>
                     <td>Solución {}</td>
                     <td>{:.6f}</td>
-                    <td>{:.2f}</td>
+                    <td>{}</td>
                     <td class="{}">{}</td>
-                    <td>{:.2f}</td>
+                    <td>{}</td>
                     <td class="{}">{}</td>
                 </tr>
-            """.format(i+1, solucion.fitness, tiempos_espera[i], clase_tiempo, texto_tiempo, 
-                    congestiones[i], clase_congestion, texto_congestion)
+            """.format(i+1, solucion.fitness, con_intervalo(tiempos_espera[i], i + 1, 'tiempo_espera'),
+                    clase_tiempo, texto_tiempo,
+                    con_intervalo(congestiones[i], i + 1, 'congestion'), clase_congestion, texto_congestion)
         
         html += """
             </table>
             <p><i>Nota: Los valores de tiempo de espera son segundos promedio por vehículo.
             La congestión representa el número promedio de vehículos en cola.</i></p>
+        """
+        if comparacion is not None:
+            html += """
+            <p><i>Medias de {} réplicas con las mismas semillas para todos los planes;
+            ± es el semiancho del intervalo de confianza del 95%. Las mejoras son pareadas
+            réplica a réplica y se marcan solo si el intervalo no contiene el cero.</i></p>
+        """.format(comparacion[0]['replicas'])
+        html += """
         </body>
         </html>
         """
@@ -540,20 +765,34 @@ class GenerateResults:
         
         print("Tabla de resultados generada y guardada como 'resultados_optimizacion.html'")
 
-    def visualizar_resultados_completos(self, red_vial, mejores_soluciones):
-        """Función principal para generar todas las visualizaciones de resultados"""
-        # 1. Generar mapa con la mejor solución
-        mapa = self.visualizar_red_vial(red_vial, mejores_soluciones[0], 'mapa_mejor_solucion.html')
-        
-        # 2. Generar mapa para comparar estado original
-        mapa_original = self.visualizar_red_vial(self.crear_red_original(red_vial), None, 'mapa_original.html')
-        
-        # 3. Generar gráficos comparativos
-        grafico = self.generar_visualizacion_comparativa(red_vial, mejores_soluciones)
-        
-        # 4. Visualizar las tres mejores soluciones (opcional)
+    @staticmethod
+    def _texto_mejora(resultado, clave):
+        """Texto y clase CSS de una mejora pareada con su intervalo de confianza"""
+        mejora = resultado['mejora_' + clave]
+        texto = "{:.2f} ± {:.2f}%{}".format(abs(mejora), resultado['ic_mejora_' + clave],
+                                           "↓" if mejora > 0 else "↑")
+        if not resultado['mejora_' + clave + '_significativa']:
+            return texto + " (n.s.)", ""
+        return texto, "mejora" if mejora > 0 else "empeora"
+
+    def visualizar_resultados_completos(self, red_vial, mejores_soluciones, procesos=None):
+        """
+        Función principal para generar todas las visualizaciones de resultados.
+        `procesos` es el total para mapas y réplicas (None = todos los núcleos, 1 = en serie).
+        """
+        # 1. Mapa con la mejor solución, 2. mapa del estado original y
+        # 4. mapas de las tres mejores soluciones, dibujados en paralelo
+        mapas = [('mapa_mejor_solucion.html', self.plan_de_solucion(red_vial, mejores_soluciones[0])),
+                 ('mapa_original.html', self.plan_original(red_vial))]
         for i, solucion in enumerate(mejores_soluciones[:3]):
-            self.visualizar_red_vial(red_vial, solucion, f'mapa_solucion_{i+1}.html')
+            mapas.append((f'mapa_solucion_{i+1}.html', self.plan_de_solucion(red_vial, solucion)))
+        
+        # 3. Los gráficos comparativos se generan mientras se dibujan los mapas
+        self.renderizar_mapas(
+            red_vial, mapas, procesos,
+            en_paralelo=lambda libres: self.generar_visualizacion_comparativa(red_vial, mejores_soluciones,
+                                                                              procesos=libres)
+        )
         
         print("\nVisualización completa de resultados generada con éxito.")
         print("Archivos generados:")
@@ -562,4 +801,6 @@ class GenerateResults:
         print("- comparativa_soluciones.png (Gráfico comparativo)")
         print("- resultados_optimizacion.html (Tabla de resultados)")
         for i in range(min(3, len(mejores_soluciones))):
-            print(f"- mapa_solucion_{i+1}.html (Mapa con la solución #{i+1})")
\ No newline at end of file
+            print(f"- mapa_solucion_{i+1}.html (Mapa con la solución #{i+1})")
+        if self.formato_mapa == 'geojson':
+            print("- mapa_*.geojson (Red y plan de cada mapa en una capa GeoJSON)")
\ No newline at end of file